@@ -0,0 +1,151 @@
+"""
+Teste de carga concorrente do chatbot - HostFlow
+
+Threads leitoras chamam process_message sem parar enquanto threads escritoras
+adicionam exemplos de treinamento (novas intenções, padrões e respostas), enviam
+feedback e forçam re-treinos. Cada leitura é conferida contra o snapshot que a
+produziu: a intenção existe nele, a resposta é uma das respostas dessa intenção e o
+model_version devolvido é de um snapshot publicado (sem voltar atrás na mesma thread).
+Qualquer exceção ou inconsistência é contada; as asserções do final exigem zero, então
+o script também serve de verificação (código de saída diferente de zero em caso de falha).
+
+Roda num diretório temporário (cópia do modelo atual), sem alterar o modelo real.
+
+Uso (a partir de backend/hostflow-backend):
+    python benchmarks/chatbot_concurrency_benchmark.py --readers 8 --writers 2 --seconds 10
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.chatbot_retrain import chatbot_retrainer
+from src.chatbot_trainer import ChatbotTrainer
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+MESSAGES = ['oi', 'quanto custa', 'como faço uma reserva', 'quero cadastrar minha pousada',
+            'preciso de ajuda', 'obrigado', 'aceita pets', 'tem estacionamento', 'qual o horário do check-in']
+FALLBACKS = ("Desculpe, não entendi sua pergunta.", "Desculpe, não entendi sua pergunta. Pode reformular?")
+
+
+def track_published(trainer):
+    """Versões de todos os snapshots publicados (a atual e as que _publish criar daqui em diante)"""
+    published = {trainer.model_version}
+    publish = trainer._publish
+
+    def _publish():
+        publish()
+        published.add(trainer.model.version)
+
+    trainer._publish = _publish
+    return published
+
+
+def reader(trainer, published, stop, counters, errors):
+    done = 0
+    i = 0
+    last_version = 0
+    while not stop.is_set():
+        message = MESSAGES[i % len(MESSAGES)]
+        i += 1
+        try:
+            model = trainer.model
+            intent = trainer.extract_intent(message, model)
+            response = trainer.generate_response(intent, message, model)
+            if intent != 'unknown' and intent not in model.intent_patterns:
+                errors.append(f"intenção fora do snapshot: {intent}")
+            elif intent in model.response_templates and response not in model.response_templates[intent] \
+                    and response not in FALLBACKS:
+                errors.append(f"resposta fora do snapshot: {intent} -> {response[:40]}")
+            result = trainer.process_message(message)
+            if result['model_version'] not in published:
+                errors.append(f"model_version não publicado: {result['model_version']}")
+            elif result['model_version'] < last_version:
+                errors.append(f"model_version voltou: {last_version} -> {result['model_version']}")
+            last_version = max(last_version, result['model_version'])
+            done += 1
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+    counters.append(done)
+
+
+def writer(trainer, worker, stop, counters, errors):
+    done = 0
+    while not stop.is_set():
+        try:
+            n = done
+            trainer.add_training_example(f"pergunta {worker} {n} sobre serviço {n % 7}",
+                                         f"servico_{n % 5}", f"Resposta {worker}-{n % 3}")
+            trainer.add_feedback(MESSAGES[n % len(MESSAGES)], f"Resposta {worker}-{n % 3}", (n % 3) / 2)
+            if n % 25 == 0:
+                trainer.retrain_from_feedback()
+            done += 1
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+    counters.append(done)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--classifier', choices=['keyword', 'tfidf'], default='keyword')
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='hostflow-chatbot-')
+    for name in ('chatbot_model.pkl', 'training_data.json'):
+        if os.path.exists(os.path.join(SRC_DIR, name)):
+            shutil.copy(os.path.join(SRC_DIR, name), data_dir)
+
+    try:
+        trainer = ChatbotTrainer(classifier=args.classifier, data_dir=data_dir)
+        if not trainer.intent_patterns:
+            trainer.create_default_training_data()
+        version = trainer.model_version
+        published = track_published(trainer)
+
+        stop = threading.Event()
+        reads, writes, errors = [], [], []
+        # Exceção fora dos try das threads (ex.: na própria thread) também conta como erro
+        threading.excepthook = lambda hook: errors.append(f"{hook.exc_type.__name__} na thread {hook.thread.name}: {hook.exc_value}")
+        threads = [threading.Thread(target=reader, args=(trainer, published, stop, reads, errors))
+                   for _ in range(args.readers)]
+        threads += [threading.Thread(target=writer, args=(trainer, w, stop, writes, errors))
+                    for w in range(args.writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        trainer.flush_feedback()
+        chatbot_retrainer.shutdown()  # re-treinos automáticos do feedback terminam antes da verificação
+
+        print(f"classificador: {args.classifier}, {args.readers} leitoras, {args.writers} escritoras, {args.seconds:.0f}s")
+        print(f"leituras: {sum(reads):,} ({sum(reads) / args.seconds:,.0f}/s)")
+        print(f"escritas: {sum(writes):,} (exemplo + feedback), versão {version} -> {trainer.model_version}, "
+              f"{len(published)} snapshots publicados")
+        print(f"erros/inconsistências: {len(errors)}")
+        for error in errors[:10]:
+            print(f"  {error}")
+
+        assert not errors, f"{len(errors)} erros/inconsistências"
+        assert len(reads) == args.readers and len(writes) == args.writers, "thread terminou sem concluir"
+        assert sum(reads) > 0, "nenhuma leitura concluída"
+        assert trainer.model_version in published, "versão final não publicada"
+        if args.writers:
+            assert sum(writes) > 0 and trainer.model_version > version, "escritas não publicadas"
+        print("OK")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
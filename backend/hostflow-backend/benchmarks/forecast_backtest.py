@@ -0,0 +1,82 @@
+"""
+Backtest do motor de previsão sazonal - HostFlow
+
+Gera séries diárias sintéticas (sazonalidade semanal e anual + tendência + ruído)
+para N pousadas, ajusta Holt-Winters e sazonal ingênuo nos primeiros dias e mede
+acurácia, cobertura do intervalo e tempo de ajuste nos últimos `horizon` dias.
+
+Uso (a partir de backend/hostflow-backend):
+    python benchmarks/forecast_backtest.py --properties 100 --days 730 --horizon 28
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.forecasting import (
+    fit_holt_winters, forecast_holt_winters, update_holt_winters,
+    fit_seasonal_naive, forecast_seasonal_naive, Z_SCORES
+)
+
+
+def synthetic_revenue(n_properties: int, n_days: int, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_days)
+    base = rng.uniform(800, 5000, size=(n_properties, 1))
+    weekly = rng.uniform(0.1, 0.4, size=(n_properties, 1)) * np.sin(2 * np.pi * (t + rng.integers(0, 7, (n_properties, 1))) / 7)
+    yearly = rng.uniform(0.1, 0.3, size=(n_properties, 1)) * np.sin(2 * np.pi * t / 365)
+    trend = rng.uniform(-0.0002, 0.0008, size=(n_properties, 1)) * t
+    noise = rng.normal(0, rng.uniform(0.05, 0.15, size=(n_properties, 1)), size=(n_properties, n_days))
+    return np.maximum(base * (1 + weekly + yearly + trend + noise), 0)
+
+
+def evaluate(name, actual, mean, lower, upper, fit_seconds):
+    mae = np.abs(actual - mean).mean()
+    smape = (2 * np.abs(actual - mean) / np.maximum(np.abs(actual) + np.abs(mean), 1e-9)).mean() * 100
+    coverage = ((actual >= lower) & (actual <= upper)).mean() * 100
+    print(f"{name:<16} {mae:>10.1f} {smape:>9.2f}% {coverage:>11.1f}% {fit_seconds * 1000:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--properties', type=int, default=100)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--horizon', type=int, default=28)
+    parser.add_argument('--level', type=int, default=80, choices=sorted(Z_SCORES))
+    args = parser.parse_args()
+
+    Y = synthetic_revenue(args.properties, args.days)
+    train, test = Y[:, :-args.horizon], Y[:, -args.horizon:]
+    z = Z_SCORES[args.level]
+
+    print(f"{args.properties} pousadas, {train.shape[1]} dias de treino, horizonte {args.horizon} dias, "
+          f"intervalo {args.level}%\n")
+    print(f"{'método':<16} {'MAE':>10} {'sMAPE':>10} {'cobertura':>12} {'ajuste (ms)':>12}")
+
+    started = time.perf_counter()
+    hw = fit_holt_winters(train)
+    hw_seconds = time.perf_counter() - started
+    mean, lower, upper, _ = forecast_holt_winters(hw, args.horizon, z)
+    evaluate('holt_winters', test, mean, lower, upper, hw_seconds)
+
+    started = time.perf_counter()
+    naive = fit_seasonal_naive(train)
+    naive_seconds = time.perf_counter() - started
+    mean, lower, upper, _ = forecast_seasonal_naive(naive, args.horizon, z)
+    evaluate('seasonal_naive', test, mean, lower, upper, naive_seconds)
+
+    # Ajuste incremental: um dia fechado avança o estado sem nova busca em grade
+    hw_prefix = fit_holt_winters(train[:, :-1])
+    started = time.perf_counter()
+    update_holt_winters(hw_prefix, train[:, -1:])
+    print(f"\natualização incremental (1 dia, {args.properties} pousadas): "
+          f"{(time.perf_counter() - started) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Tempo de importação dos módulos do backend - HostFlow
+
+Importa cada módulo num processo novo com `python -X importtime` (o mesmo que um
+worker do gunicorn faz ao subir) e mostra o tempo total e os módulos mais caros,
+por tempo próprio e acumulado. Com --max-ms, sai com código 1 se algum módulo
+passar do limite, para que regressões no boot fiquem visíveis.
+
+O aquecimento dos modelos de IA em segundo plano é desligado (AI_WARMUP=false): só
+o custo da importação entra na medida. Sem DATABASE_URL, usa um SQLite temporário
+(a importação não acessa o banco). Vale o menor tempo das repetições.
+
+Uso (a partir de backend/hostflow-backend):
+    python benchmarks/import_time_benchmark.py --modules src.routes.ai_routes src.main --repeat 3
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(module: str, env: dict):
+    """Importa `module` num processo novo; retorna (segundos de parede, {módulo: (próprio_us, acumulado_us)})"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"falha ao importar {module}:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return elapsed, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=['src.routes.ai_routes', 'src.main'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=None, help='limite do tempo acumulado por módulo')
+    args = parser.parse_args()
+
+    env = dict(os.environ, AI_WARMUP='false', PYTHONPATH=BACKEND_DIR)
+    tmp_dir = None
+    if not env.get('DATABASE_URL'):
+        tmp_dir = tempfile.mkdtemp(prefix='hostflow-import-')
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp_dir, 'hostflow.db')}"
+
+    over_budget = []
+    for module in args.modules:
+        runs = [import_profile(module, env) for _ in range(args.repeat)]
+        elapsed, modules = min(runs, key=lambda run: run[1][module][1])
+        cumulative_ms = modules[module][1] / 1000
+
+        print(f"\n{module}: {cumulative_ms:,.1f} ms de importação "
+              f"(processo: {elapsed * 1000:,.0f} ms, {len(modules)} módulos, melhor de {args.repeat})")
+        print(f"  {'próprio (ms)':>12} {'acumulado (ms)':>15}  módulo")
+        for name, (self_us, cum_us) in sorted(modules.items(), key=lambda m: -m[1][0])[:args.top]:
+            print(f"  {self_us / 1000:12,.1f} {cum_us / 1000:15,.1f}  {name}")
+
+        own = sorted(((name, t) for name, t in modules.items() if name.startswith('src.')), key=lambda m: -m[1][1])
+        print("  módulos do backend por tempo acumulado:")
+        for name, (self_us, cum_us) in own[:args.top]:
+            print(f"  {self_us / 1000:12,.1f} {cum_us / 1000:15,.1f}  {name}")
+
+        if args.max_ms is not None and cumulative_ms > args.max_ms:
+            over_budget.append(f"{module}: {cumulative_ms:,.1f} ms > {args.max_ms:,.1f} ms")
+
+    if tmp_dir:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if over_budget:
+        print("\nacima do limite:")
+        for line in over_budget:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
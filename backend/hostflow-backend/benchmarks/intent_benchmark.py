@@ -0,0 +1,91 @@
+"""
+Benchmark dos classificadores de intenção do chatbot - HostFlow
+
+Gera mensagens rotuladas a partir dos padrões de treinamento atuais (com palavras
+de preenchimento e, em parte delas, sem acentos, como os hóspedes costumam digitar)
+e compara acurácia e vazão do casamento por palavras-chave com o TF-IDF em lote.
+
+Uso (a partir de backend/hostflow-backend):
+    python benchmarks/intent_benchmark.py --messages 20000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unicodedata
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.chatbot_trainer import ChatbotTrainer
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+FILLERS = ['por favor', 'gostaria de saber', 'queria', 'me ajuda com', 'sobre', 'hoje', 'agora', 'então',
+           'vocês', 'minha pousada', 'urgente', 'uma dúvida']
+
+
+def strip_accents(text: str) -> str:
+    return ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+
+
+def synthetic_messages(intent_patterns, n_messages: int, accent_free: float, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    labeled = [(intent, pattern) for intent, patterns in intent_patterns.items() for pattern in patterns]
+    messages, labels = [], []
+    for i in rng.integers(0, len(labeled), size=n_messages):
+        intent, pattern = labeled[i]
+        words = list(rng.choice(FILLERS, size=rng.integers(1, 4))) + [pattern]
+        rng.shuffle(words)
+        message = ' '.join(words)
+        if rng.random() < accent_free:
+            message = strip_accents(message)
+        messages.append(message)
+        labels.append(intent)
+    return messages, labels
+
+
+def evaluate(name, predict, messages, labels):
+    started = time.perf_counter()
+    predicted = predict(messages)
+    seconds = time.perf_counter() - started
+    accuracy = np.mean([p == l for p, l in zip(predicted, labels)]) * 100
+    unknown = np.mean([p == 'unknown' for p in predicted]) * 100
+    print(f"{name:<22} {accuracy:>9.1f}% {unknown:>9.1f}% {len(messages) / seconds:>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--accent-free', type=float, default=0.3, help='fração de mensagens sem acentos')
+    args = parser.parse_args()
+
+    # Cópia do modelo e dos dados de treinamento: o benchmark nunca grava em src/ nem em src/database
+    data_dir = tempfile.mkdtemp(prefix='hostflow-intent-')
+    for name in ('chatbot_model.pkl', 'training_data.json'):
+        if os.path.exists(os.path.join(SRC_DIR, name)):
+            shutil.copy(os.path.join(SRC_DIR, name), data_dir)
+
+    try:
+        keyword = ChatbotTrainer(classifier='keyword', data_dir=data_dir)
+        if not keyword.intent_patterns:
+            keyword.create_default_training_data()
+        tfidf = ChatbotTrainer(classifier='tfidf', data_dir=data_dir)
+        messages, labels = synthetic_messages(keyword.intent_patterns, args.messages, args.accent_free)
+
+        print(f"{len(messages)} mensagens, {sum(len(p) for p in keyword.intent_patterns.values())} padrões, "
+              f"{len(keyword.intent_patterns)} intenções\n")
+        print(f"{'classificador':<22} {'acurácia':>10} {'unknown':>10} {'mensagens/s':>14}")
+        evaluate('keyword', keyword.classify_batch, messages, labels)
+        evaluate('tfidf (uma a uma)', lambda ms: [tfidf.extract_intent(m) for m in ms], messages, labels)
+        evaluate('tfidf (classify_batch)', tfidf.classify_batch, messages, labels)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark do motor de LTV e coortes - HostFlow
+
+Gera linhas sintéticas (hóspede, mês, reservas, receita, noites), no mesmo formato
+retornado pela consulta agrupada, e mede o tempo de compute_ltv_snapshot.
+
+Uso (a partir de backend/hostflow-backend):
+    python benchmarks/ltv_benchmark.py --guests 500000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.guest_ltv import compute_ltv_snapshot, month_index
+
+
+def synthetic_guest_months(n_guests: int, current_month: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # Cada hóspede fica ativo em alguns meses dos 24 seguintes à aquisição
+    active_months = rng.geometric(0.55, size=n_guests)
+    first = current_month - rng.integers(0, 36, size=n_guests)
+    guest_ids = np.repeat(np.arange(1, n_guests + 1), active_months)
+    months = np.repeat(first, active_months) + rng.integers(0, 24, size=active_months.sum())
+    rows = len(guest_ids)
+    bookings = rng.integers(1, 3, size=rows)
+    nights = bookings * rng.integers(1, 6, size=rows)
+    revenue = nights * rng.uniform(180, 650, size=rows)
+    data = np.column_stack([guest_ids, months, bookings, revenue, nights]).astype(float)
+    # Mesmo formato da consulta: uma linha por (hóspede, mês)
+    _, unique_rows = np.unique(data[:, :2], axis=0, return_index=True)
+    return data[np.sort(unique_rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guests', type=int, default=500_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    current = month_index(date.today())
+    rows = synthetic_guest_months(args.guests, current)
+    print(f"{args.guests} hóspedes, {len(rows)} linhas (hóspede, mês)")
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        snapshot = compute_ltv_snapshot(rows, current)
+        timings.append(time.perf_counter() - started)
+
+    print(f"compute_ltv_snapshot: melhor {min(timings):.3f} s, média {sum(timings) / len(timings):.3f} s")
+    print(f"LTV médio R$ {snapshot['avg_ltv']:,.2f} | recompra {snapshot['repeat_rate'] * 100:.1f}% | "
+          f"retenção M1 da coorte mais antiga {snapshot['cohorts']['retention'][0][1] * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
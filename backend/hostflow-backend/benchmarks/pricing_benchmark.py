@@ -0,0 +1,77 @@
+"""
+Benchmark do recomendador de preços - HostFlow
+
+Gera acomodações e reservas sintéticas (antecedência exponencial, estadias de 1 a 6
+noites) para N pousadas e mede o tempo de compute_price_recommendations.
+
+Uso (a partir de backend/hostflow-backend):
+    python benchmarks/pricing_benchmark.py --properties 1000 --units 20
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pricing import compute_price_recommendations, HORIZON_DAYS, LOOKBACK_DAYS
+
+
+def synthetic_inputs(n_properties: int, units: int, today: date, occupancy: float = 0.6, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    n_accs = n_properties * units
+    today64 = np.datetime64(today, 'D')
+
+    # Estadias cobrindo a janela histórica + futura com a ocupação desejada
+    window = LOOKBACK_DAYS + HORIZON_DAYS
+    n_bookings = int(n_accs * window * occupancy / 3.5)
+    stay = rng.integers(1, 7, size=n_bookings)
+    check_in = today64 - LOOKBACK_DAYS + rng.integers(0, window, size=n_bookings)
+    lead = np.minimum(rng.exponential(30, size=n_bookings).astype(np.int64), 365)
+    created = check_in - lead
+    # Reservas futuras só existem se já foram criadas
+    known = created <= today64
+
+    return {
+        'accommodation_ids': np.arange(1, n_accs + 1, dtype=np.int64),
+        'property_ids': np.repeat(np.arange(1, n_properties + 1, dtype=np.int64), units),
+        'base_price': rng.uniform(150, 600, size=n_accs).round(),
+        'weekend_price': np.where(rng.random(n_accs) < 0.7, rng.uniform(200, 800, size=n_accs).round(), np.nan),
+        'booking_accommodation': rng.integers(1, n_accs + 1, size=n_bookings)[known],
+        'check_in': check_in[known],
+        'check_out': (check_in + stay)[known],
+        'created': created[known]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--properties', type=int, default=1000)
+    parser.add_argument('--units', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    today = date.today()
+    inputs = synthetic_inputs(args.properties, args.units, today)
+    print(f"{args.properties} pousadas x {args.units} acomodações, {len(inputs['check_in'])} reservas, "
+          f"{args.properties * args.units * HORIZON_DAYS} noites-quarto futuras")
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = compute_price_recommendations(inputs, today)
+        timings.append(time.perf_counter() - started)
+
+    open_nights = ~result['booked']
+    multipliers = result['multiplier'][open_nights]
+    print(f"compute_price_recommendations: melhor {min(timings):.3f} s, média {sum(timings) / len(timings):.3f} s")
+    print(f"{open_nights.sum()} noites livres | aumento em {(multipliers > 1.001).mean() * 100:.1f}% | "
+          f"redução em {(multipliers < 0.999).mean() * 100:.1f}% | multiplicador médio {multipliers.mean():.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Teste de carga HTTP: servidor de desenvolvimento do Flask x gunicorn - HostFlow
+
+Sobe o backend em cada modo (python src/main.py ou gunicorn -c gunicorn.conf.py),
+espera a primeira resposta e dispara requisições com clientes em processos separados,
+cada um com uma conexão keep-alive, por um tempo fixo. Mostra requisições por
+segundo, latência (p50/p95/p99) e erros de cada modo.
+
+Sem DATABASE_URL, usa uma cópia temporária em SQLite preparada com `flask db init`.
+As variáveis do gunicorn (WEB_CONCURRENCY, GUNICORN_THREADS, ...) valem como no deploy.
+
+Uso (a partir de backend/hostflow-backend):
+    python benchmarks/serving_benchmark.py --modes dev gunicorn --clients 16 --seconds 15
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (método, caminho, corpo JSON): leitura simples do banco e uma resposta do chatbot
+REQUESTS = [
+    ('GET', '/api/properties', None),
+    ('GET', '/api/accommodations', None),
+    ('POST', '/api/chatbot', {'message': 'quanto custa a diária?'}),
+    ('POST', '/api/chatbot', {'message': 'tem disponibilidade para sábado?'}),
+]
+
+
+def server_command(mode: str):
+    if mode == 'dev':
+        return [sys.executable, 'src/main.py']
+    return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'src.main:app']
+
+
+def wait_ready(port: int, process, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"o servidor terminou com código {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/properties')
+            if conn.getresponse().status < 500:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("o servidor não respondeu a tempo")
+
+
+def client(port: int, seconds: float, worker: int, results):
+    """Um cliente: conexão keep-alive reaproveitada enquanto o servidor permitir"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    i = worker
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        method, path, body = REQUESTS[i % len(REQUESTS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            if body is None:
+                conn.request(method, path)
+            else:
+                conn.request(method, path, json.dumps(body), {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    results.put((latencies, errors))
+
+
+def run_mode(mode: str, args, env: dict):
+    server = subprocess.Popen(server_command(mode), cwd=BACKEND_DIR, env=dict(env, PORT=str(args.port)),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(args.port, server)
+        time.sleep(args.warmup)  # aquecimento dos módulos de IA em segundo plano
+
+        results = multiprocessing.Queue()
+        clients = [multiprocessing.Process(target=client, args=(args.port, args.seconds, w, results))
+                   for w in range(args.clients)]
+        for process in clients:
+            process.start()
+        collected = [results.get() for _ in clients]
+        for process in clients:
+            process.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = np.array([t for lat, _ in collected for t in lat]) * 1000
+    errors = sum(e for _, e in collected)
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / args.seconds,
+        'p50': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+        'p95': float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+        'p99': float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+        'errors': errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=['dev', 'gunicorn'], default=['dev', 'gunicorn'])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=15.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, GUNICORN_ACCESS_LOG='')
+    tmp_dir = None
+    if not env.get('DATABASE_URL'):
+        tmp_dir = tempfile.mkdtemp(prefix='hostflow-serving-')
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp_dir, 'hostflow.db')}"
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'src.main', 'db', 'init'], cwd=BACKEND_DIR,
+                       env=env, check=True, stdout=subprocess.DEVNULL)
+
+    try:
+        print(f"{args.clients} clientes, {args.seconds:.0f}s por modo, {len(REQUESTS)} tipos de requisição")
+        print(f"{'modo':>10} {'req/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'erros':>6}")
+        for mode in args.modes:
+            r = run_mode(mode, args, env)
+            print(f"{mode:>10} {r['rps']:9,.0f} {r['p50']:9.1f} {r['p95']:9.1f} {r['p99']:9.1f} {r['errors']:6}")
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Configuração do gunicorn para produção - HostFlow
+
+Uso (a partir de backend/hostflow-backend):
+    flask --app src.main db init && gunicorn -c gunicorn.conf.py src.main:app
+
+Todos os parâmetros vêm de variáveis de ambiente (com os padrões abaixo):
+    PORT                      porta HTTP (10000, a padrão do Render)
+    WEB_CONCURRENCY           processos worker (2 x CPUs + 1)
+    GUNICORN_THREADS          threads por worker (4; só com worker gthread)
+    GUNICORN_WORKER_CLASS     classe do worker (gthread)
+    GUNICORN_PRELOAD          importa a aplicação no master antes do fork (true)
+    GUNICORN_TIMEOUT          segundos até um worker travado ser reiniciado (60)
+    GUNICORN_KEEPALIVE        segundos de keep-alive das conexões (5)
+    GUNICORN_MAX_REQUESTS     reinicia o worker após N requisições (0 = nunca)
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Com preload, o código é importado uma vez no master e compartilhado (copy-on-write) pelos
+# workers. create_app não abre conexões nem inicia threads, então nada disso é herdado.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None  # vazio desliga o log de acesso
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """
+    Em cada worker: descarta o pool de conexões herdado do master (uma conexão nunca é
+    usada por dois processos) e inicia as threads de segundo plano, que não sobrevivem ao fork.
+    """
+    from src.main import app, start_background_services
+    from src.models.user import db
+
+    with app.app_context():
+        # close=False: não fecha as conexões do master, só deixa de usá-las neste processo
+        db.engine.dispose(close=False)
+    start_background_services(app)
+
+
+def when_ready(server):
+    """
+    Com preload, importa no master os módulos de IA e análise (NumPy), que a aplicação só
+    carrega no primeiro uso: os workers herdam as páginas já carregadas em vez de importá-los cada um.
+    """
+    if preload_app:
+        import src.ai_agent
+        import src.analytics
+        import src.chatbot_trainer
+        import src.churn_scoring
+        import src.forecasting
+        import src.pricing
@@ -5,9 +5,52 @@ Baseado no protótipo de prompt de sistema fornecido
 
 import random
 import json
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from functools import wraps
 from typing import Dict, List, Any
 
+from src.insight_data import insight_data_store, InsightDataStore
+from src.anomaly_detection import METRIC_LABELS
+
+# Seções da análise completa: chave no resultado -> método do agente
+ANALYSIS_SECTIONS = {
+    'data_collection': 'collect_and_process_data',
+    'commercial_analysis': 'analyze_commercial_performance',
+    'marketing_analysis': 'analyze_marketing_performance',
+    'predictive_analysis': 'generate_predictive_analysis',
+    'actionable_insights': 'generate_actionable_insights',
+    'reports': 'generate_reports_and_visualization',
+    'ltv_analysis': 'analyze_ltv_and_proactive_sales'
+}
+
+
+def memoized_section(method):
+    """
+    Memoriza o resultado de uma seção de análise pela versão do snapshot de dados.
+    Sem `data`, usa o snapshot atual; o resultado só é recalculado quando a versão muda.
+    Snapshots por pousada têm entradas próprias no cache.
+    """
+    @wraps(method)
+    def wrapper(self, data: Dict[str, Any] = None):
+        data = data if data is not None else self.historical_data
+        version = data['data_version']
+
+        key = (method.__name__, data.get('property_id'))
+
+        cached = self._section_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        result = method(self, data)
+        with self._section_lock:
+            self._section_cache[key] = (version, result)
+        return result
+
+    return wrapper
+
+
 class InsightAI:
     """
     Agente de IA especializado em insights e análises preditivas para SaaS de pousadas.
@@ -17,39 +60,85 @@ class InsightAI:
     Personalidade: Analítica, objetiva, proativa, precisa, estratégica, imparcial e focada em resultados
     """
     
-    def __init__(self):
+    def __init__(self, data_store: InsightDataStore = None):
         self.name = "InsightAI"
         self.personality = "Analítica, objetiva, proativa, precisa, estratégica, imparcial e focada em resultados"
         self.tone = "Formal, claro, conciso e direto"
         
-        # Dados simulados para análise
-        self.historical_data = self._generate_historical_data()
+        # Snapshot analítico calculado em segundo plano a partir do banco de dados
+        self.data_store = data_store or insight_data_store
         
-    def _generate_historical_data(self) -> Dict[str, Any]:
-        """Gera dados históricos simulados para análise"""
+        # Resultados por seção: (nome do método, pousada) -> (data_version, resultado)
+        self._section_cache = {}
+        self._section_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=len(ANALYSIS_SECTIONS), thread_name_prefix='insight-ai')
+    
+    @property
+    def historical_data(self) -> Dict[str, Any]:
+        """Snapshot atual dos dados históricos (últimos meses fechados)"""
+        return self.data_store.get_snapshot()
+    
+    @staticmethod
+    def _growth(series: List[float]) -> float:
+        """Variação percentual entre os dois últimos valores da série"""
+        if len(series) < 2 or not series[-2]:
+            return 0.0
+        return (series[-1] - series[-2]) / series[-2] * 100
+    
+    @staticmethod
+    def _forecast_outlook(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Previsão dos próximos dias comparada com o último mês fechado (None sem modelos ajustados)"""
+        forecast = data.get('forecast')
+        if not forecast:
+            return None
+        last_month = data['revenue_monthly'][-1] if data['revenue_monthly'] else 0
+        value = forecast['revenue']['value']
         return {
-            'revenue_monthly': [35000, 38000, 42000, 45230],  # Últimos 4 meses
-            'occupancy_rate': [65, 70, 75, 78],  # Taxa de ocupação %
-            'guest_count': [120, 130, 135, 142],  # Número de hóspedes
-            'checkins_daily': [8, 10, 11, 12],  # Check-ins por dia
-            'booking_conversion': [0.15, 0.18, 0.20, 0.22],  # Taxa de conversão
-            'customer_satisfaction': [4.2, 4.3, 4.4, 4.5],  # Avaliação média
-            'marketing_roi': [2.1, 2.3, 2.5, 2.8],  # ROI de marketing
-            'churn_risk_clients': ['Cliente A', 'Cliente B'],  # Clientes em risco
-            'high_value_clients': ['Cliente C', 'Cliente D', 'Cliente E']
+            'horizon_days': forecast['horizon_days'],
+            'interval_level': forecast['interval_level'],
+            'revenue': value,
+            'revenue_range': forecast['revenue']['range'],
+            'occupancy': forecast['occupancy']['value'],
+            'change': (value / last_month - 1) * 100 if last_month else None
         }
     
-    def collect_and_process_data(self) -> Dict[str, Any]:
+    @staticmethod
+    def build_anomaly_insights(anomalies: List[Dict[str, Any]], limit: int = 3) -> List[Dict[str, Any]]:
+        """Insights acionáveis a partir das anomalias mais recentes do fluxo de reservas"""
+        insights = []
+        for anomaly in anomalies[:limit]:
+            label = METRIC_LABELS.get(anomaly['metric'], anomaly['metric'])
+            spike = anomaly['direction'] == 'spike'
+            # Pico de cancelamentos e queda de valor exigem ação imediata
+            urgent = (anomaly['metric'] == 'cancellations_per_hour') == spike
+            insights.append({
+                'type': 'anomaly',
+                'priority': 'high' if urgent else 'medium',
+                'title': f'Anomalia: {label}',
+                'description': (f'{label} {"acima" if spike else "abaixo"} do padrão: {anomaly["value"]:,.2f} '
+                                f'contra {anomaly["expected"]:,.2f} esperado ({anomaly["z_score"]:+.1f} desvios).'),
+                'action': 'Verificar a origem das reservas e a configuração de preços da pousada.',
+                'impact': 'Evitar perda de receita por comportamento inesperado',
+                'timeline': 'Imediato',
+                'property_id': anomaly['property_id'],
+                'detected_at': anomaly['detected_at']
+            })
+        return insights
+    
+    @memoized_section
+    def collect_and_process_data(self, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         1. Coleta e Processamento de Dados
         Integra e coleta dados de diversas fontes do sistema SaaS
         """
         processed_data = {
-            'data_sources': ['CRM', 'Sistema de Reservas', 'Analytics', 'Financeiro'],
-            'last_update': datetime.now().isoformat(),
-            'data_quality_score': 95.5,
-            'records_processed': 15420,
-            'anomalies_detected': 2
+            'data_sources': ['Reservas', 'Hóspedes', 'Acomodações'],
+            'last_update': data['built_at'],
+            'data_version': data['data_version'],
+            'data_quality_score': data['data_quality_score'],
+            'records_processed': data['records_processed'],
+            'anomalies_detected': len(data['anomalies']),
+            'anomalies': data['anomalies'][:5]
         }
         
         return {
@@ -59,18 +148,20 @@ class InsightAI:
             'details': processed_data
         }
     
-    def analyze_commercial_performance(self) -> Dict[str, Any]:
+    @memoized_section
+    def analyze_commercial_performance(self, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         2. Análise de Desempenho Comercial
         Analisa métricas de vendas e identifica drivers de performance
         """
-        revenue_growth = ((self.historical_data['revenue_monthly'][-1] - 
-                          self.historical_data['revenue_monthly'][-2]) / 
-                         self.historical_data['revenue_monthly'][-2]) * 100
+        revenue_growth = self._growth(data['revenue_monthly'])
         
         analysis = {
-            'revenue_trend': 'Crescimento consistente',
+            'revenue_trend': 'Crescimento' if revenue_growth > 0 else 'Estável' if revenue_growth == 0 else 'Queda',
             'growth_rate': f"{revenue_growth:.1f}%",
+            'revenue_monthly': dict(zip(data['months'], data['revenue_monthly'])),
+            'occupancy_rate': dict(zip(data['months'], data['occupancy_rate'])),
+            'booking_conversion': data['booking_conversion'][-1],
             'key_drivers': [
                 'Aumento na taxa de ocupação',
                 'Melhoria no ticket médio',
@@ -89,25 +180,23 @@ class InsightAI:
         return {
             'action': 'Análise de Desempenho Comercial',
             'status': 'Concluído',
-            'summary': f'Receita cresceu {revenue_growth:.1f}% no último mês. Tendência positiva identificada.',
+            'summary': f'Receita variou {revenue_growth:+.1f}% no último mês fechado.',
             'details': analysis
         }
     
-    def analyze_marketing_performance(self) -> Dict[str, Any]:
+    @memoized_section
+    def analyze_marketing_performance(self, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         3. Análise de Desempenho de Marketing
         Avalia eficácia de canais e campanhas de marketing
         """
-        roi_improvement = ((self.historical_data['marketing_roi'][-1] - 
-                           self.historical_data['marketing_roi'][-2]) / 
-                          self.historical_data['marketing_roi'][-2]) * 100
+        channels = data['source_conversion']
+        conversion_growth = self._growth(data['booking_conversion'])
+        best_channel = channels[0]['channel'] if channels else 'N/D'
         
         analysis = {
-            'best_channels': [
-                {'channel': 'Google Ads', 'roi': 3.2, 'conversion': 0.25},
-                {'channel': 'Facebook Ads', 'roi': 2.8, 'conversion': 0.22},
-                {'channel': 'Instagram', 'roi': 2.1, 'conversion': 0.18}
-            ],
+            'best_channels': channels[:3],
+            'conversion_trend': f"{conversion_growth:+.1f}%",
             'audience_segments': [
                 {'segment': 'Casais 25-35 anos', 'responsiveness': 'Alta', 'ltv': 1200},
                 {'segment': 'Famílias com crianças', 'responsiveness': 'Média', 'ltv': 950},
@@ -123,73 +212,103 @@ class InsightAI:
         return {
             'action': 'Análise de Desempenho de Marketing',
             'status': 'Concluído',
-            'summary': f'ROI de marketing melhorou {roi_improvement:.1f}%. Google Ads é o canal mais eficaz.',
+            'summary': f'Conversão de reservas variou {conversion_growth:+.1f}%. {best_channel} é o canal mais eficaz.',
             'details': analysis
         }
     
-    def generate_predictive_analysis(self) -> Dict[str, Any]:
+    @memoized_section
+    def generate_predictive_analysis(self, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         4. Análises Preditivas e Previsões
         Gera previsões baseadas em dados históricos
         """
-        # Previsão de receita para próximo mês
-        revenue_trend = sum(self.historical_data['revenue_monthly'][-3:]) / 3
-        predicted_revenue = revenue_trend * 1.08  # Crescimento estimado de 8%
+        forecast = data['forecast']
         
-        # Previsão de ocupação
-        occupancy_trend = sum(self.historical_data['occupancy_rate'][-3:]) / 3
-        predicted_occupancy = min(occupancy_trend * 1.05, 95)  # Máximo 95%
+        if forecast:
+            # Holt-Winters por pousada sobre fatos diários (próximos 30 dias)
+            predicted_revenue = forecast['revenue']['value']
+            revenue_range = forecast['revenue']['range']
+            predicted_occupancy = forecast['occupancy']['value']
+            occupancy_range = forecast['occupancy']['range']
+            interval_level = forecast['interval_level']
+            method = 'holt_winters'
+        else:
+            # Modelos ainda não ajustados: média dos últimos 3 meses, sem intervalo
+            predicted_revenue = sum(data['revenue_monthly'][-3:]) / 3
+            revenue_range = [predicted_revenue, predicted_revenue]
+            predicted_occupancy = sum(data['occupancy_rate'][-3:]) / 3
+            occupancy_range = [predicted_occupancy, predicted_occupancy]
+            interval_level = 0
+            method = 'moving_average'
         
         predictions = {
             'next_month_revenue': {
                 'value': predicted_revenue,
-                'confidence': 85,
-                'range': [predicted_revenue * 0.9, predicted_revenue * 1.1]
+                'confidence': interval_level,
+                'range': revenue_range,
+                'method': method
             },
             'occupancy_forecast': {
                 'value': predicted_occupancy,
-                'confidence': 78,
-                'seasonal_factor': 'Alta temporada se aproximando'
+                'confidence': interval_level,
+                'range': occupancy_range,
+                'method': method
             },
+            # Probabilidade de nova reserva pelo score de churn do job diário (risco baixo = retorno provável)
             'lead_conversion_probability': {
-                'high_probability_leads': 15,
-                'medium_probability_leads': 28,
-                'low_probability_leads': 42
+                'high_probability_leads': data['churn_risk_counts']['low'],
+                'medium_probability_leads': data['churn_risk_counts']['medium'],
+                'low_probability_leads': data['churn_risk_counts']['high']
             },
             'churn_risk_analysis': {
-                'high_risk_clients': len(self.historical_data['churn_risk_clients']),
-                'risk_factors': ['Redução no uso', 'Atraso em pagamentos', 'Reclamações']
+                'high_risk_clients': data['churn_risk_counts']['high'],
+                'risk_factors': ['Tempo desde a última estadia', 'Frequência de estadias', 'Valor gasto']
             }
         }
         
         return {
             'action': 'Análises Preditivas e Previsões',
             'status': 'Concluído',
-            'summary': f'Receita prevista para próximo mês: R$ {predicted_revenue:,.0f} (confiança: 85%)',
+            'summary': f'Receita prevista para os próximos 30 dias: R$ {predicted_revenue:,.0f} (intervalo de {interval_level}%: R$ {revenue_range[0]:,.0f} a R$ {revenue_range[1]:,.0f})',
             'details': predictions
         }
     
-    def generate_actionable_insights(self) -> List[Dict[str, Any]]:
+    @memoized_section
+    def generate_actionable_insights(self, data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
         5. Geração de Insights Acionáveis e Recomendações
         Transforma dados em insights claros e acionáveis
         """
+        channels = data['source_conversion']
+        best_channel = channels[0] if channels else {'channel': 'N/D', 'conversion': 0}
+        pricing = data.get('pricing')
+        
+        if pricing and pricing['open_nights']:
+            # Sugestões do recomendador de preços (ritmo de reservas x histórico)
+            pricing_action = (f'Aplicar as sugestões de preço dos próximos {pricing["days"]} dias: '
+                              f'{pricing["increases"]} noites com aumento e {pricing["decreases"]} com redução '
+                              f'(variação média {pricing["avg_change"] * 100:+.1f}%).')
+            pricing_impact = f'Diferença de R$ {pricing["revenue_delta"]:,.0f} nas noites disponíveis'
+        else:
+            pricing_action = 'Implementar estratégia de preços dinâmicos e melhorar SEO local.'
+            pricing_impact = 'Potencial aumento de 15% na receita mensal'
+        
         insights = [
             {
                 'type': 'revenue_optimization',
                 'priority': 'high',
                 'title': 'Oportunidade de Aumento de Receita',
-                'description': 'A taxa de ocupação está em 78%. Com otimizações, pode chegar a 85%.',
-                'action': 'Implementar estratégia de preços dinâmicos e melhorar SEO local.',
-                'impact': 'Potencial aumento de 15% na receita mensal',
+                'description': f'A taxa de ocupação está em {data["occupancy_rate"][-1]:.0f}%. Com otimizações, pode chegar a 85%.',
+                'action': pricing_action,
+                'impact': pricing_impact,
                 'timeline': '30-45 dias'
             },
             {
                 'type': 'marketing_optimization',
                 'priority': 'medium',
                 'title': 'Otimização de Campanhas de Marketing',
-                'description': 'Google Ads apresenta ROI 20% superior aos outros canais.',
-                'action': 'Aumentar investimento em Google Ads em 30% e reduzir outros canais.',
+                'description': f'{best_channel["channel"]} apresenta a maior conversão ({best_channel["conversion"] * 100:.0f}%) entre os canais.',
+                'action': f'Aumentar investimento em {best_channel["channel"]} em 30% e reduzir outros canais.',
                 'impact': 'Melhoria de 12% no ROI geral de marketing',
                 'timeline': '15-20 dias'
             },
@@ -197,37 +316,51 @@ class InsightAI:
                 'type': 'customer_retention',
                 'priority': 'high',
                 'title': 'Prevenção de Churn',
-                'description': f'{len(self.historical_data["churn_risk_clients"])} clientes apresentam sinais de risco.',
+                'description': f'{data["churn_risk_counts"]["high"]} clientes apresentam sinais de risco.',
                 'action': 'Contatar clientes em risco com ofertas personalizadas e suporte dedicado.',
                 'impact': 'Redução de 40% na taxa de churn',
                 'timeline': '7-10 dias'
             },
-            {
+        ]
+        
+        outlook = self._forecast_outlook(data)
+        if outlook and outlook['change'] is not None:
+            rising = outlook['change'] >= 0
+            low, high = outlook['revenue_range']
+            insights.append({
                 'type': 'seasonal_preparation',
-                'priority': 'high',
-                'title': 'Preparação para Alta Temporada',
-                'description': 'Dados históricos indicam aumento de 35% na demanda nos próximos 2 meses.',
-                'action': 'Ajustar preços, preparar equipe e otimizar disponibilidade de quartos.',
-                'impact': 'Maximização da receita na alta temporada',
+                'priority': 'high' if abs(outlook['change']) >= 10 else 'medium',
+                'title': 'Preparação para Alta Temporada' if rising else 'Preparação para Baixa Temporada',
+                'description': (f'A previsão indica receita de R$ {outlook["revenue"]:,.0f} nos próximos '
+                                f'{outlook["horizon_days"]} dias ({outlook["change"]:+.0f}% vs último mês; intervalo de '
+                                f'{outlook["interval_level"]}%: R$ {low:,.0f} a R$ {high:,.0f}).'),
+                'action': ('Ajustar preços, preparar equipe e otimizar disponibilidade de quartos.' if rising
+                           else 'Criar promoções e pacotes para estimular a demanda no período.'),
+                'impact': ('Maximização da receita na alta temporada' if rising
+                           else 'Redução das noites ociosas na baixa temporada'),
                 'timeline': '20-30 dias'
-            }
-        ]
+            })
         
-        return insights
+        return self.build_anomaly_insights(data['anomalies']) + insights
     
-    def generate_reports_and_visualization(self) -> Dict[str, Any]:
+    @memoized_section
+    def generate_reports_and_visualization(self, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         6. Relatórios e Visualização de Dados
         Gera relatórios estruturados para diferentes stakeholders
         """
+        occupancy = data['occupancy_rate']
+        channels = data['source_conversion']
+        outlook = self._forecast_outlook(data)
+        
         reports = {
             'executive_summary': {
                 'target_audience': 'CEO/Diretoria',
                 'key_metrics': {
-                    'revenue_growth': '+12%',
-                    'occupancy_improvement': '+5%',
-                    'customer_satisfaction': '4.5/5.0',
-                    'roi_marketing': '2.8x'
+                    'revenue_growth': f"{self._growth(data['revenue_monthly']):+.0f}%",
+                    'occupancy_improvement': f"{occupancy[-1] - occupancy[-2]:+.0f}%" if len(occupancy) > 1 else '+0%',
+                    'customer_satisfaction': f"{data['customer_satisfaction'][-1]:.1f}/5.0",
+                    'booking_conversion': f"{data['booking_conversion'][-1] * 100:.0f}%"
                 },
                 'strategic_recommendations': [
                     'Expandir para novos mercados',
@@ -238,9 +371,11 @@ class InsightAI:
             'marketing_report': {
                 'target_audience': 'Head de Marketing',
                 'campaign_performance': {
-                    'best_performing': 'Google Ads - ROI 3.2x',
-                    'optimization_needed': 'Instagram - ROI 2.1x',
-                    'budget_reallocation': 'Aumentar Google Ads em 30%'
+                    'best_performing': f"{channels[0]['channel']} - conversão de {channels[0]['conversion'] * 100:.0f}%"
+                    if channels else None,
+                    'optimization_needed': f"{channels[-1]['channel']} - conversão de {channels[-1]['conversion'] * 100:.0f}%"
+                    if len(channels) > 1 else None,
+                    'budget_reallocation': f"Aumentar investimento em {channels[0]['channel']}" if channels else None
                 },
                 'content_insights': {
                     'top_content': 'Experiências locais',
@@ -251,14 +386,16 @@ class InsightAI:
             'sales_report': {
                 'target_audience': 'Head de Vendas',
                 'conversion_analysis': {
-                    'current_rate': '22%',
+                    'current_rate': f"{data['booking_conversion'][-1] * 100:.0f}%",
                     'improvement_potential': '+8%',
                     'focus_areas': 'Follow-up automatizado, qualificação de leads'
                 },
                 'pipeline_health': {
-                    'high_probability_deals': 15,
-                    'revenue_forecast': 'R$ 52.000',
-                    'risk_mitigation': 'Atenção a 2 clientes em risco'
+                    'high_probability_deals': data['churn_risk_counts']['low'],
+                    'revenue_forecast': (f"R$ {outlook['revenue']:,.0f} nos próximos {outlook['horizon_days']} dias "
+                                         f"(R$ {outlook['revenue_range'][0]:,.0f} a R$ {outlook['revenue_range'][1]:,.0f})")
+                    if outlook else None,
+                    'risk_mitigation': f"Atenção a {data['churn_risk_counts']['high']} clientes em risco"
                 }
             }
         }
@@ -270,73 +407,60 @@ class InsightAI:
             'details': reports
         }
     
-    def analyze_ltv_and_proactive_sales(self) -> Dict[str, Any]:
+    @memoized_section
+    def analyze_ltv_and_proactive_sales(self, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         7. Ações para Aumento do LTV e Vendas Proativas
         Identifica oportunidades de upsell, cross-sell e retenção
         """
         today = datetime.now()
+        ltv = data['ltv']
         
         analysis = {
-            'special_dates_opportunities': [
-                {
-                    'client': 'Maria Silva',
-                    'event': 'Aniversário',
-                    'date': (today + timedelta(days=5)).strftime('%Y-%m-%d'),
-                    'suggested_action': 'Enviar desconto de 15% para próxima reserva',
-                    'expected_impact': 'R$ 300 em receita adicional'
-                },
-                {
-                    'client': 'João Santos',
-                    'event': '1 ano como cliente',
-                    'date': (today + timedelta(days=12)).strftime('%Y-%m-%d'),
-                    'suggested_action': 'Oferecer upgrade gratuito para suíte',
-                    'expected_impact': 'Aumento de 25% no LTV'
-                }
-            ],
+            'ltv_summary': {
+                'guests': ltv['guests'],
+                'avg_ltv': ltv['avg_ltv'],
+                'median_ltv': ltv['median_ltv'],
+                'p90_ltv': ltv['p90_ltv'],
+                'avg_booking_value': ltv['avg_booking_value'],
+                'repeat_rate': ltv['repeat_rate'],
+                'repeat_revenue_share': ltv['repeat_revenue_share']
+            },
+            'top_clients': ltv['top_guests'][:5],
             'upsell_opportunities': [
                 {
-                    'client_segment': 'Clientes que usam reserva básica há 3+ meses',
-                    'recommendation': 'Oferecer pacote premium com café da manhã',
-                    'probability': '70%',
-                    'revenue_potential': 'R$ 1.200/mês'
-                },
-                {
-                    'client_segment': 'Hóspedes frequentes (3+ estadias)',
+                    'client_segment': f"Hóspedes frequentes (3+ estadias): {ltv['frequent_guests']} clientes",
                     'recommendation': 'Programa de fidelidade com benefícios exclusivos',
-                    'probability': '85%',
-                    'revenue_potential': 'R$ 2.500/mês'
-                }
-            ],
-            'cross_sell_opportunities': [
-                {
-                    'base_service': 'Hospedagem',
-                    'additional_service': 'Passeios locais',
-                    'target_segment': 'Casais em lua de mel',
-                    'conversion_rate': '45%',
-                    'avg_ticket': 'R$ 180'
+                    'revenue_potential': f"R$ {ltv['frequent_guests'] * ltv['avg_booking_value'] * 0.1:,.0f}/mês"
                 }
-            ],
+            ] if ltv['frequent_guests'] else [],
             'referral_program': {
-                'high_potential_promoters': self.historical_data['high_value_clients'],
-                'suggested_incentive': '20% desconto para indicador e indicado',
-                'expected_new_clients': '8-12 por mês'
+                'high_potential_promoters': data['high_value_clients'],
+                'suggested_incentive': '20% desconto para indicador e indicado'
             },
+            # Clientes com score de churn alto, gravado pelo job diário
             'churn_prevention': [
                 {
-                    'client': 'Cliente A',
+                    'client': guest['name'],
                     'risk_level': 'Alto',
-                    'warning_signs': ['Redução de 20% no uso', 'Última reserva há 45 dias'],
+                    'warning_signs': [
+                        f"Última estadia há {(today.date() - date.fromisoformat(guest['last_stay_date'])).days} dias"
+                        if guest['last_stay_date'] else 'Sem data da última estadia',
+                        f"{guest['total_bookings']} estadia(s) no histórico"
+                    ],
                     'suggested_action': 'Contato imediato com oferta personalizada',
-                    'retention_probability': '60%'
+                    'retention_probability': f"{(1 - guest['churn_score']) * 100:.0f}%"
                 }
+                for guest in data['churn_risk_details']
             ]
         }
         
+        opportunities = len(analysis['upsell_opportunities']) + len(analysis['referral_program']['high_potential_promoters'])
         return {
             'action': 'Análise de LTV e Vendas Proativas',
             'status': 'Concluído',
-            'summary': 'Identificadas 12 oportunidades de aumento de receita e 2 clientes em risco.',
+            'summary': f'Identificadas {opportunities} oportunidades de aumento de receita e '
+                       f'{data["churn_risk_counts"]["high"]} clientes em risco.',
             'details': analysis
         }
     
@@ -344,52 +468,75 @@ class InsightAI:
         """
         Executa análise completa do agente de IA
         Retorna todos os insights e recomendações
+        
+        Todas as seções leem o mesmo snapshot e rodam em paralelo; seções já
+        calculadas para a versão atual dos dados vêm do cache.
         """
+        data = self.historical_data
+        futures = {
+            section: self._executor.submit(getattr(self, method), data)
+            for section, method in ANALYSIS_SECTIONS.items()
+        }
+        
         analysis_results = {
             'agent_info': {
                 'name': self.name,
                 'personality': self.personality,
                 'tone': self.tone,
-                'analysis_timestamp': datetime.now().isoformat()
-            },
-            'data_collection': self.collect_and_process_data(),
-            'commercial_analysis': self.analyze_commercial_performance(),
-            'marketing_analysis': self.analyze_marketing_performance(),
-            'predictive_analysis': self.generate_predictive_analysis(),
-            'actionable_insights': self.generate_actionable_insights(),
-            'reports': self.generate_reports_and_visualization(),
-            'ltv_analysis': self.analyze_ltv_and_proactive_sales()
+                'analysis_timestamp': datetime.now().isoformat(),
+                'data_version': data['data_version']
+            }
         }
+        for section, future in futures.items():
+            analysis_results[section] = future.result()
         
         return analysis_results
     
-    def get_daily_briefing(self) -> Dict[str, Any]:
+    def _key_alerts(self, data: Dict[str, Any]) -> List[str]:
+        alerts = [f"{data['churn_risk_counts']['high']} clientes em risco de churn identificados"]
+        outlook = self._forecast_outlook(data)
+        if outlook:
+            alerts.insert(0, f"Ocupação prevista de {outlook['occupancy']:.0f}% nos próximos {outlook['horizon_days']} dias")
+            if outlook['change'] is not None and abs(outlook['change']) >= 10:
+                season = 'Alta' if outlook['change'] > 0 else 'Baixa'
+                alerts.append(f"{season} temporada se aproxima: receita prevista {outlook['change']:+.0f}% vs último mês")
+        return alerts
+    
+    def get_daily_briefing(self, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Gera briefing diário com principais insights
         """
-        insights = self.generate_actionable_insights()
+        data = data if data is not None else self.historical_data
+        insights = self.generate_actionable_insights(data)
         high_priority_insights = [i for i in insights if i['priority'] == 'high']
         
         briefing = {
             'date': datetime.now().strftime('%Y-%m-%d'),
             'agent': self.name,
+            'property_id': data.get('property_id'),
             'summary': f"Identificados {len(high_priority_insights)} insights de alta prioridade que requerem ação imediata.",
-            'key_alerts': [
-                'Taxa de ocupação pode aumentar 7% com otimizações',
-                '2 clientes em risco de churn identificados',
-                'Alta temporada se aproxima - preparação necessária'
-            ],
+            'key_alerts': self._key_alerts(data),
             'priority_actions': high_priority_insights[:3],
             'performance_snapshot': {
-                'revenue_trend': '+12% vs mês anterior',
-                'occupancy_rate': '78%',
-                'customer_satisfaction': '4.5/5.0',
-                'marketing_roi': '2.8x'
-            }
+                'revenue_trend': f"{self._growth(data['revenue_monthly']):+.0f}% vs mês anterior",
+                'occupancy_rate': f"{data['occupancy_rate'][-1]:.0f}%",
+                'customer_satisfaction': f"{data['customer_satisfaction'][-1]:.1f}/5.0",
+                'booking_conversion': f"{data['booking_conversion'][-1] * 100:.0f}%"
+            },
+            'data_version': data['data_version']
         }
         
         return briefing
 
-# Instância global do agente
-insight_ai = InsightAI()
+# Instância global do agente, criada no primeiro uso
+_insight_ai = None
+_insight_ai_lock = threading.Lock()
+
+def get_insight_ai() -> InsightAI:
+    global _insight_ai
+    if _insight_ai is None:
+        with _insight_ai_lock:
+            if _insight_ai is None:
+                _insight_ai = InsightAI()
+    return _insight_ai
 
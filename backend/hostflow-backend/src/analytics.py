@@ -0,0 +1,357 @@
+"""
+Analytics de receita e ocupação - HostFlow
+Séries temporais por período e consolidação do portfólio de pousadas,
+agregadas diretamente no banco de dados
+"""
+
+import threading
+import time
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, case
+
+from src.models.user import db
+from src.models.booking import Booking
+from src.models.accommodation import Accommodation
+from src.models.property import Property
+
+# Status que contam como receita/noites efetivamente vendidas
+REVENUE_STATUSES = ['confirmed', 'checked_in', 'checked_out']
+
+METRICS = ['revenue', 'occupancy', 'adr', 'revpar']
+BUCKETS = ['day', 'week', 'month']
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """Retorna o primeiro dia do período que contém a data"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())  # semana começa na segunda
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, bucket: str) -> date:
+    """Retorna o primeiro dia do período seguinte"""
+    if bucket == 'week':
+        return start + timedelta(days=7)
+    if bucket == 'month':
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1, day=1)
+        return start.replace(month=start.month + 1, day=1)
+    return start + timedelta(days=1)
+
+
+def iter_buckets(start: date, end: date, bucket: str) -> List[date]:
+    """Lista os inícios de período entre duas datas (inclusive)"""
+    buckets = []
+    current = bucket_start(start, bucket)
+    while current <= end:
+        buckets.append(current)
+        current = next_bucket(current, bucket)
+    return buckets
+
+
+def bucket_expression(column, bucket: str):
+    """
+    Expressão SQL que trunca uma coluna de data para o início do período,
+    formatada como 'YYYY-MM-DD' tanto no PostgreSQL quanto no SQLite.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(func.date_trunc(bucket, column), 'YYYY-MM-DD')
+
+    # SQLite
+    if bucket == 'week':
+        return func.date(column, 'weekday 0', '-6 days')
+    if bucket == 'month':
+        return func.strftime('%Y-%m-01', column)
+    return func.strftime('%Y-%m-%d', column)
+
+
+def compute_metrics(revenue: float, nights: int, available_nights: int) -> Dict[str, float]:
+    """Calcula as métricas de hotelaria a partir dos totais de um período"""
+    return {
+        'revenue': round(revenue, 2),
+        'occupancy': round(nights / available_nights * 100, 1) if available_nights > 0 else 0,
+        'adr': round(revenue / nights, 2) if nights > 0 else 0,
+        'revpar': round(revenue / available_nights, 2) if available_nights > 0 else 0
+    }
+
+
+class TimeSeriesAnalytics:
+    """
+    Séries temporais de receita, ocupação, ADR e RevPAR.
+
+    Cada noite de uma estadia conta no período em que cai (com a receita rateada por
+    noite), como em src/forecasting.py. Períodos já encerrados ficam em cache, marcados
+    com a versão dos dados de reservas (quantidade e última alteração): criar, editar ou
+    cancelar uma reserva, em qualquer worker, invalida o cache na próxima requisição.
+    Apenas o período aberto (o que contém a data de hoje) é sempre recalculado.
+
+    A capacidade (noites disponíveis) usa as acomodações ativas hoje, também para
+    períodos passados: o modelo não guarda o histórico de ativação das acomodações.
+    """
+
+    def __init__(self):
+        # (property_id, bucket, bucket_start) -> (versão dos dados, (receita, noites))
+        self._closed_buckets: Dict[Tuple[Optional[int], str, date], Tuple[tuple, Tuple[float, int]]] = {}
+        self._lock = threading.Lock()
+
+    def _data_version(self, property_id: Optional[int]) -> tuple:
+        """Quantidade de reservas e última alteração: muda a cada inclusão, edição ou exclusão"""
+        query = db.session.query(func.count(Booking.id), func.max(Booking.updated_at))
+        if property_id:
+            query = query.filter(Booking.property_id == property_id)
+        count, last_update = query.one()
+        return count, last_update
+
+    def _query_totals(self, bucket: str, start: date, end: date,
+                      property_id: Optional[int]) -> Dict[date, Tuple[float, int]]:
+        """
+        Receita e noites por período entre start e end (limites de período), em uma única
+        consulta. As noites de cada estadia são distribuídas pelas datas da estadia com
+        vetores de diferenças (+n na entrada, -n na saída, soma acumulada).
+        """
+        days = (end - start).days
+        query = db.session.query(
+            Booking.check_in_date,
+            Booking.check_out_date,
+            func.count(Booking.id),
+            func.sum(Booking.total_amount)
+        ).filter(
+            Booking.status.in_(REVENUE_STATUSES),
+            Booking.check_in_date < end,
+            Booking.check_out_date > start
+        )
+
+        if property_id:
+            query = query.filter(Booking.property_id == property_id)
+
+        rows = query.group_by(Booking.check_in_date, Booking.check_out_date).all()
+
+        occupied = np.zeros(days + 1)
+        revenue = np.zeros(days + 1)
+        if rows:
+            check_in = (np.array([r[0] for r in rows], dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(int)
+            check_out = (np.array([r[1] for r in rows], dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(int)
+            count = np.array([r[2] for r in rows], dtype=float)
+            amount = np.array([float(r[3] or 0) for r in rows])
+            nightly_rate = amount / np.maximum(check_out - check_in, 1)
+
+            first = np.clip(check_in, 0, days)
+            last = np.clip(check_out, 0, days)
+            np.add.at(occupied, first, count)
+            np.add.at(occupied, last, -count)
+            np.add.at(revenue, first, nightly_rate)
+            np.add.at(revenue, last, -nightly_rate)
+
+        occupied = np.cumsum(occupied)[:days]
+        revenue = np.cumsum(revenue)[:days]
+
+        buckets = iter_buckets(start, end - timedelta(days=1), bucket)
+        offsets = [(b - start).days for b in buckets]
+        nights_by_bucket = np.add.reduceat(occupied, offsets)
+        revenue_by_bucket = np.add.reduceat(revenue, offsets)
+        return {
+            b: (round(float(revenue_by_bucket[i]), 2), int(round(nights_by_bucket[i])))
+            for i, b in enumerate(buckets)
+        }
+
+    def _count_accommodations(self, property_id: Optional[int]) -> int:
+        query = Accommodation.query.filter_by(is_active=True)
+        if property_id:
+            query = query.filter_by(property_id=property_id)
+        return query.count()
+
+    def get_totals(self, bucket: str, start: date, end: date,
+                   property_id: Optional[int] = None) -> Dict[date, Tuple[float, int]]:
+        """
+        Retorna (receita, noites) por início de período entre start e end.
+        Consulta o banco apenas para os períodos sem cache na versão atual dos dados.
+        """
+        today = date.today()
+        open_bucket = bucket_start(today, bucket)
+        buckets = iter_buckets(start, end, bucket)
+        version = self._data_version(property_id)
+
+        totals = {}
+        with self._lock:
+            for b in buckets:
+                cached = self._closed_buckets.get((property_id, bucket, b))
+                if cached and cached[0] == version:
+                    totals[b] = cached[1]
+
+        missing = [b for b in buckets if b not in totals]
+        if missing:
+            # Uma única consulta cobrindo do primeiro ao último período faltante
+            fetched = self._query_totals(bucket, missing[0], next_bucket(missing[-1], bucket), property_id)
+            with self._lock:
+                for b in missing:
+                    totals[b] = fetched.get(b, (0.0, 0))
+                    if b < open_bucket:
+                        self._closed_buckets[(property_id, bucket, b)] = (version, totals[b])
+
+        return totals
+
+    def get_timeseries(self, metric: str, bucket: str, start: date, end: date,
+                       property_id: Optional[int] = None) -> Dict[str, Any]:
+        """Monta a série temporal de uma métrica"""
+        totals = self.get_totals(bucket, start, end, property_id)
+        accommodations = self._count_accommodations(property_id)
+
+        points = []
+        for b in sorted(totals):
+            revenue, nights = totals[b]
+            days = (next_bucket(b, bucket) - b).days
+            metrics = compute_metrics(revenue, nights, accommodations * days)
+            points.append({
+                'period': b.isoformat(),
+                'value': metrics[metric],
+                'revenue': metrics['revenue'],
+                'nights': nights
+            })
+
+        return {
+            'metric': metric,
+            'bucket': bucket,
+            'property_id': property_id,
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'points': points
+        }
+
+
+PORTFOLIO_SORT_FIELDS = ['monthly_revenue', 'occupancy_rate', 'recent_bookings', 'total_accommodations', 'property_name']
+# Períodos aceitos (em dias): um snapshot em cache por período, então o conjunto é fechado
+PORTFOLIO_PERIODS = [7, 30, 90, 365]
+
+
+class PortfolioAnalytics:
+    """
+    Estatísticas consolidadas de todas as pousadas.
+
+    Uma única consulta agrupada calcula acomodações, reservas recentes, receita e
+    ocupação de todas as pousadas. O resultado fica em um snapshot por período
+    (em dias), reaproveitado por ordenação e paginação até expirar.
+    """
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        # period_days -> (timestamp, snapshot)
+        self._snapshots: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _build_snapshot(self, period_days: int) -> Dict[str, Any]:
+        since = datetime.now() - timedelta(days=period_days)
+
+        accommodations = db.session.query(
+            Accommodation.property_id.label('property_id'),
+            func.count(Accommodation.id).label('total_accommodations')
+        ).filter(
+            Accommodation.is_active == True
+        ).group_by(Accommodation.property_id).subquery()
+
+        bookings = db.session.query(
+            Booking.property_id.label('property_id'),
+            func.sum(case((Booking.created_at >= since, 1), else_=0)).label('recent_bookings'),
+            func.sum(case(
+                (db.and_(Booking.status.in_(['confirmed', 'checked_out']), Booking.created_at >= since),
+                 Booking.total_amount),
+                else_=0
+            )).label('revenue'),
+            func.sum(case(
+                (db.and_(Booking.status.in_(REVENUE_STATUSES), Booking.check_in_date >= since.date()),
+                 Booking.nights),
+                else_=0
+            )).label('nights_booked')
+        ).filter(
+            # Só as reservas que entram em alguma das somas do período
+            db.or_(Booking.created_at >= since, Booking.check_in_date >= since.date())
+        ).group_by(Booking.property_id).subquery()
+
+        rows = db.session.query(
+            Property.id,
+            Property.name,
+            func.coalesce(accommodations.c.total_accommodations, 0),
+            func.coalesce(bookings.c.recent_bookings, 0),
+            func.coalesce(bookings.c.revenue, 0),
+            func.coalesce(bookings.c.nights_booked, 0)
+        ).outerjoin(
+            accommodations, accommodations.c.property_id == Property.id
+        ).outerjoin(
+            bookings, bookings.c.property_id == Property.id
+        ).filter(Property.is_active == True).all()
+
+        properties = []
+        for property_id, name, total_accommodations, recent_bookings, revenue, nights in rows:
+            total_nights_available = int(total_accommodations) * period_days
+            occupancy_rate = (float(nights) / total_nights_available * 100) if total_nights_available > 0 else 0
+            properties.append({
+                'property_id': property_id,
+                'property_name': name,
+                'total_accommodations': int(total_accommodations),
+                'recent_bookings': int(recent_bookings),
+                'monthly_revenue': float(revenue),
+                'occupancy_rate': round(occupancy_rate, 1)
+            })
+
+        total_accommodations = sum(p['total_accommodations'] for p in properties)
+        total_nights = sum(int(n) for *_, n in rows)
+        return {
+            'period_days': period_days,
+            'generated_at': datetime.now().isoformat(),
+            'properties': properties,
+            'totals': {
+                'properties': len(properties),
+                'total_accommodations': total_accommodations,
+                'recent_bookings': sum(p['recent_bookings'] for p in properties),
+                'monthly_revenue': round(sum(p['monthly_revenue'] for p in properties), 2),
+                'occupancy_rate': round(total_nights / (total_accommodations * period_days) * 100, 1)
+                if total_accommodations > 0 else 0
+            }
+        }
+
+    def get_snapshot(self, period_days: int = 30) -> Dict[str, Any]:
+        """Retorna o snapshot do período, recalculando apenas se expirado"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._snapshots.get(period_days)
+        if cached and now - cached[0] < self.ttl_seconds:
+            return cached[1]
+
+        snapshot = self._build_snapshot(period_days)
+        with self._lock:
+            self._snapshots[period_days] = (now, snapshot)
+        return snapshot
+
+    def get_page(self, period_days: int = 30, sort: str = 'monthly_revenue', order: str = 'desc',
+                 page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """Ordena e pagina as pousadas do snapshot"""
+        snapshot = self.get_snapshot(period_days)
+        properties = sorted(
+            snapshot['properties'],
+            key=lambda p: p[sort],
+            reverse=(order == 'desc')
+        )
+
+        total = len(properties)
+        offset = (page - 1) * per_page
+        return {
+            'properties': properties[offset:offset + per_page],
+            'totals': snapshot['totals'],
+            'total': total,
+            'pages': (total + per_page - 1) // per_page if per_page > 0 else 0,
+            'current_page': page,
+            'per_page': per_page,
+            'sort': sort,
+            'order': order,
+            'period_days': period_days,
+            'generated_at': snapshot['generated_at']
+        }
+
+
+# Instâncias globais de analytics
+timeseries_analytics = TimeSeriesAnalytics()
+portfolio_analytics = PortfolioAnalytics()
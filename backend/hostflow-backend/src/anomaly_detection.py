@@ -0,0 +1,214 @@
+"""
+Detecção de anomalias em tempo real sobre o fluxo de reservas - HostFlow
+Média e variância exponencialmente ponderadas (EWMA) por pousada e métrica, atualizadas em O(1)
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+# Métrica -> peso do EWMA, amostras mínimas antes de alertar e desvio mínimo
+METRICS = {
+    'bookings_per_hour': {'alpha': 0.02, 'min_samples': 48, 'min_std': 1.0},
+    'cancellations_per_hour': {'alpha': 0.02, 'min_samples': 48, 'min_std': 1.0},
+    'booking_amount': {'alpha': 0.05, 'min_samples': 20, 'min_std': 1.0}
+}
+METRIC_LABELS = {
+    'bookings_per_hour': 'Reservas por hora',
+    'cancellations_per_hour': 'Cancelamentos por hora',
+    'booking_amount': 'Valor da reserva'
+}
+Z_THRESHOLD = 3.0
+COUNT_METRICS = ('bookings_per_hour', 'cancellations_per_hour')
+
+
+def ewma_update(mean: float, variance: float, value: float, alpha: float) -> Tuple[float, float]:
+    """Atualização incremental da média e variância exponencialmente ponderadas"""
+    diff = value - mean
+    increment = alpha * diff
+    return mean + increment, (1 - alpha) * (variance + diff * increment)
+
+
+def ewma_decay(mean: float, variance: float, zeros: int, alpha: float) -> Tuple[float, float]:
+    """
+    Equivalente a `zeros` chamadas de ewma_update com valor 0 (horas sem eventos), em forma fechada:
+    média * d e d * (variância + média² * (1 - d)), com d = (1 - alpha) ** zeros.
+    """
+    decay = (1 - alpha) ** zeros
+    return mean * decay, decay * (variance + mean * mean * (1 - decay))
+
+
+class StreamingAnomalyDetector:
+    """
+    Detector incremental chamado a cada escrita de reserva.
+
+    O estado de cada (pousada, métrica) fica em metric_baselines e é atualizado na mesma
+    transação da reserva (com trava de linha no Postgres), então todos os workers
+    compartilham as mesmas estatísticas. Nenhuma consulta ao histórico de reservas é feita.
+    """
+
+    def __init__(self, z_threshold: float = Z_THRESHOLD):
+        self.z_threshold = z_threshold
+
+    def record_booking(self, booking):
+        """Nova reserva: contagem por hora e valor da reserva"""
+        self._safely(self._record_booking, booking)
+
+    def record_cancellation(self, booking):
+        """Reserva cancelada: contagem por hora de cancelamentos"""
+        self._safely(self._record_cancellation, booking)
+
+    def _safely(self, update, booking):
+        """Falhas na detecção não podem impedir a gravação da reserva"""
+        from src.models.user import db
+
+        try:
+            db.session.flush()  # garante id e created_at da reserva
+            with db.session.begin_nested():
+                update(booking)
+        except Exception as e:
+            print(f"Erro na detecção de anomalias: {e}")
+
+    def _record_booking(self, booking):
+        at = booking.created_at or datetime.utcnow()
+        self._observe_count(booking.property_id, 'bookings_per_hour', at, booking.id)
+        self._observe_value(booking.property_id, 'booking_amount', float(booking.total_amount or 0), at, booking.id)
+
+    def _record_cancellation(self, booking):
+        at = booking.cancelled_at or datetime.utcnow()
+        self._observe_count(booking.property_id, 'cancellations_per_hour', at, booking.id)
+
+    def _baseline(self, property_id: int, metric: str):
+        from src.models.user import db
+        from src.models.anomaly import MetricBaseline
+
+        baseline = db.session.query(MetricBaseline).filter_by(
+            property_id=property_id, metric=metric
+        ).with_for_update().first()
+        if baseline is None:
+            baseline = MetricBaseline(property_id=property_id, metric=metric, mean=0.0, variance=0.0,
+                                      samples=0, bucket_value=0.0)
+            db.session.add(baseline)
+        return baseline
+
+    def _std(self, baseline, metric: str) -> float:
+        return max(math.sqrt(max(baseline.variance, 0.0)), METRICS[metric]['min_std'])
+
+    def _observe_count(self, property_id: int, metric: str, at: datetime, booking_id: Optional[int] = None):
+        """Soma um evento à hora corrente; fecha as horas anteriores no EWMA quando a hora muda"""
+        config = METRICS[metric]
+        baseline = self._baseline(property_id, metric)
+        bucket = at.replace(minute=0, second=0, microsecond=0)
+
+        if baseline.bucket_start is None:
+            baseline.bucket_start = bucket
+        elif bucket > baseline.bucket_start:
+            self._close_hours(baseline, metric, bucket)
+
+        baseline.bucket_value += 1
+
+        # Sinaliza uma vez por hora, quando a contagem cruza o limite
+        if baseline.samples >= config['min_samples']:
+            std = self._std(baseline, metric)
+            threshold = baseline.mean + self.z_threshold * std
+            if baseline.bucket_value - 1 <= threshold < baseline.bucket_value:
+                self._flag(property_id, metric, baseline.bucket_value, baseline.mean, std, booking_id, at)
+
+    def _close_hours(self, baseline, metric: str, bucket: datetime):
+        """
+        Incorpora ao EWMA a hora em aberto e as horas sem eventos até `bucket`. Antes disso cada
+        hora é comparada com o limite inferior; uma sequência baixa gera um único alerta de queda.
+        """
+        alpha = METRICS[metric]['alpha']
+        gap = int((bucket - baseline.bucket_start) / timedelta(hours=1)) - 1
+
+        dropped = self._check_drop(baseline, metric, baseline.bucket_value, baseline.bucket_start)
+        baseline.mean, baseline.variance = ewma_update(baseline.mean, baseline.variance, baseline.bucket_value, alpha)
+        baseline.samples += 1
+
+        if gap > 0:
+            if not dropped:
+                self._check_drop(baseline, metric, 0.0, baseline.bucket_start + timedelta(hours=1))
+            baseline.mean, baseline.variance = ewma_decay(baseline.mean, baseline.variance, gap, alpha)
+            baseline.samples += gap
+
+        baseline.bucket_start = bucket
+        baseline.bucket_value = 0.0
+
+    def _check_drop(self, baseline, metric: str, value: float, at: datetime) -> bool:
+        """Sinaliza uma hora fechada abaixo de média - z * desvio"""
+        if baseline.samples < METRICS[metric]['min_samples']:
+            return False
+        std = self._std(baseline, metric)
+        if value < baseline.mean - self.z_threshold * std:
+            self._flag(baseline.property_id, metric, value, baseline.mean, std, None, at)
+            return True
+        return False
+
+    def close_elapsed_hours(self, now: Optional[datetime] = None) -> int:
+        """
+        Fecha as horas já encerradas de todas as métricas por hora (job periódico, requer contexto de
+        aplicação). Sem ele, uma pousada que para de receber reservas nunca teria a queda avaliada.
+        """
+        from src.models.user import db
+        from src.models.anomaly import MetricBaseline
+
+        bucket = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+        baselines = db.session.query(MetricBaseline).filter(
+            MetricBaseline.metric.in_(COUNT_METRICS),
+            MetricBaseline.bucket_start < bucket
+        ).with_for_update().all()
+        for baseline in baselines:
+            self._close_hours(baseline, baseline.metric, bucket)
+        db.session.commit()
+        return len(baselines)
+
+    def _observe_value(self, property_id: int, metric: str, value: float, at: datetime,
+                       booking_id: Optional[int] = None):
+        """Compara o valor com a média antes de incorporá-lo ao EWMA"""
+        config = METRICS[metric]
+        baseline = self._baseline(property_id, metric)
+
+        if baseline.samples >= config['min_samples']:
+            std = self._std(baseline, metric)
+            if abs(value - baseline.mean) / std >= self.z_threshold:
+                self._flag(property_id, metric, value, baseline.mean, std, booking_id, at)
+
+        if baseline.samples == 0:
+            baseline.mean = value
+        else:
+            baseline.mean, baseline.variance = ewma_update(baseline.mean, baseline.variance, value,
+                                                           config['alpha'])
+        baseline.samples += 1
+
+    def _flag(self, property_id: int, metric: str, value: float, expected: float, std: float,
+              booking_id: Optional[int], at: datetime):
+        from src.models.user import db
+        from src.models.anomaly import AnomalyEvent
+
+        z_score = (value - expected) / std
+        db.session.add(AnomalyEvent(
+            property_id=property_id,
+            metric=metric,
+            booking_id=booking_id,
+            value=value,
+            expected=expected,
+            std=std,
+            z_score=z_score,
+            direction='spike' if z_score > 0 else 'drop',
+            detected_at=at
+        ))
+
+
+def get_recent_anomalies(property_id: Optional[int] = None, hours: int = 24, limit: int = 20) -> List[Dict[str, Any]]:
+    """Anomalias das últimas `hours` horas, mais recentes primeiro (requer contexto de aplicação)"""
+    from src.models.anomaly import AnomalyEvent
+
+    query = AnomalyEvent.query.filter(AnomalyEvent.detected_at >= datetime.utcnow() - timedelta(hours=hours))
+    if property_id:
+        query = query.filter(AnomalyEvent.property_id == property_id)
+    return [event.to_dict() for event in query.order_by(AnomalyEvent.detected_at.desc()).limit(limit)]
+
+
+# Instância global do detector
+anomaly_detector = StreamingAnomalyDetector()
@@ -0,0 +1,269 @@
+"""
+Respostas do chatbot a partir dos dados reais - HostFlow
+Extrai datas e número de hóspedes da mensagem e responde com acomodações livres e preços
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+# Intenções que recebem resposta com disponibilidade quando a mensagem traz uma data
+AVAILABILITY_INTENTS = ('reservas', 'precos')
+AVAILABILITY_WORDS = ('disponivel', 'disponiveis', 'disponibilidade', 'vaga', 'vagas', 'livre', 'livres',
+                      'quarto', 'quartos', 'diaria', 'diarias', 'hospedagem')
+MAX_LISTED = 3  # acomodações citadas na resposta
+MAX_NIGHTS = 30
+
+WEEKDAYS = {'segunda': 0, 'terca': 1, 'quarta': 2, 'quinta': 3, 'sexta': 4, 'sabado': 5, 'domingo': 6}
+WEEKDAY_NAMES = ['segunda', 'terça', 'quarta', 'quinta', 'sexta', 'sábado', 'domingo']
+NUMBER_WORDS = {'um': 1, 'uma': 1, 'dois': 2, 'duas': 2, 'tres': 3, 'quatro': 4, 'cinco': 5,
+                'seis': 6, 'sete': 7, 'oito': 8, 'nove': 9, 'dez': 10}
+
+_NUMBER = r'(\d{1,2}|' + '|'.join(NUMBER_WORDS) + r')'
+_DATE_RE = re.compile(r'\b(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?\b')
+_WEEKDAY_RE = re.compile(r'\b(' + '|'.join(WEEKDAYS) + r')(?:-feira)?\b')
+_GUESTS_RE = re.compile(r'\b' + _NUMBER + r'\s+(pessoas?|hospedes?|adultos?|pax)\b')
+_NIGHTS_RE = re.compile(r'\b' + _NUMBER + r'\s+(noites?|diarias?)\b')
+
+
+def _normalize(message: str) -> str:
+    text = unicodedata.normalize('NFKD', message.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def _brl(value: float) -> str:
+    return 'R$ ' + f"{value:,.2f}".translate(str.maketrans(',.', '.,'))
+
+
+def _number(token: str) -> int:
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+
+def _explicit_date(day: str, month: str, year: Optional[str], today: date) -> Optional[date]:
+    try:
+        if year:
+            return date(int(year) + (2000 if len(year) == 2 else 0), int(month), int(day))
+        parsed = date(today.year, int(month), int(day))
+        # Sem ano: a próxima ocorrência da data
+        return parsed if parsed >= today else date(today.year + 1, int(month), int(day))
+    except ValueError:
+        return None
+
+
+def parse_stay_request(message: str, today: date = None) -> Optional[Dict[str, Any]]:
+    """
+    Período e hóspedes pedidos na mensagem ("tem vaga para sábado?", "2 pessoas de 10/11 a 12/11",
+    "fim de semana para um casal"). Retorna None quando a mensagem não cita nenhuma data.
+    """
+    today = today or date.today()
+    text = _normalize(message)
+
+    check_in = check_out = None
+    dates = [d for d in (_explicit_date(*m, today) for m in _DATE_RE.findall(text)) if d]
+    if dates:
+        check_in = dates[0]
+        if len(dates) > 1 and dates[1] > check_in:
+            check_out = dates[1]
+    elif re.search(r'\b(fim|final) de semana\b', text):
+        check_in = today + timedelta(days=(5 - today.weekday()) % 7)
+        check_out = check_in + timedelta(days=2)
+    elif 'depois de amanha' in text:
+        check_in = today + timedelta(days=2)
+    elif re.search(r'\bamanha\b', text):
+        check_in = today + timedelta(days=1)
+    elif re.search(r'\bhoje\b', text):
+        check_in = today
+    else:
+        weekday = _WEEKDAY_RE.search(text)
+        if weekday:
+            check_in = today + timedelta(days=(WEEKDAYS[weekday.group(1)] - today.weekday()) % 7)
+
+    if check_in is None or check_in < today:
+        return None
+
+    if check_out is None:
+        nights = _NIGHTS_RE.search(text)
+        check_out = check_in + timedelta(days=min(_number(nights.group(1)), MAX_NIGHTS) if nights else 1)
+    check_out = min(check_out, check_in + timedelta(days=MAX_NIGHTS))
+
+    guests = _GUESTS_RE.search(text)
+    if guests:
+        guests = max(_number(guests.group(1)), 1)
+    elif re.search(r'\bcasal\b', text):
+        guests = 2
+    else:
+        guests = None
+
+    return {'check_in': check_in, 'check_out': check_out, 'guests': guests}
+
+
+class AvailabilityLookup:
+    """
+    Acomodações livres e preço da estadia por (check-in, check-out, hóspedes), de todas as
+    pousadas ou de uma só (property_id).
+
+    Cada consulta faz três leituras (acomodações, reservas conflitantes e preços aplicados
+    no período) e o resultado fica em cache por alguns segundos: rajadas de mensagens
+    sobre o mesmo período não voltam ao banco.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # (check_in, check_out, guests, property_id) -> (timestamp, acomodações)
+        self._cache: Dict[Tuple[date, date, int, Optional[int]], Tuple[float, List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _query(self, check_in: date, check_out: date, guests: int,
+               property_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        from src.models.user import db
+        from src.models.accommodation import Accommodation, nightly_price
+        from src.models.booking import Booking
+        from src.models.price_recommendation import PriceRecommendation
+        from src.models.property import Property
+
+        nights = (check_out - check_in).days
+        query = db.select(
+            Accommodation.id, Accommodation.name, Property.name.label('property_name'),
+            Accommodation.max_guests, Accommodation.base_price, Accommodation.weekend_price,
+            Accommodation.cleaning_fee
+        ).join(Property, Property.id == Accommodation.property_id).where(
+            Accommodation.is_active == True,
+            Accommodation.is_available == True,
+            Accommodation.max_guests >= guests,
+            db.func.coalesce(Accommodation.min_stay_nights, 1) <= nights,
+            db.or_(Accommodation.max_stay_nights == None, Accommodation.max_stay_nights >= nights)
+        )
+        if property_id is not None:
+            query = query.where(Accommodation.property_id == property_id)
+        rows = db.session.execute(query).all()
+        if not rows:
+            return []
+        ids = [row.id for row in rows]
+
+        # Mesma regra de conflito de Accommodation.is_available_for_period
+        booked = set(db.session.execute(
+            db.select(Booking.accommodation_id).where(
+                Booking.accommodation_id.in_(ids),
+                Booking.status.in_(['confirmed', 'checked_in']),
+                Booking.check_in_date < check_out,
+                Booking.check_out_date > check_in
+            ).distinct()
+        ).scalars())
+
+        applied: Dict[Tuple[int, date], float] = {}
+        for accommodation_id, stay_date, price in db.session.execute(
+            db.select(PriceRecommendation.accommodation_id, PriceRecommendation.stay_date,
+                      PriceRecommendation.applied_price).where(
+                PriceRecommendation.accommodation_id.in_(ids),
+                PriceRecommendation.applied_price != None,
+                PriceRecommendation.stay_date >= check_in,
+                PriceRecommendation.stay_date < check_out
+            )
+        ):
+            applied[(accommodation_id, stay_date)] = float(price)
+
+        stay = [check_in + timedelta(days=i) for i in range(nights)]
+        available = []
+        for row in rows:
+            if row.id in booked:
+                continue
+            # Mesma regra de Accommodation.get_price_for_date, com os preços aplicados já carregados
+            nightly = [nightly_price(day, row.base_price, row.weekend_price, applied.get((row.id, day)))
+                       for day in stay]
+            available.append({
+                'accommodation_id': row.id,
+                'name': row.name,
+                'property_name': row.property_name,
+                'max_guests': row.max_guests,
+                'nightly_prices': nightly,
+                'total_price': round(sum(nightly) + float(row.cleaning_fee or 0), 2)
+            })
+        available.sort(key=lambda a: a['total_price'])
+        return available
+
+    def lookup(self, check_in: date, check_out: date, guests: int = 1,
+               property_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Acomodações livres no período, da mais barata à mais cara; sem property_id, de todas as
+        pousadas (requer contexto de aplicação)
+        """
+        key = (check_in, check_out, guests, property_id)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and now - cached[0] < self.ttl_seconds:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        available = self._query(check_in, check_out, guests, property_id)
+        with self._lock:
+            if len(self._cache) >= self.max_entries:
+                self._cache = {k: v for k, v in self._cache.items() if now - v[0] < self.ttl_seconds}
+                if len(self._cache) >= self.max_entries:
+                    self._cache.clear()
+            self._cache[key] = (now, available)
+        return available
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def answer(self, message: str, intent: str, today: date = None,
+               property_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Resposta com disponibilidade e preços quando a mensagem pede um período; None mantém
+        a resposta do modelo. Não passa pelo cache de respostas do ChatbotTrainer, que é por tokens.
+        """
+        if intent not in AVAILABILITY_INTENTS and \
+                not any(word in _normalize(message).split() for word in AVAILABILITY_WORDS):
+            return None
+        stay = parse_stay_request(message, today)
+        if stay is None:
+            return None
+
+        available = self.lookup(stay['check_in'], stay['check_out'], stay['guests'] or 1, property_id)
+        return {
+            'response': self.format_answer(stay, available),
+            'availability': {
+                'check_in': stay['check_in'].isoformat(),
+                'check_out': stay['check_out'].isoformat(),
+                'guests': stay['guests'],
+                'available_count': len(available),
+                'accommodations': available[:MAX_LISTED]
+            }
+        }
+
+    @staticmethod
+    def format_answer(stay: Dict[str, Any], available: List[Dict[str, Any]]) -> str:
+        check_in, check_out = stay['check_in'], stay['check_out']
+        nights = (check_out - check_in).days
+        period = f"{WEEKDAY_NAMES[check_in.weekday()]}, {check_in:%d/%m}"
+        if nights > 1:
+            period += f" a {WEEKDAY_NAMES[check_out.weekday()]}, {check_out:%d/%m}"
+        details = f"{nights} noite{'s' if nights > 1 else ''}"
+        if stay['guests']:
+            details += f", {stay['guests']} hóspede{'s' if stay['guests'] > 1 else ''}"
+
+        if not available:
+            return (f"Infelizmente não temos acomodações disponíveis para {period} ({details}). "
+                    f"Quer que eu verifique outra data?")
+
+        options = '; '.join(
+            f"{a['name']} ({a['property_name']}) por {_brl(a['total_price'])}"
+            for a in available[:MAX_LISTED]
+        )
+        count = len(available)
+        found = f"{count} acomodações disponíveis" if count > 1 else "1 acomodação disponível"
+        return (f"Temos {found} para {period} ({details}). Opções: {options}. Quer que eu faça a reserva?")
+
+
+# Instância global das consultas de disponibilidade do chatbot
+availability_lookup = AvailabilityLookup(ttl_seconds=float(os.getenv('CHATBOT_AVAILABILITY_TTL_SECONDS', 60)))
@@ -0,0 +1,102 @@
+"""
+Re-treino do chatbot em processo separado - HostFlow
+O modelo é reconstruído num ProcessPoolExecutor, fora das threads que atendem requisições
+"""
+
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, Optional
+
+
+def run_retrain_job(job_id: str, data_dir: str, classifier: str) -> Dict[str, Any]:
+    """
+    Executado no processo de re-treino: carrega o modelo (snapshot + log), reconstrói tudo e
+    grava o snapshot novo de forma atômica. O evento 'model' no log avisa os workers, que
+    trocam pelo snapshot na próxima requisição (ChatbotTrainer.sync).
+    """
+    from src.chatbot_trainer import ChatbotTrainer
+
+    trainer = ChatbotTrainer(classifier=classifier, data_dir=data_dir)
+    trainer.training_log.update_job(job_id, status='running', started_at=datetime.now().isoformat())
+    try:
+        result = trainer.rebuild_model()
+    except Exception as e:
+        trainer.training_log.update_job(job_id, status='error', error=str(e),
+                                        finished_at=datetime.now().isoformat())
+        raise
+    trainer.training_log.update_job(job_id, status='success', result=result,
+                                    finished_at=datetime.now().isoformat())
+    return result
+
+
+class RetrainManager:
+    """
+    Enfileira re-treinos num pool de processos (um processo por worker, criado sob demanda).
+    O estado dos jobs fica no log de treinamento, então qualquer worker responde pelo status.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max_workers
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # 'spawn': o processo filho não herda travas das threads do servidor
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                self._pid = os.getpid()
+            return self._executor
+
+    def submit(self, chatbot_trainer=None, flush: bool = True) -> str:
+        """
+        Grava o feedback pendente e enfileira um re-treino; retorna o id do job.
+        O lote de feedback que dispara o re-treino automático passa flush=False: ele já está
+        dentro da descarga do buffer.
+        """
+        from src.chatbot_trainer import get_chatbot_trainer
+
+        chatbot_trainer = chatbot_trainer or get_chatbot_trainer()
+        if flush:
+            chatbot_trainer.flush_feedback()
+        job_id = uuid.uuid4().hex
+        chatbot_trainer.training_log.create_job(job_id)
+        future = self._get_executor().submit(run_retrain_job, job_id, chatbot_trainer.data_dir,
+                                             chatbot_trainer.classifier_backend)
+        future.add_done_callback(partial(self._on_done, job_id, chatbot_trainer))
+        return job_id
+
+    def _on_done(self, job_id: str, chatbot_trainer, future):
+        try:
+            future.result()
+            chatbot_trainer.sync()  # troca imediata neste worker
+        except Exception as e:
+            # Processo filho interrompido antes de registrar o erro
+            job = chatbot_trainer.training_log.get_job(job_id)
+            if job and job['status'] != 'error':
+                chatbot_trainer.training_log.update_job(job_id, status='error', error=str(e) or type(e).__name__,
+                                                        finished_at=datetime.now().isoformat())
+            print(f"Erro no re-treino do chatbot ({job_id}): {e}")
+
+    def shutdown(self):
+        """Aguarda os re-treinos em andamento e encerra o pool (scripts e benchmarks)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=True)
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        from src.chatbot_trainer import get_chatbot_trainer
+
+        return get_chatbot_trainer().training_log.get_job(job_id)
+
+
+# Instância global do re-treino
+chatbot_retrainer = RetrainManager()
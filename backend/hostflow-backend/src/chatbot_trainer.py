@@ -1,11 +1,50 @@
+import functools
 import json
 import os
 import pickle
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 import re
 from collections import defaultdict, Counter
-import sqlite3
+from itertools import chain
+from types import MappingProxyType
+
+from src.intent_classifier import TfidfIntentClassifier, normalize_text
+from src.training_log import TrainingLog
+from src.write_behind import WriteBehindBuffer
+
+# Backends de classificação de intenção: 'keyword' (sobreposição de tokens) ou 'tfidf'
+CLASSIFIER_BACKENDS = ('keyword', 'tfidf')
+
+# Pontuação das respostas: média simples ou média com decaimento exponencial (notas recentes pesam mais)
+SCORING_MODES = ('mean', 'decayed')
+FEEDBACK_DECAY_ALPHA = 0.1
+
+# Limites das estatísticas de conversas gravadas no log por execução e mantidas em memória
+CONVERSATION_WORDS_LIMIT = 5000
+UNKNOWN_TERMS_LIMIT = 1000
+
+class ChatbotModel:
+    """
+    Snapshot imutável do modelo usado para responder mensagens.
+    
+    O trainer monta um novo snapshot a cada alteração e o publica com uma única
+    atribuição (self.model = ...); quem lê pega a referência uma vez e trabalha sobre
+    ela sem travas. Estruturas que não mudaram (índice, classificador) são reaproveitadas.
+    """
+    __slots__ = ('version', 'intent_patterns', 'response_templates', 'pattern_index',
+                 'classifier', 'intent_confidence', 'best_response')
+    
+    def __init__(self, version, intent_patterns, response_templates, pattern_index,
+                 classifier, intent_confidence, best_response):
+        for name, value in zip(self.__slots__, (version, intent_patterns, response_templates, pattern_index,
+                                                 classifier, intent_confidence, best_response)):
+            object.__setattr__(self, name, value)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("ChatbotModel é imutável; publique um novo snapshot")
 
 class ChatbotTrainer:
     """
@@ -13,23 +52,80 @@ class ChatbotTrainer:
     Implementa algoritmos de aprendizado supervisionado e por reforço.
     """
     
-    def __init__(self, db_path: str = None):
-        self.db_path = db_path or os.path.join(os.path.dirname(__file__), 'database', 'app.db')
-        self.training_data_path = os.path.join(os.path.dirname(__file__), 'training_data.json')
-        self.model_path = os.path.join(os.path.dirname(__file__), 'chatbot_model.pkl')
-        self.feedback_path = os.path.join(os.path.dirname(__file__), 'feedback_data.json')
+    def __init__(self, db_path: str = None, classifier: str = None, data_dir: str = None):
+        self.data_dir = data_dir = data_dir or os.path.dirname(__file__)  # outro diretório isola benchmarks do modelo real
+        self.db_path = db_path or os.path.join(data_dir, 'database', 'app.db')
+        self.training_data_path = os.path.join(data_dir, 'training_data.json')
+        self.model_path = os.path.join(data_dir, 'chatbot_model.pkl')
+        self.feedback_path = os.path.join(data_dir, 'feedback_data.json')
+        self.log_path = os.path.join(data_dir, 'database', 'chatbot_log.db')
+        
+        # Log append-only de exemplos e feedback; o snapshot (model_path) é compactado em segundo plano
+        self.training_log = TrainingLog(self.log_path)
+        self.log_seq = 0  # último evento do log incorporado ao modelo em memória
+        self.loaded_snapshot_seq = None  # seq do snapshot lido do disco por último
+        self.compact_interval = 60
+        self._lock = threading.RLock()
+        self._compactor = None
+        
+        # Feedback aceito em memória e gravado em lotes (tamanho ou tempo) por uma thread de fundo
+        self.feedback_buffer = WriteBehindBuffer(
+            self._flush_feedback, 'chatbot-feedback',
+            max_batch=int(os.getenv('CHATBOT_FEEDBACK_BATCH', 200)),
+            interval=float(os.getenv('CHATBOT_FEEDBACK_FLUSH_SECONDS', 2.0)),
+            spill_path=os.path.join(data_dir, 'database', 'chatbot_feedback.spill')
+        )
+        # Re-treino completo (em outro processo) a cada N notas de uma mesma resposta; 0 desliga
+        self.retrain_every = int(os.getenv('CHATBOT_RETRAIN_EVERY', 10))
         
         # Estruturas de dados para o modelo
         self.intent_patterns = {}
         self.response_templates = {}
         self.word_frequency = Counter()
         self.intent_confidence = defaultdict(float)
-        self.feedback_scores = defaultdict(list)
         
-        # Carregar dados existentes
-        self.load_training_data()
-        self.load_model()
-        self.load_feedback_data()
+        # Feedback agregado: intenção -> resposta -> {sum, count, decayed}, atualizado em O(1) por nota
+        self.response_stats = defaultdict(dict)
+        self.intent_feedback = {}  # intenção -> [soma, contagem]
+        self.best_response = {}  # intenção -> resposta com melhor pontuação
+        # Estatísticas das conversas registradas (train_from_conversations)
+        self.intent_usage = Counter()
+        self.unknown_terms = Counter()  # palavras das mensagens sem intenção reconhecida
+        self.conversations_last_id = 0
+        
+        self.scoring_mode = os.getenv('CHATBOT_FEEDBACK_SCORING', 'mean')
+        if self.scoring_mode not in SCORING_MODES:
+            raise ValueError(f"Modo de pontuação inválido: {self.scoring_mode}")
+        
+        # Índice invertido: token -> [(intenção, padrão, peso)]
+        self.pattern_index = defaultdict(list)
+        
+        # Estado acima: só o escritor altera (sob self._lock). Leitores usam o snapshot publicado.
+        self.model = None
+        self._patterns_changed = True
+        
+        # Cache LRU de respostas por (snapshot, tokens normalizados); esvaziado quando o snapshot muda
+        self.cache_size = int(os.getenv('CHATBOT_CACHE_SIZE', 1024))
+        self._cached_answer = functools.lru_cache(maxsize=self.cache_size)(self._answer)
+        self._cache_model = None
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
+        # Classificador opcional (CHATBOT_CLASSIFIER=tfidf)
+        self.classifier_backend = classifier or os.getenv('CHATBOT_CLASSIFIER', 'keyword')
+        if self.classifier_backend not in CLASSIFIER_BACKENDS:
+            raise ValueError(f"Classificador inválido: {self.classifier_backend}")
+        self.tfidf_classifier = TfidfIntentClassifier() if self.classifier_backend == 'tfidf' else None
+        
+        # Carregar dados existentes: snapshot + eventos do log posteriores a ele.
+        # Os JSON legados só são lidos quando não há snapshot no formato atual.
+        if not self.load_model():
+            if not os.path.exists(self.model_path):
+                self.load_training_data()
+            self.load_feedback_data()
+            self.rebuild_index()
+        self.replay_log()
+        self._publish()
     
     def preprocess_text(self, text: str) -> List[str]:
         """
@@ -49,24 +145,94 @@ class ChatbotTrainer:
         
         return words
     
-    def extract_intent(self, message: str) -> str:
+    def index_pattern(self, intent: str, pattern: str):
         """
-        Extrai a intenção da mensagem usando análise de palavras-chave.
+        Adiciona um padrão ao índice invertido. Cada token distinto do padrão
+        contribui com 1/len(tokens do padrão) para a intenção.
         """
-        words = self.preprocess_text(message)
-        intent_scores = defaultdict(float)
+        pattern_words = self.preprocess_text(pattern)
+        if not pattern_words:
+            return
         
-        # Calcular pontuação para cada intenção baseada nas palavras
+        weight = 1 / len(pattern_words)
+        for word in set(pattern_words):
+            self.pattern_index[word].append((intent, pattern, weight))
+    
+    def rebuild_index(self):
+        """
+        Reconstrói o índice invertido a partir de todos os padrões.
+        """
+        self._patterns_changed = True
+        self.pattern_index = defaultdict(list)
         for intent, patterns in self.intent_patterns.items():
             for pattern in patterns:
-                pattern_words = self.preprocess_text(pattern)
-                common_words = set(words) & set(pattern_words)
-                if common_words:
-                    intent_scores[intent] += len(common_words) / len(pattern_words)
+                self.index_pattern(intent, pattern)
+        
+        if self.tfidf_classifier is not None:
+            self.tfidf_classifier.fit(self.intent_patterns)
+    
+    def _publish(self):
+        """
+        Monta e publica o próximo snapshot a partir do estado do escritor (chamado sob self._lock).
+        Padrões, respostas, índice e classificador só são copiados quando mudaram.
+        """
+        previous = self.model
+        if previous is None or self._patterns_changed:
+            intent_patterns = MappingProxyType({i: tuple(p) for i, p in self.intent_patterns.items()})
+            response_templates = MappingProxyType({i: tuple(r) for i, r in self.response_templates.items()})
+            pattern_index = MappingProxyType({w: tuple(postings) for w, postings in self.pattern_index.items()})
+            classifier = self.tfidf_classifier.snapshot() if self.tfidf_classifier is not None else None
+            self._patterns_changed = False
+        else:
+            intent_patterns, response_templates = previous.intent_patterns, previous.response_templates
+            pattern_index, classifier = previous.pattern_index, previous.classifier
+        
+        self.model = ChatbotModel(
+            version=self.log_seq,
+            intent_patterns=intent_patterns,
+            response_templates=response_templates,
+            pattern_index=pattern_index,
+            classifier=classifier,
+            intent_confidence=MappingProxyType(dict(self.intent_confidence)),
+            best_response=MappingProxyType(dict(self.best_response))
+        )
+    
+    def extract_intent(self, message: str, model: ChatbotModel = None) -> str:
+        """
+        Extrai a intenção da mensagem com o classificador configurado.
+        """
+        model = model or self.model
+        if model.classifier is not None:
+            return model.classifier.classify(message)[0]
+        return self.extract_intent_keywords(message, model)
+    
+    def classify_batch(self, messages: List[str]) -> List[str]:
+        """
+        Extrai a intenção de várias mensagens (ex.: conversas registradas) de uma vez.
+        """
+        model = self.model
+        if model.classifier is not None:
+            return [intent for intent, _ in model.classifier.classify_batch(messages)]
+        return [self.extract_intent_keywords(message, model) for message in messages]
+    
+    def extract_intent_keywords(self, message: str, model: ChatbotModel = None) -> str:
+        """
+        Extrai a intenção da mensagem usando análise de palavras-chave.
+        Só os padrões que compartilham tokens com a mensagem são pontuados (índice invertido).
+        """
+        return self._keyword_intent(self.preprocess_text(message), model or self.model)
+    
+    def _keyword_intent(self, words: List[str], model: ChatbotModel) -> str:
+        intent_scores = defaultdict(float)
         
-        # Retornar a intenção com maior pontuação
+        # Pontuação de cada intenção: palavras em comum / tamanho do padrão
+        for word in set(words):
+            for intent, _, weight in model.pattern_index.get(word, ()):
+                intent_scores[intent] += weight
+        
+        # Retornar a intenção com maior pontuação (empates: a intenção cadastrada primeiro)
         if intent_scores:
-            best_intent = max(intent_scores, key=intent_scores.get)
+            best_intent = max((i for i in model.intent_patterns if i in intent_scores), key=intent_scores.get)
             confidence = intent_scores[best_intent]
             
             # Só retornar se a confiança for suficiente
@@ -75,21 +241,21 @@ class ChatbotTrainer:
         
         return "unknown"
     
-    def generate_response(self, intent: str, message: str) -> str:
+    def generate_response(self, intent: str, message: str, model: ChatbotModel = None) -> str:
         """
         Gera uma resposta baseada na intenção identificada.
         """
-        if intent in self.response_templates:
-            responses = self.response_templates[intent]
+        model = model or self.model
+        if intent in model.response_templates:
+            responses = model.response_templates[intent]
             
-            # Escolher resposta baseada no feedback histórico
-            if intent in self.feedback_scores:
-                # Usar resposta com melhor feedback médio
-                best_response = max(responses, key=lambda r: self.get_response_score(intent, r))
+            # Escolher resposta baseada no feedback histórico (ponteiro mantido a cada nota)
+            best_response = model.best_response.get(intent)
+            if best_response is not None:
                 return best_response
-            else:
-                # Escolher primeira resposta se não há feedback
-                return responses[0] if responses else "Desculpe, não entendi sua pergunta."
+            
+            # Escolher primeira resposta se não há feedback
+            return responses[0] if responses else "Desculpe, não entendi sua pergunta."
         
         return "Desculpe, não entendi sua pergunta. Pode reformular?"
     
@@ -97,22 +263,41 @@ class ChatbotTrainer:
         """
         Calcula a pontuação média de uma resposta baseada no feedback.
         """
-        key = f"{intent}:{response}"
-        if key in self.feedback_scores:
-            scores = self.feedback_scores[key]
-            return sum(scores) / len(scores) if scores else 0.0
-        return 0.0
+        stats = self.response_stats.get(intent, {}).get(response)
+        if not stats:
+            return 0.0
+        if self.scoring_mode == 'decayed':
+            return stats['decayed']
+        return stats['sum'] / stats['count']
+    
+    def _refresh_best_response(self, intent: str):
+        """Recalcula o ponteiro da intenção (empates: a resposta cadastrada primeiro)"""
+        responses = self.response_templates.get(intent)
+        if intent in self.response_stats and responses:
+            self.best_response[intent] = max(responses, key=lambda r: self.get_response_score(intent, r))
+        else:
+            self.best_response.pop(intent, None)
     
     def add_training_example(self, message: str, intent: str, response: str):
         """
         Adiciona um novo exemplo de treinamento.
+        O exemplo é gravado no log (uma linha) e aplicado ao modelo em memória.
         """
+        self.training_log.append('example', {'message': message, 'intent': intent, 'response': response})
+        self.replay_log()
+        self.start_compactor()
+    
+    def _apply_example(self, message: str, intent: str, response: str):
         # Atualizar padrões de intenção
         if intent not in self.intent_patterns:
             self.intent_patterns[intent] = []
         
         if message not in self.intent_patterns[intent]:
             self.intent_patterns[intent].append(message)
+            self._patterns_changed = True
+            self.index_pattern(intent, message)
+            if self.tfidf_classifier is not None:
+                self.tfidf_classifier.partial_fit(intent, message)
         
         # Atualizar templates de resposta
         if intent not in self.response_templates:
@@ -120,66 +305,286 @@ class ChatbotTrainer:
         
         if response not in self.response_templates[intent]:
             self.response_templates[intent].append(response)
+            self._patterns_changed = True
+            if response in self.response_stats.get(intent, {}):
+                self._refresh_best_response(intent)
         
         # Atualizar frequência de palavras
         words = self.preprocess_text(message)
         self.word_frequency.update(words)
-        
-        # Salvar dados atualizados
-        self.save_training_data()
-        self.save_model()
+    
+    def _apply_intent(self, intent: str, patterns: List[str], responses: List[str]):
+        # Substitui padrões e respostas de uma intenção (dados padrão)
+        self.intent_patterns[intent] = list(patterns)
+        self.response_templates[intent] = list(responses)
+        for pattern in patterns:
+            self.word_frequency.update(self.preprocess_text(pattern))
+        self._refresh_best_response(intent)
+        self.rebuild_index()
     
     def add_feedback(self, message: str, response: str, score: float):
         """
         Adiciona feedback para uma resposta (aprendizado por reforço).
         Score: 1.0 = muito bom, 0.5 = neutro, 0.0 = muito ruim
+        Só enfileira: classificação, gravação no log e o disparo do re-treino acontecem no lote.
         """
-        intent = self.extract_intent(message)
-        key = f"{intent}:{response}"
+        self.feedback_buffer.put((message, response, score))
+    
+    def flush_feedback(self) -> int:
+        """Grava imediatamente o feedback pendente; retorna quantos itens foram gravados"""
+        return self.feedback_buffer.flush()
+    
+    def _flush_feedback(self, batch: List[tuple]):
+        """
+        Grava um lote de feedback: intenções em lote e uma transação no log. Quando alguma
+        resposta do lote chega a um múltiplo de retrain_every notas (como no re-treino original,
+        por resposta), enfileira um re-treino no processo separado de src/chatbot_retrain.py.
+        """
+        intents = self.classify_batch([message for message, _, _ in batch])
+        payloads = [
+            {'key': f"{intent}:{response}", 'score': score}
+            for intent, (_, response, score) in zip(intents, batch)
+        ]
         
-        self.feedback_scores[key].append(score)
+        # A intenção é resolvida agora e gravada no evento: a reaplicação é determinística
+        keys = {payload['key'] for payload in payloads}
+        before = {key: self.feedback_count(key) for key in keys}
+        self.training_log.append_many('feedback', payloads)
+        self.replay_log()
+        self.start_compactor()
+        
+        if self.retrain_every and any(
+            self.feedback_count(key) // self.retrain_every > before[key] // self.retrain_every for key in keys
+        ):
+            from src.chatbot_retrain import chatbot_retrainer
+            try:
+                chatbot_retrainer.submit(self, flush=False)
+            except Exception as e:
+                # O feedback já está no log; o próximo múltiplo (ou /chatbot/retrain) re-treina
+                print(f"Erro ao enfileirar re-treino do chatbot: {e}")
+    
+    def feedback_count(self, key: str = None) -> int:
+        """Notas incorporadas ao modelo em memória: de uma resposta ("intenção:resposta") ou de todas"""
+        if key is None:
+            return sum(count for _, count in self.intent_feedback.values())
+        intent, _, response = key.partition(':')
+        return self.response_stats.get(intent, {}).get(response, {}).get('count', 0)
+    
+    def _apply_feedback(self, key: str, score: float):
+        """Soma a nota às estatísticas da resposta e da intenção e ajusta o ponteiro da melhor resposta"""
+        intent, _, response = key.partition(':')
+        stats = self.response_stats[intent].get(response)
+        if stats is None:
+            stats = self.response_stats[intent][response] = {'sum': 0.0, 'count': 0, 'decayed': score}
+            previous = None
+        else:
+            previous = self.get_response_score(intent, response)
         
-        # Manter apenas os últimos 100 feedbacks por resposta
-        if len(self.feedback_scores[key]) > 100:
-            self.feedback_scores[key] = self.feedback_scores[key][-100:]
+        stats['sum'] += score
+        stats['count'] += 1
+        stats['decayed'] += FEEDBACK_DECAY_ALPHA * (score - stats['decayed'])
         
-        # Salvar feedback
-        self.save_feedback_data()
+        totals = self.intent_feedback.setdefault(intent, [0.0, 0])
+        totals[0] += score
+        totals[1] += 1
+        self.intent_confidence[intent] = totals[0] / totals[1]
         
-        # Re-treinar se necessário
-        if len(self.feedback_scores[key]) % 10 == 0:
-            self.retrain_from_feedback()
+        # Ponteiro: só recalcula (O(respostas da intenção)) quando a melhor piora ou há empate
+        best = self.best_response.get(intent)
+        current = self.get_response_score(intent, response)
+        if best is None:
+            self._refresh_best_response(intent)
+        elif response == best:
+            if previous is not None and current < previous:
+                self._refresh_best_response(intent)
+        else:
+            best_score = self.get_response_score(intent, best)
+            if current == best_score:
+                self._refresh_best_response(intent)
+            elif current > best_score and response in self.response_templates.get(intent, ()):
+                self.best_response[intent] = response
+    
+    def _load_feedback_scores(self, feedback_scores: Dict[str, List[float]]):
+        """Migra o formato antigo (listas de notas por "intenção:resposta") para as estatísticas agregadas"""
+        self.response_stats = defaultdict(dict)
+        self.intent_feedback = {}
+        self.best_response = {}
+        for key, scores in feedback_scores.items():
+            for score in scores:
+                self._apply_feedback(key, score)
     
-    def retrain_from_feedback(self):
+    def replay_log(self) -> int:
+        """
+        Aplica ao modelo em memória os eventos do log ainda não incorporados
+        (inclusive os gravados por outros workers). Retorna quantos foram aplicados.
+        """
+        with self._lock:
+            # Outro worker compactou eventos que este ainda não tinha aplicado: recarrega o snapshot
+            reloaded = False
+            if self.training_log.snapshot_seq() > self.log_seq:
+                if not self.load_model():
+                    self.rebuild_index()
+                reloaded = True
+            
+            applied = 0
+            for seq, kind, payload in self.training_log.read_since(self.log_seq):
+                if kind == 'example':
+                    self._apply_example(payload['message'], payload['intent'], payload['response'])
+                elif kind == 'intent':
+                    self._apply_intent(payload['intent'], payload['patterns'], payload['responses'])
+                elif kind == 'feedback':
+                    self._apply_feedback(payload['key'], payload['score'])
+                elif kind == 'conversations':
+                    self._apply_conversations(payload)
+                elif kind == 'model' and payload['snapshot_seq'] != self.loaded_snapshot_seq:
+                    # Re-treino completo gravou um snapshot novo (já com índice e classificador): troca por ele
+                    self.load_model()
+                self.log_seq = seq
+                applied += 1
+            
+            # Leitores passam a ver todos os eventos do lote de uma vez
+            if (applied or reloaded) and self.model is not None:
+                self._publish()
+            return applied
+    
+    @property
+    def model_version(self) -> int:
+        """Versão do modelo publicado: último seq do log incorporado (monotônico entre workers)"""
+        return self.model.version
+    
+    def sync(self) -> bool:
         """
-        Re-treina o modelo baseado no feedback recebido.
+        Verificação barata (uma leitura do contador do log, poucos µs) feita a cada requisição:
+        se outro worker gravou exemplos ou feedback, aplica os eventos novos antes de responder.
         """
-        # Atualizar confiança das intenções baseado no feedback
-        for key, scores in self.feedback_scores.items():
-            if ':' in key:
-                intent = key.split(':')[0]
-                avg_score = sum(scores) / len(scores) if scores else 0.0
-                self.intent_confidence[intent] = avg_score
-        
-        # Salvar modelo atualizado
-        self.save_model()
+        if self.training_log.last_seq() == self.model.version:
+            return False
+        self.replay_log()
+        return True
     
-    def train_from_conversations(self):
+    def compact(self) -> bool:
         """
-        Treina o modelo a partir de conversas armazenadas no banco de dados.
+        Grava o snapshot binário com todos os eventos do log e remove do log o que ele incorporou.
+        A transação exclusiva impede que eventos novos entrem entre o snapshot e a remoção.
         """
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        with self._lock, self.training_log.exclusive():
+            self.replay_log()
+            if self.log_seq <= self.training_log.snapshot_seq():
+                return False
+            
+            if not self.save_model():
+                return False
+            self.training_log.truncate(self.log_seq)
+            return True
+    
+    def start_compactor(self):
+        """Inicia (uma vez) a thread que compacta o log periodicamente"""
+        if self._compactor is None or not self._compactor.is_alive():
+            self._compactor = threading.Thread(target=self._run_compactor, name='chatbot-compactor', daemon=True)
+            self._compactor.start()
+    
+    def _run_compactor(self):
+        while True:
+            time.sleep(self.compact_interval)
+            try:
+                if self.training_log.count_since(self.training_log.snapshot_seq()):
+                    self.compact()
+            except Exception as e:
+                print(f"Erro ao compactar log do chatbot: {e}")
+    
+    def retrain_from_feedback(self) -> Dict[str, Any]:
+        """
+        Re-treina o modelo baseado no feedback recebido (inclusive o ainda pendente no buffer).
+        Roda na thread atual; a API usa src/chatbot_retrain.py, que faz o mesmo em outro processo.
+        """
+        self.flush_feedback()
+        return self.rebuild_model()
+    
+    def rebuild_model(self) -> Dict[str, Any]:
+        """
+        Re-treino completo: índice e classificador reconstruídos a partir de todos os padrões,
+        confiança e melhores respostas recalculadas, snapshot gravado e log compactado.
+        O evento 'model' gravado na mesma transação avisa os workers para trocarem pelo snapshot.
+        """
+        started = time.perf_counter()
+        with self._lock, self.training_log.exclusive():
+            self.replay_log()
+            self.rebuild_index()
             
-            # Buscar conversas (assumindo que existe uma tabela de logs)
-            # Como não temos essa tabela, vamos criar dados de exemplo
-            self.create_default_training_data()
+            # Atualizar confiança e melhor resposta das intenções a partir das estatísticas
+            for intent, (total, count) in self.intent_feedback.items():
+                self.intent_confidence[intent] = total / count if count else 0.0
+                self._refresh_best_response(intent)
             
-            conn.close()
-        except Exception as e:
-            print(f"Erro ao treinar a partir de conversas: {e}")
-            self.create_default_training_data()
+            if not self.save_model():
+                raise RuntimeError("Não foi possível gravar o snapshot do modelo")
+            self.training_log.truncate(self.log_seq)
+            self.loaded_snapshot_seq = self.log_seq
+            self.log_seq = self.training_log.append('model', {'snapshot_seq': self.log_seq})
+            if self.model is not None:
+                self._publish()
+        
+        return {
+            "model_version": self.log_seq,
+            "intents": len(self.intent_patterns),
+            "patterns": sum(len(patterns) for patterns in self.intent_patterns.values()),
+            "feedback_entries": self.feedback_count(),
+            "seconds": round(time.perf_counter() - started, 4)
+        }
+    
+    def train_from_conversations(self, today=None, chunk_size: int = 1000) -> Dict[str, Any]:
+        """
+        Treina o modelo a partir das conversas registradas no banco de dados (chatbot_conversations).
+        Lê só as conversas novas desde a última execução, em blocos com cursor no servidor, e
+        acumula contagens por intenção e frequência de palavras: a memória usada depende do
+        vocabulário, não do número de mensagens. Requer contexto de aplicação.
+        """
+        from src.conversation_log import conversation_log
+        
+        self.sync()
+        model = self.model
+        start_id = last_id = self.conversations_last_id
+        processed = 0
+        intent_counts, words, unknown_words = Counter(), Counter(), Counter()
+        
+        for rows in conversation_log.iter_messages(after_id=start_id, chunk_size=chunk_size):
+            # No backend por palavras-chave a chave de classificação já é a lista de tokens
+            tokens = [tuple(self.preprocess_text(message)) for _, message in rows]
+            keys = tokens if self.classifier_backend == 'keyword' else [self._cache_key(m) for _, m in rows]
+            intents = [result['intent'] for result in self._answer_keys(keys, model)]
+            
+            intent_counts.update(intents)
+            words.update(chain.from_iterable(tokens))
+            unknown_words.update(chain.from_iterable(t for t, intent in zip(tokens, intents) if intent == 'unknown'))
+            processed += len(rows)
+            last_id = rows[-1][0]
+        
+        if processed:
+            self.training_log.append('conversations', {
+                'last_id': last_id,
+                'intent_counts': dict(intent_counts),
+                'words': dict(words.most_common(CONVERSATION_WORDS_LIMIT)),
+                'unknown_words': dict(unknown_words.most_common(UNKNOWN_TERMS_LIMIT))
+            })
+            self.replay_log()
+            self.start_compactor()
+        
+        return {
+            'processed': processed,
+            'from_id': start_id,
+            'to_id': last_id,
+            'intent_counts': dict(intent_counts.most_common()),
+            'unknown_rate': round(intent_counts['unknown'] / processed, 4) if processed else 0.0,
+            'top_unknown_terms': unknown_words.most_common(20)
+        }
+    
+    def _apply_conversations(self, payload: Dict[str, Any]):
+        self.intent_usage.update(payload['intent_counts'])
+        self.word_frequency.update(payload['words'])
+        self.unknown_terms.update(payload['unknown_words'])
+        if len(self.unknown_terms) > UNKNOWN_TERMS_LIMIT:
+            self.unknown_terms = Counter(dict(self.unknown_terms.most_common(UNKNOWN_TERMS_LIMIT)))
+        self.conversations_last_id = max(self.conversations_last_id, payload['last_id'])
     
     def create_default_training_data(self):
         """
@@ -278,36 +683,13 @@ class ChatbotTrainer:
             }
         }
         
-        # Adicionar dados padrão ao modelo
+        # Adicionar dados padrão ao modelo (um evento por intenção no log)
         for intent, data in default_data.items():
-            self.intent_patterns[intent] = data["patterns"]
-            self.response_templates[intent] = data["responses"]
-            
-            # Atualizar frequência de palavras
-            for pattern in data["patterns"]:
-                words = self.preprocess_text(pattern)
-                self.word_frequency.update(words)
-        
-        # Salvar dados
-        self.save_training_data()
-        self.save_model()
-    
-    def save_training_data(self):
-        """
-        Salva os dados de treinamento em arquivo JSON.
-        """
-        data = {
-            "intent_patterns": self.intent_patterns,
-            "response_templates": self.response_templates,
-            "word_frequency": dict(self.word_frequency),
-            "last_updated": datetime.now().isoformat()
-        }
-        
-        try:
-            with open(self.training_data_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Erro ao salvar dados de treinamento: {e}")
+            self.training_log.append('intent', {
+                'intent': intent, 'patterns': data["patterns"], 'responses': data["responses"]
+            })
+        self.replay_log()
+        self.start_compactor()
     
     def load_training_data(self):
         """
@@ -326,26 +708,44 @@ class ChatbotTrainer:
     
     def save_model(self):
         """
-        Salva o modelo treinado em arquivo pickle.
+        Grava o snapshot do modelo (padrões, índice, classificador, feedback e último seq do log) em arquivo pickle.
+        A escrita é atômica: arquivo temporário + os.replace, leitores nunca veem um snapshot parcial.
         """
         model_data = {
             "intent_patterns": self.intent_patterns,
             "response_templates": self.response_templates,
             "word_frequency": dict(self.word_frequency),
             "intent_confidence": dict(self.intent_confidence),
-            "version": "1.0",
+            "response_stats": dict(self.response_stats),
+            "intent_feedback": self.intent_feedback,
+            "best_response": self.best_response,
+            "intent_usage": dict(self.intent_usage),
+            "unknown_terms": dict(self.unknown_terms),
+            "conversations_last_id": self.conversations_last_id,
+            "classifier_backend": self.classifier_backend,
+            "pattern_index": dict(self.pattern_index),
+            "tfidf_classifier": self.tfidf_classifier,
+            "log_seq": self.log_seq,
+            "version": "3.1",
             "last_trained": datetime.now().isoformat()
         }
         
+        tmp_path = f"{self.model_path}.{os.getpid()}.tmp"
         try:
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(model_data, f)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(model_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.model_path)
+            return True
         except Exception as e:
             print(f"Erro ao salvar modelo: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
     
-    def load_model(self):
+    def load_model(self) -> bool:
         """
-        Carrega o modelo treinado do arquivo pickle.
+        Carrega o snapshot do modelo do arquivo pickle.
+        Retorna True se o snapshot inclui o estado do log (feedback e seq); snapshots antigos (1.0) não incluem.
         """
         try:
             if os.path.exists(self.model_path):
@@ -356,23 +756,31 @@ class ChatbotTrainer:
                 self.response_templates = model_data.get("response_templates", {})
                 self.word_frequency = Counter(model_data.get("word_frequency", {}))
                 self.intent_confidence = defaultdict(float, model_data.get("intent_confidence", {}))
+                
+                if "log_seq" in model_data:
+                    if "response_stats" in model_data:
+                        self.response_stats = defaultdict(dict, model_data["response_stats"])
+                        self.intent_feedback = model_data.get("intent_feedback", {})
+                        self.best_response = model_data.get("best_response", {})
+                    else:
+                        self._load_feedback_scores(model_data.get("feedback_scores", {}))  # snapshot 2.0
+                    self.intent_usage = Counter(model_data.get("intent_usage", {}))
+                    self.unknown_terms = Counter(model_data.get("unknown_terms", {}))
+                    self.conversations_last_id = model_data.get("conversations_last_id", 0)
+                    self.log_seq = self.loaded_snapshot_seq = model_data["log_seq"]
+                    
+                    # Índice e classificador prontos no snapshot (3.1): sem reconstrução ao carregar
+                    if model_data.get("classifier_backend") == self.classifier_backend and "pattern_index" in model_data:
+                        self.pattern_index = defaultdict(list, model_data["pattern_index"])
+                        if self.classifier_backend == 'tfidf':
+                            self.tfidf_classifier = model_data["tfidf_classifier"]
+                        self._patterns_changed = True
+                    else:
+                        self.rebuild_index()
+                    return True
         except Exception as e:
             print(f"Erro ao carregar modelo: {e}")
-    
-    def save_feedback_data(self):
-        """
-        Salva os dados de feedback em arquivo JSON.
-        """
-        data = {
-            "feedback_scores": {k: v for k, v in self.feedback_scores.items()},
-            "last_updated": datetime.now().isoformat()
-        }
-        
-        try:
-            with open(self.feedback_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Erro ao salvar dados de feedback: {e}")
+        return False
     
     def load_feedback_data(self):
         """
@@ -383,8 +791,7 @@ class ChatbotTrainer:
                 with open(self.feedback_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                 
-                feedback_data = data.get("feedback_scores", {})
-                self.feedback_scores = defaultdict(list, feedback_data)
+                self._load_feedback_scores(data.get("feedback_scores", {}))
         except Exception as e:
             print(f"Erro ao carregar dados de feedback: {e}")
     
@@ -392,40 +799,146 @@ class ChatbotTrainer:
         """
         Retorna estatísticas do treinamento.
         """
-        total_patterns = sum(len(patterns) for patterns in self.intent_patterns.values())
-        total_responses = sum(len(responses) for responses in self.response_templates.values())
-        total_feedback = sum(len(scores) for scores in self.feedback_scores.values())
+        self.sync()
+        model = self.model
+        total_patterns = sum(len(patterns) for patterns in model.intent_patterns.values())
+        total_responses = sum(len(responses) for responses in model.response_templates.values())
+        
+        # Contadores que não fazem parte do snapshot: leitura sob a trava do escritor
+        with self._lock:
+            total_feedback = sum(count for _, count in self.intent_feedback.values())
+            vocabulary_size = len(self.word_frequency)
+            most_common_words = self.word_frequency.most_common(10)
+            conversations = {
+                "processed": sum(self.intent_usage.values()),
+                "last_id": self.conversations_last_id,
+                "intent_usage": dict(self.intent_usage.most_common()),
+                "top_unknown_terms": self.unknown_terms.most_common(10)
+            }
         
         return {
-            "total_intents": len(self.intent_patterns),
+            "total_intents": len(model.intent_patterns),
             "total_patterns": total_patterns,
             "total_responses": total_responses,
             "total_feedback_entries": total_feedback,
-            "vocabulary_size": len(self.word_frequency),
-            "most_common_words": self.word_frequency.most_common(10),
-            "intent_confidence": dict(self.intent_confidence)
+            "vocabulary_size": vocabulary_size,
+            "indexed_tokens": len(model.pattern_index),
+            "classifier": self.classifier_backend,
+            "scoring_mode": self.scoring_mode,
+            "best_responses": dict(model.best_response),
+            "model_version": model.version,
+            "pending_feedback": len(self.feedback_buffer),
+            "pending_log_events": self.training_log.count_since(self.training_log.snapshot_seq()),
+            "most_common_words": most_common_words,
+            "intent_confidence": dict(model.intent_confidence),
+            "response_cache": self.get_cache_stats(),
+            "conversations": conversations
         }
     
+    def _cache_key(self, message: str) -> tuple:
+        """
+        Tokens como o classificador ativo os enxerga: mensagens que diferem só em
+        pontuação, caixa, palavras curtas (ou acentos, no TF-IDF) têm a mesma resposta.
+        """
+        if self.classifier_backend == 'tfidf':
+            return tuple(normalize_text(message))
+        return tuple(self.preprocess_text(message))
+    
+    def _answer(self, model: ChatbotModel, tokens: tuple) -> tuple:
+        # Os tokens normalizados, reunidos, classificam igual à mensagem original
+        message = ' '.join(tokens)
+        intent = self.extract_intent(message, model)
+        response = self.generate_response(intent, message, model)
+        return intent, response, model.intent_confidence.get(intent, 0.5)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        info = self._cached_answer.cache_info()
+        hits, misses = self._cache_hits + info.hits, self._cache_misses + info.misses
+        return {
+            "size": info.currsize,
+            "max_size": self.cache_size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0
+        }
+    
+    def process_batch(self, messages: List[str], model: ChatbotModel = None) -> List[Dict[str, Any]]:
+        """
+        Classifica várias mensagens com um único snapshot. Cada mensagem é tokenizada uma vez,
+        mensagens com os mesmos tokens são agrupadas e só as distintas são pontuadas
+        (no TF-IDF, numa única multiplicação esparsa).
+        """
+        return self._answer_keys([self._cache_key(message) for message in messages], model or self.model)
+    
+    def _answer_keys(self, keys: List[tuple], model: ChatbotModel) -> List[Dict[str, Any]]:
+        unique = list(dict.fromkeys(keys))
+        
+        if model.classifier is not None:
+            intents = [intent for intent, _ in model.classifier.classify_batch([' '.join(key) for key in unique])]
+        else:
+            intents = [self._keyword_intent(list(key), model) for key in unique]
+        
+        answers = {}
+        for key, intent in zip(unique, intents):
+            answers[key] = {
+                "intent": intent,
+                "response": self.generate_response(intent, ' '.join(key), model),
+                "confidence": model.intent_confidence.get(intent, 0.5)
+            }
+        return [answers[key] for key in keys]
+    
+    def iter_batch(self, messages: List[str], chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Resultados de process_batch em blocos de `chunk_size`, para respostas em streaming.
+        Todos os blocos usam o snapshot vigente no início, mesmo que o modelo mude no meio.
+        """
+        self.sync()
+        model = self.model
+        for start in range(0, len(messages), chunk_size):
+            yield from self.process_batch(messages[start:start + chunk_size], model)
+    
     def process_message(self, message: str) -> Dict[str, Any]:
         """
         Processa uma mensagem e retorna resposta com metadados.
         """
-        intent = self.extract_intent(message)
-        response = self.generate_response(intent, message)
-        confidence = self.intent_confidence.get(intent, 0.5)
+        self.sync()
+        model = self.model  # uma leitura: intenção, resposta e confiança vêm do mesmo snapshot
+        
+        # Novo snapshot (treino, feedback ou re-treino): respostas em cache podem ter mudado
+        if model is not self._cache_model:
+            with self._lock:
+                if model is not self._cache_model:
+                    info = self._cached_answer.cache_info()
+                    self._cache_hits += info.hits
+                    self._cache_misses += info.misses
+                    self._cached_answer.cache_clear()
+                    self._cache_model = model
+        
+        intent, response, confidence = self._cached_answer(model, self._cache_key(message))
         
         return {
             "message": message,
             "intent": intent,
             "response": response,
             "confidence": confidence,
+            "model_version": model.version,
             "timestamp": datetime.now().isoformat()
         }
 
-# Instância global do trainer
-chatbot_trainer = ChatbotTrainer()
+# Instância global do trainer, criada no primeiro uso: importar o módulo não lê o
+# modelo nem o log de treinamento (nem grava dados padrão) em cada worker
+_chatbot_trainer = None
+_chatbot_trainer_lock = threading.Lock()
 
-# Inicializar com dados padrão se necessário
-if not chatbot_trainer.intent_patterns:
-    chatbot_trainer.create_default_training_data()
+def get_chatbot_trainer() -> ChatbotTrainer:
+    global _chatbot_trainer
+    if _chatbot_trainer is None:
+        with _chatbot_trainer_lock:
+            if _chatbot_trainer is None:
+                trainer = ChatbotTrainer()
+                # Inicializar com dados padrão se necessário
+                if not trainer.intent_patterns:
+                    trainer.create_default_training_data()
+                _chatbot_trainer = trainer
+    return _chatbot_trainer
 
@@ -0,0 +1,157 @@
+"""
+Pontuação de churn dos hóspedes - HostFlow
+Recência, frequência e valor de todos os hóspedes em lote, gravados com UPDATE em massa
+"""
+
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+# Limites do score para cada nível de risco
+RISK_THRESHOLDS = [(0.8, 'high'), (0.5, 'medium'), (0.0, 'low')]
+UPDATE_BATCH_SIZE = 5000
+
+
+def load_rfm_features(today: date) -> Dict[str, np.ndarray]:
+    """
+    Recência, frequência, valor e tempo de relacionamento de todos os hóspedes ativos
+    em uma única consulta agrupada. Requer contexto de aplicação.
+    """
+    from sqlalchemy import func
+    from src.models.user import db
+    from src.models.guest import Guest
+    from src.models.booking import Booking
+    from src.analytics import REVENUE_STATUSES
+
+    rows = db.session.execute(
+        db.select(
+            Guest.id,
+            func.min(Booking.check_in_date),
+            func.max(Booking.check_out_date),
+            func.count(Booking.id),
+            func.coalesce(func.sum(Booking.total_amount), 0)
+        ).select_from(Guest).outerjoin(
+            Booking, db.and_(Booking.guest_id == Guest.id, Booking.status.in_(REVENUE_STATUSES))
+        ).where(Guest.is_active == True).group_by(Guest.id)
+    ).all()
+
+    if not rows:
+        empty = np.zeros(0)
+        return {'guest_ids': empty.astype(np.int64), 'recency': empty, 'frequency': empty,
+                'monetary': empty, 'tenure': empty}
+
+    today64 = np.datetime64(today, 'D')
+    first = np.array([r[1] for r in rows], dtype='datetime64[D]')
+    last = np.array([r[2] for r in rows], dtype='datetime64[D]')
+    frequency = np.array([r[3] for r in rows], dtype=float)
+    stayed = frequency > 0
+    # Sem estadias, as datas são NaT (que vira um inteiro enorme em float): NaN explícito
+    return {
+        'guest_ids': np.array([r[0] for r in rows], dtype=np.int64),
+        'recency': np.where(stayed, (today64 - last).astype('timedelta64[D]').astype(float), np.nan),
+        'frequency': frequency,
+        'monetary': np.array([float(r[4]) for r in rows]),
+        'tenure': np.where(stayed, (last - first).astype('timedelta64[D]').astype(float), np.nan)
+    }
+
+
+def score_churn(features: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Probabilidade de o hóspede não voltar, supondo intervalos exponenciais entre estadias:
+    churn = 1 - exp(-recência / intervalo esperado). O intervalo esperado é o histórico do
+    hóspede (tempo de relacionamento / (estadias - 1)); para quem tem uma só estadia, usa-se
+    a mediana dos recorrentes. Hóspedes com estadia em andamento ou futura ficam com 0.
+    Retorna NaN para hóspedes sem estadias.
+    """
+    recency = features['recency']
+    frequency = features['frequency']
+    tenure = features['tenure']
+
+    repeaters = frequency >= 2
+    interval = np.full_like(recency, np.nan)
+    interval[repeaters] = np.maximum(tenure[repeaters] / (frequency[repeaters] - 1), 1)
+    population_interval = np.nanmedian(interval) if repeaters.any() else 365.0
+    interval = np.where(np.isnan(interval), population_interval, interval)
+
+    score = 1 - np.exp(-np.maximum(recency, 0) / interval)
+
+    # Hóspedes de maior valor tendem a voltar: atenua o score pelo percentil do gasto
+    monetary = features['monetary']
+    if len(monetary) > 1:
+        percentile = monetary.argsort().argsort() / (len(monetary) - 1)
+        score = score * (1 - 0.2 * percentile)
+
+    return np.where(frequency > 0, np.clip(score, 0, 1), np.nan)
+
+
+def risk_levels(scores: np.ndarray) -> np.ndarray:
+    levels = np.full(scores.shape, None, dtype=object)
+    for threshold, level in reversed(RISK_THRESHOLDS):
+        levels[scores >= threshold] = level
+    return levels
+
+
+class ChurnScorer:
+    """
+    Job em lote que pontua todos os hóspedes e grava churn_score/churn_risk com UPDATE em massa.
+    A listagem de hóspedes passa a ordenar/filtrar por risco sem cálculo por requisição.
+    Executado uma vez por dia pelo agendador (src/scheduler.py).
+    """
+
+    def __init__(self):
+        self.last_run: Optional[datetime] = None
+        self.last_result: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def run(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Pontua todos os hóspedes ativos (requer contexto de aplicação)"""
+        from sqlalchemy import bindparam
+        from src.models.user import db
+        from src.models.guest import Guest
+
+        with self._lock:
+            started = time.perf_counter()
+            today = today or date.today()
+            features = load_rfm_features(today)
+            scores = score_churn(features)
+            levels = risk_levels(scores)
+            scored_at = datetime.utcnow()
+
+            guests = Guest.__table__
+            statement = guests.update().where(guests.c.id == bindparam('guest_id')).values(
+                churn_score=bindparam('score'),
+                churn_risk=bindparam('risk'),
+                churn_scored_at=bindparam('scored_at'),
+                updated_at=guests.c.updated_at  # não altera a data de atualização do cadastro
+            )
+
+            params = [
+                {
+                    'guest_id': int(guest_id),
+                    'score': None if np.isnan(score) else round(float(score), 4),
+                    'risk': level,
+                    'scored_at': scored_at
+                }
+                for guest_id, score, level in zip(features['guest_ids'], scores, levels)
+            ]
+            for offset in range(0, len(params), UPDATE_BATCH_SIZE):
+                db.session.execute(statement, params[offset:offset + UPDATE_BATCH_SIZE])
+            db.session.commit()
+
+            self.last_run = datetime.now()
+            self.last_result = {
+                'guests_scored': len(params),
+                'high_risk': int((levels == 'high').sum()),
+                'medium_risk': int((levels == 'medium').sum()),
+                'low_risk': int((levels == 'low').sum()),
+                'scored_at': scored_at.isoformat(),
+                'seconds': round(time.perf_counter() - started, 4)
+            }
+            return self.last_result
+
+
+# Instância global do job de churn
+churn_scorer = ChurnScorer()
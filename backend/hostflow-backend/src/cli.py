@@ -0,0 +1,53 @@
+"""
+Comandos de linha de comando do backend - HostFlow
+Uso (a partir de backend/hostflow-backend): flask --app src.main db init
+"""
+
+import click
+from flask.cli import AppGroup
+
+db_cli = AppGroup('db', help='Migrações de esquema e dados iniciais do banco.')
+
+
+@db_cli.command('upgrade')
+@click.option('--target', type=int, default=None, help='Versão final (padrão: a mais recente).')
+def upgrade_command(target):
+    """Aplica as migrações pendentes."""
+    from src.migrations import current_version, upgrade
+
+    applied = upgrade(target)
+    if applied:
+        click.echo(f"✅ Migrações aplicadas: {', '.join(map(str, applied))}")
+    else:
+        click.echo("Nenhuma migração pendente")
+    click.echo(f"Versão do esquema: {current_version()}")
+
+
+@db_cli.command('seed')
+def seed_command():
+    """Cria o usuário demo e os dados de exemplo num banco vazio."""
+    from src.seed_data import seed_database
+
+    created = seed_database()
+    if not any(created.values()):
+        click.echo("Banco já populado, nada a fazer")
+
+
+@db_cli.command('init')
+@click.pass_context
+def init_command(ctx):
+    """Migra o esquema e popula um banco vazio (executar uma vez por deploy)."""
+    ctx.invoke(upgrade_command)
+    ctx.invoke(seed_command)
+
+
+@db_cli.command('version')
+def version_command():
+    """Mostra a versão atual do esquema e as migrações pendentes."""
+    from src.migrations import MIGRATIONS, current_version
+
+    version = current_version()
+    click.echo(f"Versão do esquema: {version}")
+    for number, description, _ in MIGRATIONS:
+        if number > version:
+            click.echo(f"  pendente: {number} - {description}")
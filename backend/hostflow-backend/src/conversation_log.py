@@ -0,0 +1,79 @@
+"""
+Registro de conversas do chatbot - HostFlow
+Cada troca do /chatbot entra num buffer em memória e é gravada em lote na tabela chatbot_conversations
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple
+
+from src.write_behind import WriteBehindBuffer
+
+
+class ConversationLog:
+    """
+    Gravação write-behind das conversas: a requisição só enfileira; uma thread de fundo
+    insere os lotes (um INSERT com várias linhas por lote) dentro do contexto da aplicação.
+    """
+
+    def __init__(self, max_batch: int = 500, interval: float = 5.0):
+        self._app = None
+        self.buffer = WriteBehindBuffer(self._write_batch, 'chatbot-conversations',
+                                        max_batch=max_batch, interval=interval,
+                                        spill_path=os.path.join(os.path.dirname(__file__), 'database',
+                                                                'chatbot_conversations.spill'))
+
+    def init_app(self, app):
+        """Registra a aplicação; sem ela (scripts, benchmarks) as conversas não são gravadas"""
+        self._app = app
+
+    def record(self, message: str, result: Dict[str, Any]):
+        if self._app is None:
+            return
+        self.buffer.put({
+            'message': message,
+            'intent': result.get('intent'),
+            'response': result.get('response'),
+            'confidence': result.get('confidence'),
+            'model_version': result.get('model_version'),
+            'created_at': datetime.utcnow()
+        })
+
+    def flush(self) -> int:
+        return self.buffer.flush()
+
+    def _write_batch(self, rows: List[Dict[str, Any]]):
+        from src.models.user import db
+        from src.models.chatbot_conversation import ChatbotConversation
+
+        with self._app.app_context():
+            try:
+                db.session.execute(db.insert(ChatbotConversation), rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def iter_messages(self, after_id: int = 0, chunk_size: int = 1000) -> Iterator[List[Tuple[int, str]]]:
+        """
+        Blocos de (id, mensagem) com id > after_id, em ordem de id (requer contexto de aplicação).
+        yield_per abre um cursor no servidor (Postgres): só um bloco fica em memória por vez.
+        """
+        from src.models.user import db
+        from src.models.chatbot_conversation import ChatbotConversation
+
+        result = db.session.execute(
+            db.select(ChatbotConversation.id, ChatbotConversation.message)
+            .where(ChatbotConversation.id > after_id)
+            .order_by(ChatbotConversation.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        for rows in result.partitions():
+            yield [(row.id, row.message) for row in rows]
+
+
+# Instância global do registro de conversas
+conversation_log = ConversationLog(
+    max_batch=int(os.getenv('CHATBOT_CONVERSATION_BATCH', 500)),
+    interval=float(os.getenv('CHATBOT_CONVERSATION_FLUSH_SECONDS', 5.0))
+)
@@ -0,0 +1,62 @@
+"""
+Briefing diário pré-calculado do InsightAI - HostFlow
+Gerado uma vez por dia pelo agendador para o portfólio e para cada pousada
+"""
+
+import json
+from datetime import date, datetime
+from typing import Dict, Any, Optional
+
+from src.models.user import db
+from src.models.property import Property
+from src.models.ai_briefing import AIBriefing
+from src.insight_data import insight_data_store
+
+
+def _save_briefing(property_id: Optional[int], briefing_date: date, data_version: int,
+                   briefing: Dict[str, Any], insights) -> AIBriefing:
+    """Grava (ou substitui) o briefing do dia; só o worker com a trava do job escreve aqui"""
+    row = AIBriefing.query.filter_by(property_id=property_id, briefing_date=briefing_date).first()
+    if row is None:
+        row = AIBriefing(property_id=property_id, briefing_date=briefing_date)
+        db.session.add(row)
+
+    row.generated_at = datetime.utcnow()
+    row.data_version = data_version
+    row.briefing = json.dumps(briefing, ensure_ascii=False, default=str)
+    row.insights = json.dumps(insights, ensure_ascii=False, default=str)
+    return row
+
+
+def generate_daily_briefings(today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Calcula briefing e insights acionáveis do portfólio e de cada pousada ativa e os
+    persiste em ai_briefings. Requer contexto de aplicação.
+    """
+    from src.ai_agent import get_insight_ai
+
+    insight_ai = get_insight_ai()
+    today = today or date.today()
+
+    # Snapshot do portfólio atualizado agora; o das pousadas usa os mesmos modelos globais
+    portfolio = insight_data_store.refresh()
+    scopes = [(None, portfolio)]
+    for (property_id,) in Property.query.with_entities(Property.id).filter_by(is_active=True).order_by(Property.id):
+        scopes.append((property_id, insight_data_store.build_snapshot(today, property_id=property_id)))
+
+    for property_id, data in scopes:
+        _save_briefing(
+            property_id, today, data['data_version'],
+            insight_ai.get_daily_briefing(data),
+            insight_ai.generate_actionable_insights(data)
+        )
+    db.session.commit()
+
+    return {'briefing_date': today.isoformat(), 'briefings': len(scopes)}
+
+
+def get_stored_briefing(property_id: Optional[int] = None) -> Optional[AIBriefing]:
+    """Briefing mais recente gravado para o portfólio (None) ou para uma pousada"""
+    return AIBriefing.query.filter_by(property_id=property_id).order_by(
+        AIBriefing.briefing_date.desc(), AIBriefing.generated_at.desc()
+    ).first()
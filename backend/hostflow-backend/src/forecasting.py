@@ -0,0 +1,413 @@
+"""
+Motor de previsão sazonal - HostFlow
+Holt-Winters aditivo e sazonal ingênuo, vetorizados por pousada sobre fatos diários
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+SEASON_LENGTH = 7  # sazonalidade semanal
+HISTORY_DAYS = 365
+FORECAST_METRICS = ['revenue', 'occupancy']
+FORECAST_METHODS = ['holt_winters', 'seasonal_naive']
+
+# Grade de parâmetros (alpha, beta, gamma) avaliada para todas as pousadas de uma vez
+PARAM_GRID = np.array([
+    (alpha, beta, gamma)
+    for alpha in (0.05, 0.1, 0.2, 0.4)
+    for beta in (0.0, 0.01, 0.05)
+    for gamma in (0.05, 0.15, 0.3)
+])
+
+# Quantis da normal para os intervalos de previsão suportados
+Z_SCORES = {80: 1.2816, 90: 1.6449, 95: 1.9600}
+
+
+def load_capacity() -> Dict[int, int]:
+    """Acomodações ativas por pousada (requer contexto de aplicação)"""
+    from sqlalchemy import func
+    from src.models.user import db
+    from src.models.accommodation import Accommodation
+
+    rows = db.session.query(
+        Accommodation.property_id,
+        func.count(Accommodation.id)
+    ).filter(Accommodation.is_active == True).group_by(Accommodation.property_id).all()
+    return dict(rows)
+
+
+def load_daily_facts(start: date, end: date, property_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Fatos diários por pousada entre start (inclusive) e end (exclusive): receita e
+    ocupação por noite efetivamente ocupada. Requer contexto de aplicação.
+    """
+    from sqlalchemy import func
+    from src.models.user import db
+    from src.models.booking import Booking
+    from src.analytics import REVENUE_STATUSES
+
+    capacity_by_property = load_capacity()
+
+    if property_ids is None:
+        property_ids = sorted(capacity_by_property)
+    index = {pid: i for i, pid in enumerate(property_ids)}
+    capacity = np.array([capacity_by_property.get(pid, 0) for pid in property_ids], dtype=float)
+
+    days = (end - start).days
+    occupied = np.zeros((len(property_ids), days + 1))
+    revenue = np.zeros((len(property_ids), days + 1))
+
+    # Reservas com as mesmas datas são agrupadas no banco
+    rows = db.session.query(
+        Booking.property_id,
+        Booking.check_in_date,
+        Booking.check_out_date,
+        func.count(Booking.id),
+        func.sum(Booking.total_amount)
+    ).filter(
+        Booking.status.in_(REVENUE_STATUSES),
+        Booking.check_in_date < end,
+        Booking.check_out_date > start
+    ).group_by(Booking.property_id, Booking.check_in_date, Booking.check_out_date).all()
+
+    rows = [r for r in rows if r[0] in index]
+    if rows:
+        prop_idx = np.array([index[r[0]] for r in rows])
+        check_in = (np.array([r[1] for r in rows], dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(int)
+        check_out = (np.array([r[2] for r in rows], dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(int)
+        count = np.array([r[3] for r in rows], dtype=float)
+        amount = np.array([float(r[4] or 0) for r in rows])
+        nightly_rate = amount / np.maximum(check_out - check_in, 1)
+
+        # Vetores de diferenças: +n na entrada, -n na saída, depois soma acumulada
+        first = np.clip(check_in, 0, days)
+        last = np.clip(check_out, 0, days)
+        np.add.at(occupied, (prop_idx, first), count)
+        np.add.at(occupied, (prop_idx, last), -count)
+        np.add.at(revenue, (prop_idx, first), nightly_rate)
+        np.add.at(revenue, (prop_idx, last), -nightly_rate)
+
+    occupied = np.cumsum(occupied, axis=1)[:, :days]
+    revenue = np.cumsum(revenue, axis=1)[:, :days]
+    occupancy = np.divide(occupied * 100, capacity[:, None],
+                          out=np.zeros_like(occupied), where=capacity[:, None] > 0)
+
+    return {
+        'property_ids': list(property_ids),
+        'capacity': capacity,
+        'start': start,
+        'revenue': revenue,
+        'occupancy': occupancy
+    }
+
+
+def _hw_initial_state(Y: np.ndarray, m: int = SEASON_LENGTH) -> Dict[str, np.ndarray]:
+    """Estado inicial a partir das duas primeiras temporadas"""
+    first = Y[:, :m].mean(axis=1)
+    second = Y[:, m:2 * m].mean(axis=1)
+    return {
+        'level': first.copy(),
+        'trend': (second - first) / m,
+        'season': Y[:, :m] - first[:, None],
+        'phase': 0
+    }
+
+
+def _hw_recursion(Y: np.ndarray, alpha: np.ndarray, beta: np.ndarray, gamma: np.ndarray,
+                  state: Dict[str, np.ndarray], m: int = SEASON_LENGTH):
+    """
+    Executa as equações de Holt-Winters aditivo para todas as séries (linhas) ao mesmo tempo.
+    Retorna o novo estado e os resíduos de um passo à frente.
+    """
+    level = state['level'].copy()
+    trend = state['trend'].copy()
+    season = state['season'].copy()
+    phase = state['phase']
+    residuals = np.empty_like(Y)
+
+    for t in range(Y.shape[1]):
+        idx = (phase + t) % m
+        y = Y[:, t]
+        s = season[:, idx]
+        residuals[:, t] = y - (level + trend + s)
+        new_level = alpha * (y - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, idx] = gamma * (y - new_level) + (1 - gamma) * s
+        level = new_level
+
+    return {'level': level, 'trend': trend, 'season': season, 'phase': (phase + Y.shape[1]) % m}, residuals
+
+
+def fit_holt_winters(Y: np.ndarray, m: int = SEASON_LENGTH, grid: np.ndarray = PARAM_GRID) -> Dict[str, Any]:
+    """
+    Ajusta Holt-Winters aditivo por série, escolhendo os parâmetros da grade com menor
+    erro quadrático. Todas as combinações e séries rodam em uma única recursão vetorizada.
+    """
+    n_series, n_days = Y.shape
+    if n_days < 3 * m:
+        raise ValueError(f'Histórico insuficiente: {n_days} dias (mínimo {3 * m})')
+
+    n_params = len(grid)
+    tiled = np.tile(Y, (n_params, 1))
+    alpha, beta, gamma = (np.repeat(grid[:, i], n_series) for i in range(3))
+
+    state, residuals = _hw_recursion(tiled, alpha, beta, gamma, _hw_initial_state(tiled, m), m)
+    warmup = 2 * m
+    sse = (residuals[:, warmup:] ** 2).sum(axis=1).reshape(n_params, n_series)
+    best = sse.argmin(axis=0)
+    rows = best * n_series + np.arange(n_series)
+
+    return {
+        'params': grid[best],
+        'state': {
+            'level': state['level'][rows],
+            'trend': state['trend'][rows],
+            'season': state['season'][rows],
+            'phase': state['phase']
+        },
+        'sse': sse[best, np.arange(n_series)],
+        'n': n_days - warmup
+    }
+
+
+def update_holt_winters(model: Dict[str, Any], Y_new: np.ndarray, m: int = SEASON_LENGTH) -> Dict[str, Any]:
+    """Avança um modelo ajustado com novos dias, mantendo os parâmetros (custo O(novos dias))"""
+    params = model['params']
+    state, residuals = _hw_recursion(Y_new, params[:, 0], params[:, 1], params[:, 2], model['state'], m)
+    return {
+        'params': params,
+        'state': state,
+        'sse': model['sse'] + (residuals ** 2).sum(axis=1),
+        'n': model['n'] + Y_new.shape[1]
+    }
+
+
+def forecast_holt_winters(model: Dict[str, Any], horizon: int, z: float = Z_SCORES[80],
+                          m: int = SEASON_LENGTH):
+    """Previsão com intervalo para h = 1..horizon; retorna (média, inferior, superior, variância)"""
+    state = model['state']
+    alpha, beta, gamma = (model['params'][:, i][:, None] for i in range(3))
+    steps = np.arange(1, horizon + 1)
+
+    season_idx = (state['phase'] + steps - 1) % m
+    mean = state['level'][:, None] + steps * state['trend'][:, None] + state['season'][:, season_idx]
+
+    # Var(h) = sigma² * (1 + soma_{j<h} c_j²), c_j = alpha(1 + j beta) + gamma [j múltiplo de m]
+    sigma2 = (model['sse'] / max(model['n'], 1))[:, None]
+    j = steps[:-1]
+    c = alpha * (1 + j * beta) + gamma * (j % m == 0)
+    cumulative = np.concatenate([np.zeros((c.shape[0], 1)), np.cumsum(c ** 2, axis=1)], axis=1)
+    variance = sigma2 * (1 + cumulative)
+
+    half_width = z * np.sqrt(variance)
+    return mean, mean - half_width, mean + half_width, variance
+
+
+def fit_seasonal_naive(Y: np.ndarray, m: int = SEASON_LENGTH) -> Dict[str, Any]:
+    """Modelo sazonal ingênuo: repete a última temporada observada"""
+    residuals = Y[:, m:] - Y[:, :-m]
+    return {
+        'recent': Y[:, -m:].copy(),
+        'sse': (residuals ** 2).sum(axis=1),
+        'n': residuals.shape[1]
+    }
+
+
+def update_seasonal_naive(model: Dict[str, Any], Y_new: np.ndarray, m: int = SEASON_LENGTH) -> Dict[str, Any]:
+    combined = np.concatenate([model['recent'], Y_new], axis=1)
+    residuals = combined[:, m:] - combined[:, :-m]
+    return {
+        'recent': combined[:, -m:],
+        'sse': model['sse'] + (residuals ** 2).sum(axis=1),
+        'n': model['n'] + residuals.shape[1]
+    }
+
+
+def forecast_seasonal_naive(model: Dict[str, Any], horizon: int, z: float = Z_SCORES[80],
+                            m: int = SEASON_LENGTH):
+    steps = np.arange(1, horizon + 1)
+    mean = model['recent'][:, (steps - 1) % m]
+    sigma2 = (model['sse'] / max(model['n'], 1))[:, None]
+    variance = sigma2 * np.ceil(steps / m)
+    half_width = z * np.sqrt(variance)
+    return mean, mean - half_width, mean + half_width, variance
+
+
+class SeasonalForecaster:
+    """
+    Previsões diárias de receita e ocupação por pousada.
+
+    Os parâmetros são escolhidos por busca em grade a cada `refit_every_days` dias;
+    entre uma busca e outra, cada dia fechado apenas avança o estado do modelo.
+    """
+
+    def __init__(self, history_days: int = HISTORY_DAYS, refit_every_days: int = 28):
+        self.history_days = history_days
+        self.refit_every_days = refit_every_days
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def is_fitted(self) -> bool:
+        return bool(self._models)
+
+    def _fit(self, facts: Dict[str, Any], today: date) -> Dict[str, Any]:
+        started = time.perf_counter()
+        models = {
+            'property_ids': facts['property_ids'],
+            'capacity': facts['capacity'],
+            'fitted_through': today - timedelta(days=1),
+            'full_fit_on': today
+        }
+        for metric in FORECAST_METRICS:
+            Y = facts[metric]
+            models[metric] = {
+                'holt_winters': fit_holt_winters(Y),
+                'seasonal_naive': fit_seasonal_naive(Y)
+            }
+        models['fit_seconds'] = round(time.perf_counter() - started, 4)
+        return models
+
+    def update(self, today: Optional[date] = None) -> bool:
+        """
+        Atualiza os modelos até ontem (requer contexto de aplicação).
+        Retorna True se houve ajuste completo ou incremental.
+        """
+        today = today or date.today()
+        with self._lock:
+            models = self._models
+            active_ids = sorted(load_capacity())
+            if not active_ids:
+                return False
+
+            needs_full_fit = (
+                not models
+                or models['property_ids'] != active_ids
+                or (today - models['full_fit_on']).days >= self.refit_every_days
+            )
+
+            if needs_full_fit:
+                facts = load_daily_facts(today - timedelta(days=self.history_days), today, active_ids)
+                self._models = self._fit(facts, today)
+                return True
+
+            start = models['fitted_through'] + timedelta(days=1)
+            if start >= today:
+                return False
+
+            started = time.perf_counter()
+            facts = load_daily_facts(start, today, models['property_ids'])
+            updated = dict(models)
+            for metric in FORECAST_METRICS:
+                Y = facts[metric]
+                updated[metric] = {
+                    'holt_winters': update_holt_winters(models[metric]['holt_winters'], Y),
+                    'seasonal_naive': update_seasonal_naive(models[metric]['seasonal_naive'], Y)
+                }
+            updated['fitted_through'] = today - timedelta(days=1)
+            updated['fit_seconds'] = round(time.perf_counter() - started, 4)
+            self._models = updated
+            return True
+
+    def _predict(self, models: Dict[str, Any], metric: str, horizon: int, method: str, level: int):
+        model = models[metric][method]
+        predict = forecast_holt_winters if method == 'holt_winters' else forecast_seasonal_naive
+        mean, lower, upper, variance = predict(model, horizon, Z_SCORES[level])
+
+        floor = 0.0
+        ceiling = 100.0 if metric == 'occupancy' else np.inf
+        return (np.clip(mean, floor, ceiling), np.clip(lower, floor, ceiling),
+                np.clip(upper, floor, ceiling), variance)
+
+    def forecast(self, metric: str = 'revenue', horizon: int = 30, property_id: Optional[int] = None,
+                 method: str = 'holt_winters', level: int = 80) -> Dict[str, Any]:
+        """Previsão diária por pousada com intervalo de previsão"""
+        models = self._models
+        if not models:
+            raise RuntimeError('Modelos de previsão ainda não foram ajustados')
+
+        mean, lower, upper, _ = self._predict(models, metric, horizon, method, level)
+        first_day = models['fitted_through'] + timedelta(days=1)
+        dates = [(first_day + timedelta(days=h)).isoformat() for h in range(horizon)]
+
+        property_ids = models['property_ids']
+        rows = range(len(property_ids))
+        if property_id is not None:
+            if property_id not in property_ids:
+                raise KeyError(property_id)
+            rows = [property_ids.index(property_id)]
+
+        params = models[metric]['holt_winters']['params']
+        return {
+            'metric': metric,
+            'method': method,
+            'interval_level': level,
+            'fitted_through': models['fitted_through'].isoformat(),
+            'dates': dates,
+            'properties': [
+                {
+                    'property_id': property_ids[i],
+                    'values': np.round(mean[i], 2).tolist(),
+                    'lower': np.round(lower[i], 2).tolist(),
+                    'upper': np.round(upper[i], 2).tolist(),
+                    'params': dict(zip(['alpha', 'beta', 'gamma'], params[i].tolist()))
+                    if method == 'holt_winters' else None
+                }
+                for i in rows
+            ]
+        }
+
+    def summary(self, horizon: int = 30, level: int = 80,
+                property_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Totais do portfólio (ou de uma pousada) para os próximos `horizon` dias"""
+        models = self._models
+        if not models or (property_id is not None and property_id not in models['property_ids']):
+            return None
+
+        z = Z_SCORES[level]
+        revenue, _, _, revenue_var = self._predict(models, 'revenue', horizon, 'holt_winters', level)
+        occupancy, _, _, occupancy_var = self._predict(models, 'occupancy', horizon, 'holt_winters', level)
+        capacity = models['capacity']
+
+        if property_id is not None:
+            rows = [models['property_ids'].index(property_id)]
+            revenue, revenue_var = revenue[rows], revenue_var[rows]
+            occupancy, occupancy_var = occupancy[rows], occupancy_var[rows]
+            capacity = capacity[rows]
+
+        # Soma das previsões diárias; variância somada supondo erros independentes
+        total_revenue = float(revenue.sum())
+        revenue_sd = float(np.sqrt(revenue_var.sum()))
+
+        weights = capacity / capacity.sum() if capacity.sum() else None
+        per_property_occupancy = occupancy.mean(axis=1)
+        occupancy_sd = np.sqrt(occupancy_var.mean(axis=1) / horizon)
+        if weights is not None:
+            avg_occupancy = float(per_property_occupancy @ weights)
+            avg_occupancy_sd = float(np.sqrt((occupancy_sd ** 2) @ (weights ** 2)))
+        else:
+            avg_occupancy = avg_occupancy_sd = 0.0
+
+        return {
+            'horizon_days': horizon,
+            'interval_level': level,
+            'fitted_through': models['fitted_through'].isoformat(),
+            'fit_seconds': models['fit_seconds'],
+            'revenue': {
+                'value': round(total_revenue, 2),
+                'range': [round(max(total_revenue - z * revenue_sd, 0), 2), round(total_revenue + z * revenue_sd, 2)]
+            },
+            'occupancy': {
+                'value': round(avg_occupancy, 1),
+                'range': [round(max(avg_occupancy - z * avg_occupancy_sd, 0), 1),
+                          round(min(avg_occupancy + z * avg_occupancy_sd, 100), 1)]
+            }
+        }
+
+
+# Instância global do motor de previsão
+seasonal_forecaster = SeasonalForecaster()
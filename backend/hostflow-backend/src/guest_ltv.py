@@ -0,0 +1,198 @@
+"""
+Motor de LTV e coortes de hóspedes - HostFlow
+Agregados por hóspede em uma única consulta + matrizes de retenção em NumPy
+"""
+
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+COHORT_MONTHS = 12
+TOP_GUESTS = 20
+
+
+def month_index(day: date) -> int:
+    """Número de meses desde o ano 0 (permite subtrair meses como inteiros)"""
+    return day.year * 12 + day.month - 1
+
+
+def month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def load_guest_months() -> np.ndarray:
+    """
+    Reservas convertidas agrupadas por (hóspede, mês de check-in), em uma única consulta.
+    Retorna uma matriz (linhas x 5): guest_id, mês, reservas, receita, noites.
+    Requer contexto de aplicação.
+    """
+    from sqlalchemy import func, extract
+    from src.models.user import db
+    from src.models.booking import Booking
+    from src.analytics import REVENUE_STATUSES
+
+    month = (extract('year', Booking.check_in_date) * 12 + extract('month', Booking.check_in_date) - 1).label('month')
+    rows = db.session.execute(
+        db.select(
+            Booking.guest_id,
+            month,
+            func.count(Booking.id),
+            func.sum(Booking.total_amount),
+            func.sum(Booking.nights)
+        ).where(
+            Booking.status.in_(REVENUE_STATUSES)
+        ).group_by(Booking.guest_id, month)
+    ).all()
+
+    if not rows:
+        return np.zeros((0, 5))
+    return np.array(rows, dtype=float)
+
+
+def compute_ltv_snapshot(guest_months: np.ndarray, current_month: int,
+                         cohort_months: int = COHORT_MONTHS, top: int = TOP_GUESTS) -> Dict[str, Any]:
+    """
+    Calcula LTV, taxa de recompra e matrizes de coorte a partir das linhas
+    (guest_id, mês, reservas, receita, noites). Totalmente vetorizado.
+    """
+    if len(guest_months) == 0:
+        return empty_ltv_snapshot()
+
+    guest_ids, guest_idx = np.unique(guest_months[:, 0].astype(np.int64), return_inverse=True)
+    months = guest_months[:, 1].astype(np.int64)
+    bookings = guest_months[:, 2]
+    revenue = guest_months[:, 3]
+    nights = guest_months[:, 4]
+    n_guests = len(guest_ids)
+
+    # Agregados por hóspede
+    total_bookings = np.bincount(guest_idx, weights=bookings, minlength=n_guests)
+    ltv = np.bincount(guest_idx, weights=revenue, minlength=n_guests)
+    total_nights = np.bincount(guest_idx, weights=nights, minlength=n_guests)
+    first_month = np.full(n_guests, np.iinfo(np.int64).max)
+    np.minimum.at(first_month, guest_idx, months)
+    last_month = np.full(n_guests, np.iinfo(np.int64).min)
+    np.maximum.at(last_month, guest_idx, months)
+
+    repeat = total_bookings >= 2
+
+    # Coortes: mês da primeira estadia x meses desde a primeira estadia
+    first_cohort = current_month - cohort_months + 1
+    row_cohort = first_month[guest_idx] - first_cohort
+    row_age = months - first_month[guest_idx]
+    in_window = (row_cohort >= 0) & (row_cohort < cohort_months) & (row_age < cohort_months)
+
+    active = np.zeros((cohort_months, cohort_months))
+    np.add.at(active, (row_cohort[in_window], row_age[in_window]), 1)
+    cohort_revenue = np.zeros((cohort_months, cohort_months))
+    np.add.at(cohort_revenue, (row_cohort[in_window], row_age[in_window]), revenue[in_window])
+
+    cohort_size = active[:, 0]
+    retention = np.divide(active, cohort_size[:, None], out=np.zeros_like(active), where=cohort_size[:, None] > 0)
+    cumulative_ltv = np.divide(np.cumsum(cohort_revenue, axis=1), cohort_size[:, None],
+                               out=np.zeros_like(cohort_revenue), where=cohort_size[:, None] > 0)
+
+    # Idades ainda não observadas ficam como None
+    observed = np.arange(cohort_months)[None, :] <= (cohort_months - 1 - np.arange(cohort_months))[:, None]
+
+    def masked(matrix, decimals):
+        return [[round(float(v), decimals) if ok else None for v, ok in zip(row, mask)]
+                for row, mask in zip(matrix, observed)]
+
+    top_idx = np.argsort(-ltv)[:top]
+    percentiles = np.percentile(ltv, [50, 90, 99])
+
+    return {
+        'guests': int(n_guests),
+        'total_revenue': round(float(ltv.sum()), 2),
+        'avg_ltv': round(float(ltv.mean()), 2),
+        'median_ltv': round(float(percentiles[0]), 2),
+        'p90_ltv': round(float(percentiles[1]), 2),
+        'p99_ltv': round(float(percentiles[2]), 2),
+        'avg_bookings': round(float(total_bookings.mean()), 2),
+        'avg_nights': round(float(total_nights.mean()), 2),
+        'avg_booking_value': round(float(ltv.sum() / total_bookings.sum()), 2) if total_bookings.sum() else 0.0,
+        'repeat_rate': round(float(repeat.mean()), 4),
+        'frequent_guests': int((total_bookings >= 3).sum()),
+        'repeat_revenue_share': round(float(ltv[repeat].sum() / ltv.sum()), 4) if ltv.sum() else 0.0,
+        'cohorts': {
+            'months': [month_label(first_cohort + i) for i in range(cohort_months)],
+            'sizes': cohort_size.astype(int).tolist(),
+            'retention': masked(retention, 4),
+            'cumulative_ltv': masked(cumulative_ltv, 2)
+        },
+        'top_guests': [
+            {
+                'guest_id': int(guest_ids[i]),
+                'ltv': round(float(ltv[i]), 2),
+                'bookings': int(total_bookings[i]),
+                'last_stay_month': month_label(int(last_month[i]))
+            }
+            for i in top_idx
+        ]
+    }
+
+
+def empty_ltv_snapshot() -> Dict[str, Any]:
+    return {
+        'guests': 0,
+        'total_revenue': 0.0,
+        'avg_ltv': 0.0,
+        'median_ltv': 0.0,
+        'p90_ltv': 0.0,
+        'p99_ltv': 0.0,
+        'avg_bookings': 0.0,
+        'avg_nights': 0.0,
+        'avg_booking_value': 0.0,
+        'repeat_rate': 0.0,
+        'frequent_guests': 0,
+        'repeat_revenue_share': 0.0,
+        'cohorts': {'months': [], 'sizes': [], 'retention': [], 'cumulative_ltv': []},
+        'top_guests': []
+    }
+
+
+class GuestLTVEngine:
+    """
+    Snapshot de LTV e coortes de todos os hóspedes.
+
+    Recalculado em segundo plano junto com o snapshot do InsightAI; as rotas de IA
+    apenas leem o resultado compacto.
+    """
+
+    def __init__(self, cohort_months: int = COHORT_MONTHS):
+        self.cohort_months = cohort_months
+        self._snapshot = dict(empty_ltv_snapshot(), built_at=None, build_seconds=0.0)
+        self._lock = threading.Lock()
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        return self._snapshot
+
+    def refresh(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Recalcula o snapshot (requer contexto de aplicação)"""
+        from src.models.guest import Guest
+
+        with self._lock:
+            started = time.perf_counter()
+            snapshot = compute_ltv_snapshot(load_guest_months(), month_index(today or date.today()),
+                                            self.cohort_months)
+
+            # Nomes apenas para os poucos hóspedes do topo
+            ids = [g['guest_id'] for g in snapshot['top_guests']]
+            if ids:
+                names = dict(Guest.query.with_entities(Guest.id, Guest.first_name + ' ' + Guest.last_name)
+                             .filter(Guest.id.in_(ids)).all())
+                for guest in snapshot['top_guests']:
+                    guest['name'] = names.get(guest['guest_id'])
+
+            snapshot['built_at'] = datetime.now().isoformat()
+            snapshot['build_seconds'] = round(time.perf_counter() - started, 4)
+            self._snapshot = snapshot
+            return snapshot
+
+
+# Instância global do motor de LTV
+guest_ltv_engine = GuestLTVEngine()
@@ -0,0 +1,388 @@
+"""
+Pipeline de dados do InsightAI - HostFlow
+Constrói um snapshot analítico a partir de Booking, Guest e Accommodation
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+from sqlalchemy import func, case
+
+from src.models.user import db
+from src.models.booking import Booking
+from src.models.guest import Guest
+from src.models.accommodation import Accommodation
+from src.models.anomaly import AnomalyEvent
+from src.models.insight_snapshot import InsightSnapshot
+from src.models.price_recommendation import PriceRecommendation
+from src.analytics import REVENUE_STATUSES, bucket_expression, bucket_start, next_bucket, timeseries_analytics
+from src.forecasting import seasonal_forecaster
+from src.guest_ltv import guest_ltv_engine, empty_ltv_snapshot
+from src.pricing import get_pricing_summary
+from src.anomaly_detection import get_recent_anomalies
+from src.scheduler import job_scheduler
+
+SNAPSHOT_SCOPE = 'portfolio'
+SNAPSHOT_JOB = 'insight_snapshot'  # trava (scheduled_jobs) de quem recalcula o snapshot
+
+
+class InsightDataStore:
+    """
+    Snapshot analítico consumido pelo InsightAI.
+
+    O snapshot é calculado com poucas consultas agregadas + NumPy e gravado em
+    insight_snapshots com um número de versão (data_version). Um único worker o recalcula,
+    sob a trava do job insight_snapshot, quando o gravado tem mais de refresh_interval
+    segundos e os dados de origem mudaram; os demais só leem o resultado gravado (uma
+    consulta leve a cada poll_interval). Os endpoints de IA apenas leem o snapshot em
+    memória; nenhuma consulta pesada roda na requisição.
+    """
+
+    def __init__(self, months: int = 12, refresh_interval: int = 900, poll_interval: int = 60,
+                 lease_seconds: int = 300):
+        self.months = months
+        self.refresh_interval = refresh_interval
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._snapshot = self._empty_snapshot()
+        self._app = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._refresh_requested = threading.Event()
+
+    @property
+    def data_version(self) -> int:
+        return self._snapshot['data_version']
+
+    def init_app(self, app):
+        """Registra a aplicação e inicia a atualização em segundo plano"""
+        self._app = app
+        self.start()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='insight-data-refresh', daemon=True)
+            self._thread.start()
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Retorna o snapshot atual (leitura sem bloqueio)"""
+        return self._snapshot
+
+    def request_refresh(self):
+        """Solicita uma atualização antecipada à thread de segundo plano"""
+        self._refresh_requested.set()
+
+    def refresh(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Publica o snapshot gravado mais recente, recalculando-o antes se estiver vencido e
+        este worker obtiver a trava. force recalcula mesmo com dados inalterados.
+        """
+        with self._lock:
+            if self._app is not None:
+                with self._app.app_context():
+                    return self._refresh(force)
+            return self._refresh(force)
+
+    def _refresh(self, force: bool) -> Dict[str, Any]:
+        stored = db.session.execute(
+            db.select(InsightSnapshot.version, InsightSnapshot.checked_at).where(InsightSnapshot.scope == SNAPSHOT_SCOPE)
+        ).first()
+        stale_before = datetime.utcnow() - timedelta(seconds=self.refresh_interval)
+        if force or stored is None or stored.checked_at < stale_before:
+            # Sem a trava, outro worker está recalculando: segue com o gravado
+            job_scheduler.run_locked(SNAPSHOT_JOB, lambda: self._rebuild_stored(force), self.lease_seconds)
+            stored = db.session.execute(
+                db.select(InsightSnapshot.version).where(InsightSnapshot.scope == SNAPSHOT_SCOPE)
+            ).first()
+
+        if stored is not None and stored.version != self._snapshot['data_version']:
+            payload = db.session.execute(
+                db.select(InsightSnapshot.version, InsightSnapshot.payload).where(InsightSnapshot.scope == SNAPSHOT_SCOPE)
+            ).one()
+            snapshot = json.loads(payload.payload)
+            snapshot['data_version'] = payload.version
+            self._snapshot = snapshot
+        return self._snapshot
+
+    def _rebuild_stored(self, force: bool = False) -> Dict[str, Any]:
+        """Executado sob a trava: recalcula e grava o snapshot só se os dados de origem mudaram"""
+        now = datetime.utcnow()
+        key = self._data_key(date.today())
+        row = db.session.get(InsightSnapshot, SNAPSHOT_SCOPE)
+        if row is not None and row.data_key == key and not force:
+            row.checked_at = now
+            db.session.commit()
+            return {'version': row.version, 'rebuilt': False}
+
+        version = (row.version if row is not None else 0) + 1
+        snapshot = self.build_snapshot()
+        snapshot['data_version'] = version
+        if row is None:
+            row = InsightSnapshot(scope=SNAPSHOT_SCOPE)
+            db.session.add(row)
+        row.version = version
+        row.data_key = key
+        row.built_at = row.checked_at = now
+        row.payload = json.dumps(snapshot, ensure_ascii=False)
+        db.session.commit()
+        return {'version': version, 'rebuilt': True}
+
+    def _data_key(self, today: date) -> str:
+        """
+        Resumo barato (contagens e últimas alterações) de tudo o que entra no snapshot. A data
+        entra porque a janela de meses, a previsão e as anomalias recentes dependem dela.
+        """
+        parts = [today.isoformat()]
+        for columns in (
+            (func.count(Booking.id), func.max(Booking.updated_at)),
+            (func.count(Guest.id), func.max(Guest.updated_at), func.max(Guest.churn_scored_at)),
+            (func.count(Accommodation.id), func.max(Accommodation.updated_at)),
+            (func.count(PriceRecommendation.id), func.max(PriceRecommendation.generated_at),
+             func.max(PriceRecommendation.applied_at)),
+            (func.count(AnomalyEvent.id), func.max(AnomalyEvent.detected_at)),
+        ):
+            parts.extend(str(value) for value in db.session.execute(db.select(*columns)).one())
+        return '|'.join(parts)
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Erro ao atualizar snapshot do InsightAI: {e}")
+            self._refresh_requested.wait(self.poll_interval)
+            self._refresh_requested.clear()
+
+    def _month_starts(self, today: date) -> List[date]:
+        """Inícios dos últimos N meses fechados, do mais antigo ao mais recente"""
+        starts = []
+        current = bucket_start(today, 'month')
+        for _ in range(self.months):
+            current = bucket_start(current - timedelta(days=1), 'month')
+            starts.append(current)
+        return starts[::-1]
+
+    def _empty_snapshot(self) -> Dict[str, Any]:
+        zeros = [0.0] * self.months
+        return {
+            'data_version': 0,
+            'property_id': None,
+            'built_at': None,
+            'build_seconds': 0.0,
+            'months': [],
+            'revenue_monthly': zeros,
+            'occupancy_rate': zeros,
+            'guest_count': zeros,
+            'checkins_daily': zeros,
+            'booking_conversion': zeros,
+            'customer_satisfaction': zeros,
+            'source_conversion': [],
+            'current_month': {'revenue': 0.0, 'bookings': 0, 'nights': 0},
+            'records_processed': 0,
+            'data_quality_score': 0.0,
+            'active_accommodations': 0,
+            'active_guests': 0,
+            'churn_risk_clients': [],
+            'churn_risk_details': [],
+            'churn_risk_counts': {'low': 0, 'medium': 0, 'high': 0},
+            'high_value_clients': [],
+            'forecast': None,
+            'ltv': empty_ltv_snapshot(),
+            'pricing': None,
+            'anomalies': []
+        }
+
+    def _build_forecast(self, today: date) -> Optional[Dict[str, Any]]:
+        """Atualiza os modelos de previsão e resume os próximos 30 dias"""
+        try:
+            seasonal_forecaster.update(today)
+            return seasonal_forecaster.summary(horizon=30)
+        except Exception as e:
+            print(f"Erro ao atualizar previsões: {e}")
+            return None
+
+    def _build_ltv(self, today: date) -> Dict[str, Any]:
+        """Recalcula LTV e coortes de todos os hóspedes"""
+        try:
+            return guest_ltv_engine.refresh(today)
+        except Exception as e:
+            print(f"Erro ao atualizar LTV: {e}")
+            return guest_ltv_engine.get_snapshot()
+
+    def build_snapshot(self, today: Optional[date] = None, property_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Calcula o snapshot (requer contexto de aplicação).
+        Com property_id, restringe reservas e acomodações à pousada e reaproveita os
+        modelos globais (LTV e previsão) sem recalculá-los.
+        """
+        started = time.perf_counter()
+        today = today or date.today()
+        month_starts = self._month_starts(today)
+        window_start = month_starts[0]
+        window_end = next_bucket(month_starts[-1], 'month')
+        is_revenue = Booking.status.in_(REVENUE_STATUSES)
+        property_filter = [Booking.property_id == property_id] if property_id else []
+
+        # 1. Agregados mensais por reserva (mês do check-in) em uma única consulta (inclui o mês corrente)
+        month_col = bucket_expression(Booking.check_in_date, 'month').label('month')
+        monthly_rows = db.session.query(
+            month_col,
+            func.count(Booking.id),
+            func.sum(case((is_revenue, 1), else_=0)),
+            func.count(func.distinct(case((is_revenue, Booking.guest_id)))),
+            func.sum(Booking.guest_rating),
+            func.count(Booking.guest_rating),
+            func.sum(case((db.and_(Booking.total_amount != None, Booking.nights > 0), 1), else_=0))
+        ).filter(
+            Booking.check_in_date >= window_start,
+            Booking.check_in_date < next_bucket(window_end, 'month'),
+            *property_filter
+        ).group_by(month_col).all()
+
+        index = {m: i for i, m in enumerate(month_starts)}
+        # colunas: reservas, convertidas, hóspedes, soma notas, qtd notas, completas
+        totals = np.zeros((self.months, 6))
+        current_month = {'revenue': 0.0, 'bookings': 0, 'nights': 0}
+        for row in monthly_rows:
+            month = date.fromisoformat(str(row[0])[:10])
+            values = [float(v or 0) for v in row[1:]]
+            if month in index:
+                totals[index[month]] = values
+            elif month == window_end:
+                current_month['bookings'] += int(values[1])
+
+        bookings, converted, guests, rating_sum, rating_count, complete = totals.T
+
+        # Receita e noites por mês da estadia (noites distribuídas entre os meses), as mesmas
+        # da série temporal de analytics: meses fechados vêm do cache dela
+        stay_totals = timeseries_analytics.get_totals('month', window_start, window_end, property_id)
+        revenue = np.array([stay_totals[m][0] for m in month_starts])
+        nights = np.array([stay_totals[m][1] for m in month_starts], dtype=float)
+        current_month['revenue'], current_month['nights'] = stay_totals[window_end]
+        days_in_month = np.array([(next_bucket(m, 'month') - m).days for m in month_starts], dtype=float)
+
+        # 2. Contagens de acomodações e hóspedes ativos
+        accommodations_query = Accommodation.query.filter_by(is_active=True)
+        if property_id:
+            accommodations_query = accommodations_query.filter_by(property_id=property_id)
+        active_accommodations = accommodations_query.count()
+        active_guests = Guest.query.filter_by(is_active=True).count()
+
+        available = days_in_month * active_accommodations
+        occupancy = np.divide(nights * 100, available, out=np.zeros_like(nights), where=available > 0)
+        conversion = np.divide(converted, bookings, out=np.zeros_like(bookings), where=bookings > 0)
+        satisfaction = np.divide(rating_sum, rating_count, out=np.zeros_like(rating_sum), where=rating_count > 0)
+        checkins_daily = converted / days_in_month
+
+        # 3. Conversão por origem da reserva
+        source_rows = db.session.query(
+            func.coalesce(Booking.source, 'direct'),
+            func.count(Booking.id),
+            func.sum(case((is_revenue, 1), else_=0)),
+            func.sum(case((is_revenue, Booking.total_amount), else_=0))
+        ).filter(
+            Booking.check_in_date >= window_start,
+            Booking.check_in_date < window_end,
+            *property_filter
+        ).group_by(func.coalesce(Booking.source, 'direct')).all()
+
+        source_conversion = sorted([
+            {
+                'channel': source,
+                'bookings': int(total),
+                'conversion': round(float(conv or 0) / total, 3) if total else 0,
+                'revenue': round(float(amount or 0), 2)
+            }
+            for source, total, conv, amount in source_rows
+        ], key=lambda s: (s['conversion'], s['revenue']), reverse=True)
+
+        # 4. LTV e coortes; clientes de alto valor são os de maior LTV
+        ltv = self._build_ltv(today) if property_id is None else guest_ltv_engine.get_snapshot()
+
+        # 5. Previsão dos próximos 30 dias
+        if property_id is None:
+            forecast = self._build_forecast(today)
+        else:
+            forecast = seasonal_forecaster.summary(horizon=30, property_id=property_id)
+
+        # 6. Clientes em risco: score de churn gravado pelo job diário (os 20 maiores, só para exibição;
+        #    o total de hóspedes em risco vem de churn_risk_counts)
+        churn_query = Guest.query.with_entities(
+            Guest.first_name, Guest.last_name, Guest.churn_score, Guest.last_stay_date, Guest.total_bookings
+        ).filter(
+            Guest.is_active == True,
+            Guest.churn_risk == 'high'
+        )
+        if property_id:
+            churn_query = churn_query.filter(
+                Guest.id.in_(db.select(Booking.guest_id).where(Booking.property_id == property_id))
+            )
+        churn_risk = churn_query.order_by(Guest.churn_score.desc()).limit(20).all()
+
+        # Hóspedes por nível de risco (low = retorno provável)
+        risk_query = db.session.query(Guest.churn_risk, func.count(Guest.id)).filter(
+            Guest.is_active == True,
+            Guest.churn_risk != None
+        )
+        if property_id:
+            risk_query = risk_query.filter(
+                Guest.id.in_(db.select(Booking.guest_id).where(Booking.property_id == property_id))
+            )
+        churn_risk_counts = {'low': 0, 'medium': 0, 'high': 0}
+        churn_risk_counts.update({risk: int(n) for risk, n in risk_query.group_by(Guest.churn_risk).all()})
+
+        # 7. Sugestões de preço gravadas pelo job noturno (próximos 30 dias)
+        try:
+            pricing = get_pricing_summary(property_id)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao resumir sugestões de preço: {e}")
+            pricing = None
+
+        # 8. Anomalias detectadas no fluxo de reservas nas últimas 24 horas
+        anomalies = get_recent_anomalies(property_id)
+
+        records = int(bookings.sum())
+        return {
+            'data_version': self.data_version,  # versão do snapshot do portfólio em que se baseia
+            'property_id': property_id,
+            'built_at': datetime.now().isoformat(),
+            'build_seconds': round(time.perf_counter() - started, 4),
+            'months': [m.strftime('%Y-%m') for m in month_starts],
+            'revenue_monthly': np.round(revenue, 2).tolist(),
+            'occupancy_rate': np.round(occupancy, 1).tolist(),
+            'guest_count': guests.astype(int).tolist(),
+            'checkins_daily': np.round(checkins_daily, 1).tolist(),
+            'booking_conversion': np.round(conversion, 3).tolist(),
+            'customer_satisfaction': np.round(satisfaction, 2).tolist(),
+            'source_conversion': source_conversion,
+            'current_month': current_month,
+            'records_processed': records,
+            'data_quality_score': round(float(complete.sum()) / records * 100, 1) if records else 0.0,
+            'active_accommodations': active_accommodations,
+            'active_guests': active_guests,
+            'churn_risk_clients': [f"{g.first_name} {g.last_name}" for g in churn_risk],
+            'churn_risk_details': [
+                {
+                    'name': f"{g.first_name} {g.last_name}",
+                    'churn_score': round(float(g.churn_score), 3),
+                    'last_stay_date': g.last_stay_date.isoformat() if g.last_stay_date else None,
+                    'total_bookings': g.total_bookings or 0
+                }
+                for g in churn_risk
+            ],
+            'churn_risk_counts': churn_risk_counts,
+            'high_value_clients': [g['name'] for g in ltv['top_guests'][:5] if g.get('name')],
+            'forecast': forecast,
+            'ltv': ltv,
+            'pricing': pricing,
+            'anomalies': anomalies
+        }
+
+
+# Instância global do snapshot
+insight_data_store = InsightDataStore()
@@ -0,0 +1,176 @@
+"""
+Classificador de intenções TF-IDF - HostFlow
+Backend opcional do ChatbotTrainer: vetores esparsos TF-IDF contra centróides por intenção
+"""
+
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def normalize_text(text: str) -> List[str]:
+    """
+    Tokeniza como ChatbotTrainer.preprocess_text, mas sem acentos
+    ("preço" e "preco" viram o mesmo token).
+    """
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[^\w\s]', '', text)
+    return [word for word in text.split() if len(word) > 2]
+
+
+class TfidfIntentClassifier:
+    """
+    Classificador por similaridade de cosseno entre a mensagem (TF-IDF, normalizada)
+    e o centróide TF-IDF de cada intenção.
+
+    As estatísticas (frequência de documentos e contagem de termos por intenção) são
+    atualizadas incrementalmente a cada padrão adicionado; a matriz de centróides é
+    recalculada a partir delas apenas quando uma classificação encontra o modelo alterado.
+    Os vetores das mensagens são esparsos (índices + valores em NumPy), então uma
+    classificação custa uma soma sobre os tokens da mensagem.
+    """
+
+    def __init__(self, min_score: float = 0.2):
+        self.min_score = min_score
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self):
+        # Vai no snapshot do modelo (pickle) já com os pesos calculados; a trava não é serializável
+        self._refresh()
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.intents: List[str] = []
+        self.intent_index: Dict[str, int] = {}
+        self.doc_freq: Counter = Counter()
+        self.term_counts: List[Counter] = []
+        self.n_docs = 0
+        self._weights = None  # (centróides, idf), trocados numa única atribuição
+
+    def fit(self, intent_patterns: Dict[str, List[str]]):
+        """Reconstrói as estatísticas a partir de todos os padrões"""
+        with self._lock:
+            self.reset()
+        for intent, patterns in intent_patterns.items():
+            for pattern in patterns:
+                self.partial_fit(intent, pattern)
+
+    def partial_fit(self, intent: str, pattern: str):
+        """Adiciona um padrão: atualiza df, contagens da intenção e invalida os centróides"""
+        tokens = normalize_text(pattern)
+        with self._lock:
+            if intent not in self.intent_index:
+                self.intent_index[intent] = len(self.intents)
+                self.intents.append(intent)
+                self.term_counts.append(Counter())
+            if not tokens:
+                return
+
+            for token in tokens:
+                if token not in self.vocabulary:
+                    self.vocabulary[token] = len(self.vocabulary)
+            self.n_docs += 1
+            self.doc_freq.update(set(tokens))
+            self.term_counts[self.intent_index[intent]].update(tokens)
+            self._weights = None
+
+    def _refresh(self):
+        """Centróides L2-normalizados (intenções x vocabulário) a partir das contagens"""
+        weights = self._weights
+        if weights is not None:
+            return weights  # caminho comum: sem trava
+        
+        with self._lock:
+            if self._weights is not None:
+                return self._weights
+
+            vocab_size = len(self.vocabulary)
+            df = np.zeros(vocab_size)
+            for token, count in self.doc_freq.items():
+                df[self.vocabulary[token]] = count
+            idf = np.log((1 + self.n_docs) / (1 + df)) + 1
+
+            centroids = np.zeros((len(self.intents), vocab_size))
+            for row, counts in enumerate(self.term_counts):
+                if counts:
+                    cols = [self.vocabulary[token] for token in counts]
+                    centroids[row, cols] = list(counts.values())
+            centroids *= idf
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            np.divide(centroids, norms, out=centroids, where=norms > 0)
+
+            self._weights = (centroids, idf)
+            return self._weights
+
+    def snapshot(self) -> 'TfidfIntentClassifier':
+        """
+        Cópia só para classificação (vocabulário, intenções e pesos já calculados), usada
+        nos snapshots imutáveis do modelo: o original segue recebendo partial_fit sem afetá-la.
+        """
+        frozen = TfidfIntentClassifier(self.min_score)
+        while True:
+            weights = self._refresh()
+            with self._lock:
+                if self._weights is not weights:
+                    continue  # partial_fit entre o cálculo e a cópia: recalcula
+                frozen.vocabulary = dict(self.vocabulary)
+                frozen.intents = list(self.intents)
+                frozen.intent_index = dict(self.intent_index)
+                frozen.n_docs = self.n_docs
+            frozen._weights = weights
+            return frozen
+
+    def _vectorize(self, messages: List[str]):
+        """Matriz esparsa (linhas, colunas, valores) das mensagens, com TF-IDF normalizado"""
+        rows, cols = [], []
+        for row, message in enumerate(messages):
+            for token in normalize_text(message):
+                col = self.vocabulary.get(token)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+        return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+    def classify_batch(self, messages: List[str]) -> List[Tuple[str, float]]:
+        """Classifica várias mensagens de uma vez: (intenção, similaridade) para cada uma"""
+        centroids, idf = self._refresh()
+        if not len(messages):
+            return []
+        if not len(self.intents) or not centroids.size:
+            return [('unknown', 0.0)] * len(messages)
+
+        rows, cols = self._vectorize(messages)
+
+        # Tokens repetidos na mensagem somam sua frequência (TF)
+        keys, tf = np.unique(rows * centroids.shape[1] + cols, return_counts=True)
+        rows, cols = keys // centroids.shape[1], keys % centroids.shape[1]
+        values = tf * idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(messages)))
+        values = values / norms[rows]
+
+        # Produto esparso: cada entrada (mensagem, termo) soma valor * coluna do centróide
+        scores = np.zeros((len(messages), len(self.intents)))
+        np.add.at(scores, rows, values[:, None] * centroids[:, cols].T)
+
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(messages)), best]
+        return [
+            (self.intents[i] if score > self.min_score else 'unknown', round(float(score), 4))
+            for i, score in zip(best.tolist(), best_scores.tolist())
+        ]
+
+    def classify(self, message: str) -> Tuple[str, float]:
+        return self.classify_batch([message])[0]
@@ -1,60 +1,89 @@
 import os
 import sys
+import threading
 from dotenv import load_dotenv
 
 # DON'T CHANGE THIS !!!
 # This line is for local development structure, it's safe to keep it.
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, current_app, send_from_directory, jsonify
 from flask_cors import CORS
 from src.models.user import db, User
+from src.models.schema_migration import SchemaMigration
 from src.models.property import Property
 from src.models.accommodation import Accommodation
 from src.models.guest import Guest
 from src.models.booking import Booking
+from src.models.ai_briefing import AIBriefing
+from src.models.scheduled_job import ScheduledJob
+from src.models.price_recommendation import PriceRecommendation
+from src.models.anomaly import MetricBaseline, AnomalyEvent
+from src.models.chatbot_conversation import ChatbotConversation
+from src.models.insight_snapshot import InsightSnapshot
 from src.routes.user import user_bp
 from src.routes.ai_routes import ai_bp
 from src.routes.property_routes import property_bp
 from src.routes.accommodation_routes import accommodation_bp
 from src.routes.guest_routes import guest_bp
 from src.routes.booking_routes import booking_bp
+from src.routes.analytics_routes import analytics_bp
+from src.routes.pricing_routes import pricing_bp
+from src.scheduler import job_scheduler
+from src.conversation_log import conversation_log
+from src.cli import db_cli
 
 # Load environment variables from .env file for local development
 load_dotenv()
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT') # Good practice to use env var for secret key too
-
-# Enable CORS for all routes
-CORS(app)
-
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(ai_bp, url_prefix='/api')
-app.register_blueprint(property_bp, url_prefix='/api')
-app.register_blueprint(accommodation_bp, url_prefix='/api')
-app.register_blueprint(guest_bp, url_prefix='/api')
-app.register_blueprint(booking_bp, url_prefix='/api')
-
-### MUDANÇA 3: Configuração do Banco de Dados (Mais Robusta) ###
-database_uri = os.getenv('DATABASE_URL')
-
-# CRITICAL CHECK: Ensure the DATABASE_URL is provided.
-if not database_uri:
-    # This will print an error in the Render logs and stop the app gracefully.
-    raise ValueError("No DATABASE_URL set for the application. Please set the environment variable.")
-
-# SQLAlchemy prefers 'postgresql://' over 'postgres://'
-if database_uri.startswith("postgres://"):
-    database_uri = database_uri.replace("postgres://", "postgresql://", 1)
-
-app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+def create_app():
+    """
+    Monta a aplicação: configuração, blueprints e comandos da CLI. Não acessa o banco nem
+    inicia threads; esquema e dados iniciais vêm de `flask --app src.main db init` e as
+    threads de segundo plano de start_background_services.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT') # Good practice to use env var for secret key too
+
+    # Enable CORS for all routes
+    CORS(app)
+
+    # Register blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(ai_bp, url_prefix='/api')
+    app.register_blueprint(property_bp, url_prefix='/api')
+    app.register_blueprint(accommodation_bp, url_prefix='/api')
+    app.register_blueprint(guest_bp, url_prefix='/api')
+    app.register_blueprint(booking_bp, url_prefix='/api')
+    app.register_blueprint(analytics_bp, url_prefix='/api')
+    app.register_blueprint(pricing_bp, url_prefix='/api')
+
+    ### MUDANÇA 3: Configuração do Banco de Dados (Mais Robusta) ###
+    database_uri = os.getenv('DATABASE_URL')
+
+    # CRITICAL CHECK: Ensure the DATABASE_URL is provided.
+    if not database_uri:
+        # This will print an error in the Render logs and stop the app gracefully.
+        raise ValueError("No DATABASE_URL set for the application. Please set the environment variable.")
+
+    # SQLAlchemy prefers 'postgresql://' over 'postgres://'
+    if database_uri.startswith("postgres://"):
+        database_uri = database_uri.replace("postgres://", "postgresql://", 1)
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    app.add_url_rule('/api/dashboard/stats', view_func=dashboard_stats)
+    app.add_url_rule('/', defaults={'path': ''}, view_func=serve)
+    app.add_url_rule('/<path:path>', view_func=serve)
+
+    # Migrações e dados iniciais: flask --app src.main db upgrade | seed | init | version
+    app.cli.add_command(db_cli)
+
+    return app
 
 # Dashboard stats endpoint
-@app.route('/api/dashboard/stats')
 def dashboard_stats():
     """Endpoint para estatísticas do dashboard"""
     try:
@@ -101,10 +130,8 @@ def dashboard_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
+    static_folder_path = current_app.static_folder
     if static_folder_path is None:
             return "Static folder not configured", 404
 
@@ -117,30 +144,49 @@ def serve(path):
         else:
             return "index.html not found", 404
 
-# Create tables and sample data within the app context
-with app.app_context():
-    db.create_all()
-
-    # Create default user if not exists
-    if not User.query.first():
-        default_user = User(
-            name='Demo User',
-            email='demo@hostflow.com'
-        )
-        default_user.set_password('123456')
-        db.session.add(default_user)
-        db.session.commit()
-        print("✅ Default user created")
-
-    # Create sample data if tables are empty
-    if not Property.query.first():
-        try:
-            from src.seed_data import create_sample_data
-            create_sample_data()
-        except Exception as e:
-            print(f"⚠️  Error creating sample data: {e}")
+# Chatbot e InsightAI são criados no primeiro uso; o aquecimento em segundo plano carrega
+# os modelos logo após o boot sem atrasar o momento em que o worker começa a atender
+def warm_up_ai_modules():
+    try:
+        from src.ai_agent import get_insight_ai
+        from src.chatbot_trainer import get_chatbot_trainer
+        get_chatbot_trainer()
+        get_insight_ai()
+    except Exception as e:
+        print(f"Erro ao aquecer os módulos de IA: {e}")
+
+def start_background_services(app):
+    """Threads de segundo plano do processo que atende requisições"""
+    # Módulos dos jobs (NumPy) importados junto com o registro: create_app não depende deles
+    from src.insight_data import insight_data_store
+    from src.churn_scoring import churn_scorer
+    from src.daily_briefing import generate_daily_briefings
+    from src.pricing import pricing_recommender
+    from src.chatbot_trainer import get_chatbot_trainer
+    from src.anomaly_detection import anomaly_detector
+
+    # Snapshot analítico do InsightAI, atualizado em segundo plano
+    insight_data_store.init_app(app)
+
+    # Conversas do chatbot gravadas em lote por uma thread de fundo
+    conversation_log.init_app(app)
+
+    # Jobs diários: uma única execução por dia entre todos os workers
+    job_scheduler.register('churn_scoring', churn_scorer.run)
+    job_scheduler.register('pricing_recommendations', pricing_recommender.run)
+    job_scheduler.register('daily_briefings', generate_daily_briefings)
+    job_scheduler.register('chatbot_conversations', lambda today: get_chatbot_trainer().train_from_conversations(today))
+    # Fecha as horas sem reservas para que quedas nas contagens por hora também sejam detectadas
+    job_scheduler.register('anomaly_hours', lambda today: anomaly_detector.close_elapsed_hours(), every_minutes=10)
+    job_scheduler.init_app(app)
+
+    if os.getenv('AI_WARMUP', 'true').lower() == 'true':
+        threading.Thread(target=warm_up_ai_modules, name='ai-warmup', daemon=True).start()
+
+app = create_app()
 
 # This part is for local development and will be ignored by Gunicorn on Render
 if __name__ == '__main__':
+    start_background_services(app)
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,80 @@
+"""
+Migrações versionadas do banco de dados - HostFlow
+Executadas uma vez por deploy pela CLI (flask --app src.main db upgrade), nunca pelos workers
+"""
+
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+
+from src.models.user import db
+# Todos os modelos precisam estar registrados no metadata antes do create_all
+from src.models import (property, accommodation, guest, booking, ai_briefing, scheduled_job,  # noqa: F401
+                        price_recommendation, anomaly, chatbot_conversation, insight_snapshot)
+from src.models.insight_snapshot import InsightSnapshot
+from src.models.schema_migration import SchemaMigration
+
+# Chave da trava de migração no Postgres (pg_advisory_xact_lock): só um deploy migra por vez
+MIGRATION_LOCK_ID = 725001
+
+
+def _baseline(conn):
+    """
+    Esquema atual completo. Em bancos criados antes das migrações (create_all a cada boot),
+    cria só as tabelas que faltam e adiciona as colunas anuláveis novas, como o antigo
+    add_missing_columns do main.py.
+    """
+    db.metadata.create_all(conn)
+
+    inspector = inspect(conn)
+    for table in db.metadata.sorted_tables:
+        existing = {col['name'] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_sql = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column_sql}')
+                print(f"✅ Column {table.name}.{column.name} added")
+
+
+def _insight_snapshots(conn):
+    """Snapshot do InsightAI compartilhado entre os workers"""
+    InsightSnapshot.__table__.create(conn, checkfirst=True)
+
+
+# (versão, descrição, função que recebe a conexão); novas migrações entram no fim, com versão maior
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, 'Esquema inicial (tabelas e colunas existentes até aqui)', _baseline),
+    (2, 'Tabela insight_snapshots (snapshot do InsightAI compartilhado)', _insight_snapshots),
+]
+
+
+def current_version() -> int:
+    """Maior versão aplicada; 0 num banco sem migrações (requer contexto de aplicação)"""
+    if not inspect(db.engine).has_table(SchemaMigration.__tablename__):
+        return 0
+    return db.session.query(db.func.max(SchemaMigration.version)).scalar() or 0
+
+
+def upgrade(target: Optional[int] = None) -> List[int]:
+    """
+    Aplica, numa única transação, as migrações pendentes até `target` (todas, por padrão).
+    Retorna as versões aplicadas. Requer contexto de aplicação.
+    """
+    applied = []
+    with db.engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            conn.exec_driver_sql(f'SELECT pg_advisory_xact_lock({MIGRATION_LOCK_ID})')
+        SchemaMigration.__table__.create(conn, checkfirst=True)
+        done = set(conn.execute(db.select(SchemaMigration.version)).scalars())
+
+        for version, description, migrate in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            migrate(conn)
+            conn.execute(db.insert(SchemaMigration).values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+            applied.append(version)
+    return applied
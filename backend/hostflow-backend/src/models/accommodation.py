@@ -1,6 +1,19 @@
 from datetime import datetime
 from src.models.user import db
 
+
+def nightly_price(day, base_price, weekend_price=None, applied_price=None):
+    """
+    Preço de uma noite a partir das colunas da acomodação: o preço dinâmico aplicado
+    (src/pricing.py) quando houver, senão o de fim de semana (sábado/domingo) ou o base.
+    Usada por Accommodation.get_price_for_date e pelas consultas em lote do chatbot.
+    """
+    if applied_price is not None:
+        return float(applied_price)
+    if day.weekday() >= 5 and weekend_price:  # 5=sábado, 6=domingo
+        return float(weekend_price)
+    return float(base_price)
+
 class Accommodation(db.Model):
     """Modelo para Acomodações (Quartos, Suítes, Chalés)"""
     __tablename__ = 'accommodations'
@@ -78,12 +91,22 @@ class Accommodation(db.Model):
             'property_name': self.property.name if self.property else None
         }
     
+    def get_applied_prices(self):
+        """Preços dinâmicos aplicados a noites futuras ({data: preço}), carregados uma vez por instância"""
+        if getattr(self, '_applied_prices', None) is None:
+            from datetime import date as date_type
+            from .price_recommendation import PriceRecommendation
+            rows = db.session.query(PriceRecommendation.stay_date, PriceRecommendation.applied_price).filter(
+                PriceRecommendation.accommodation_id == self.id,
+                PriceRecommendation.applied_price != None,
+                PriceRecommendation.stay_date >= date_type.today()
+            ).all()
+            self._applied_prices = {stay_date: float(price) for stay_date, price in rows}
+        return self._applied_prices
+    
     def get_price_for_date(self, date):
         """Retorna o preço para uma data específica"""
-        # Lógica simples: weekend = sábado/domingo
-        if date.weekday() >= 5:  # 5=sábado, 6=domingo
-            return float(self.weekend_price) if self.weekend_price else float(self.base_price)
-        return float(self.base_price)
+        return nightly_price(date, self.base_price, self.weekend_price, self.get_applied_prices().get(date))
     
     def is_available_for_period(self, check_in, check_out):
         """Verifica se está disponível para um período"""
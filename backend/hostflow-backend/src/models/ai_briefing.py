@@ -0,0 +1,34 @@
+import json
+from datetime import datetime
+from src.models.user import db
+
+class AIBriefing(db.Model):
+    """Briefing diário e insights do InsightAI pré-calculados pelo agendador"""
+    __tablename__ = 'ai_briefings'
+    __table_args__ = (
+        db.Index('ix_ai_briefings_property_date', 'property_id', 'briefing_date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'))  # None = portfólio completo
+    briefing_date = db.Column(db.Date, nullable=False)
+    generated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    data_version = db.Column(db.Integer)
+    
+    # Resultados do agente serializados em JSON
+    briefing = db.Column(db.Text, nullable=False)
+    insights = db.Column(db.Text, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'property_id': self.property_id,
+            'briefing_date': self.briefing_date.isoformat() if self.briefing_date else None,
+            'generated_at': self.generated_at.isoformat() if self.generated_at else None,
+            'data_version': self.data_version,
+            'briefing': json.loads(self.briefing),
+            'insights': json.loads(self.insights)
+        }
+    
+    def __repr__(self):
+        return f'<AIBriefing {self.property_id} {self.briefing_date}>'
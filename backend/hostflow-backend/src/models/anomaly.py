@@ -0,0 +1,70 @@
+from datetime import datetime
+from src.models.user import db
+
+class MetricBaseline(db.Model):
+    """Estatísticas móveis (EWMA) de uma métrica de reservas por pousada"""
+    __tablename__ = 'metric_baselines'
+    
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), primary_key=True)
+    metric = db.Column(db.String(50), primary_key=True)  # bookings_per_hour, cancellations_per_hour, booking_amount
+    
+    # Média e variância exponencialmente ponderadas
+    mean = db.Column(db.Float, nullable=False, default=0.0)
+    variance = db.Column(db.Float, nullable=False, default=0.0)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Janela em aberto das métricas por hora
+    bucket_start = db.Column(db.DateTime)
+    bucket_value = db.Column(db.Float, nullable=False, default=0.0)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'property_id': self.property_id,
+            'metric': self.metric,
+            'mean': self.mean,
+            'std': self.variance ** 0.5 if self.variance else 0.0,
+            'samples': self.samples,
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'bucket_value': self.bucket_value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<MetricBaseline {self.property_id} {self.metric}>'
+
+
+class AnomalyEvent(db.Model):
+    """Anomalia detectada no fluxo de reservas"""
+    __tablename__ = 'anomaly_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False, index=True)
+    metric = db.Column(db.String(50), nullable=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'))
+    
+    value = db.Column(db.Float, nullable=False)
+    expected = db.Column(db.Float, nullable=False)
+    std = db.Column(db.Float, nullable=False)
+    z_score = db.Column(db.Float, nullable=False)
+    direction = db.Column(db.String(10), nullable=False)  # spike, drop
+    
+    detected_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'property_id': self.property_id,
+            'metric': self.metric,
+            'booking_id': self.booking_id,
+            'value': self.value,
+            'expected': round(self.expected, 2),
+            'std': round(self.std, 2),
+            'z_score': round(self.z_score, 2),
+            'direction': self.direction,
+            'detected_at': self.detected_at.isoformat() if self.detected_at else None
+        }
+    
+    def __repr__(self):
+        return f'<AnomalyEvent {self.property_id} {self.metric} {self.direction}>'
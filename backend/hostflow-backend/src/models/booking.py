@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, date
 from src.models.user import db
 
@@ -0,0 +1,28 @@
+from datetime import datetime
+from src.models.user import db
+
+class ChatbotConversation(db.Model):
+    """Troca registrada no /chatbot (mensagem e resposta), base do treino a partir de conversas"""
+    __tablename__ = 'chatbot_conversations'
+
+    id = db.Column(db.Integer, primary_key=True)
+    message = db.Column(db.Text, nullable=False)
+    intent = db.Column(db.String(100))
+    response = db.Column(db.Text)
+    confidence = db.Column(db.Float)
+    model_version = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'message': self.message,
+            'intent': self.intent,
+            'response': self.response,
+            'confidence': self.confidence,
+            'model_version': self.model_version,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<ChatbotConversation {self.id} {self.intent}>'
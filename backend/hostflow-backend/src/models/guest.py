@@ -48,6 +48,11 @@ class Guest(db.Model):
     rating = db.Column(db.Float, default=5.0)  # Avaliação média do hóspede
     notes = db.Column(db.Text)  # Notas internas sobre o hóspede
     
+    # Risco de churn (calculado em lote por src/churn_scoring.py)
+    churn_score = db.Column(db.Float)  # 0 = retorno provável, 1 = provavelmente perdido
+    churn_risk = db.Column(db.String(10), index=True)  # low, medium, high
+    churn_scored_at = db.Column(db.DateTime)
+    
     # Datas
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -96,6 +101,9 @@ class Guest(db.Model):
             'last_stay_date': self.last_stay_date.isoformat() if self.last_stay_date else None,
             'rating': self.rating,
             'notes': self.notes,
+            'churn_score': self.churn_score,
+            'churn_risk': self.churn_risk,
+            'churn_scored_at': self.churn_scored_at.isoformat() if self.churn_scored_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -0,0 +1,19 @@
+from datetime import datetime
+from src.models.user import db
+
+class InsightSnapshot(db.Model):
+    """Snapshot analítico do InsightAI calculado por um worker (com trava) e lido pelos demais"""
+    __tablename__ = 'insight_snapshots'
+
+    scope = db.Column(db.String(50), primary_key=True)  # 'portfolio'
+    version = db.Column(db.Integer, nullable=False)  # data_version publicado para todos os workers
+
+    # Resumo dos dados de origem: igual ao atual = nada a recalcular
+    data_key = db.Column(db.String(500))
+    built_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    checked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    payload = db.Column(db.Text, nullable=False)  # snapshot em JSON
+
+    def __repr__(self):
+        return f'<InsightSnapshot {self.scope} v{self.version}>'
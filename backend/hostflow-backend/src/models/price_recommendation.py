@@ -0,0 +1,50 @@
+from datetime import datetime
+from src.models.user import db
+
+class PriceRecommendation(db.Model):
+    """Sugestão de preço por acomodação e noite, recalculada pelo job noturno de precificação"""
+    __tablename__ = 'price_recommendations'
+    __table_args__ = (
+        db.UniqueConstraint('accommodation_id', 'stay_date', name='uq_price_recommendations_accommodation_date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False, index=True)
+    accommodation_id = db.Column(db.Integer, db.ForeignKey('accommodations.id'), nullable=False)
+    stay_date = db.Column(db.Date, nullable=False)
+    
+    # Preço atual (base/fim de semana) e sugestão
+    current_price = db.Column(db.Numeric(10, 2), nullable=False)
+    suggested_price = db.Column(db.Numeric(10, 2), nullable=False)
+    multiplier = db.Column(db.Float, nullable=False)
+    
+    # Ritmo de reservas da pousada para a noite (0-1)
+    otb_occupancy = db.Column(db.Float)  # já reservada hoje
+    pace_occupancy = db.Column(db.Float)  # histórica com a mesma antecedência
+    projected_occupancy = db.Column(db.Float)
+    
+    # Preço aplicado (usado por Accommodation.get_price_for_date)
+    applied_price = db.Column(db.Numeric(10, 2))
+    applied_at = db.Column(db.DateTime)
+    
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'property_id': self.property_id,
+            'accommodation_id': self.accommodation_id,
+            'stay_date': self.stay_date.isoformat() if self.stay_date else None,
+            'current_price': float(self.current_price) if self.current_price is not None else None,
+            'suggested_price': float(self.suggested_price) if self.suggested_price is not None else None,
+            'multiplier': self.multiplier,
+            'otb_occupancy': self.otb_occupancy,
+            'pace_occupancy': self.pace_occupancy,
+            'projected_occupancy': self.projected_occupancy,
+            'applied_price': float(self.applied_price) if self.applied_price is not None else None,
+            'applied_at': self.applied_at.isoformat() if self.applied_at else None,
+            'generated_at': self.generated_at.isoformat() if self.generated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<PriceRecommendation {self.accommodation_id} {self.stay_date}>'
@@ -0,0 +1,34 @@
+from datetime import datetime
+from src.models.user import db
+
+class ScheduledJob(db.Model):
+    """Estado e trava (lease) dos jobs do agendador, compartilhados entre os workers"""
+    __tablename__ = 'scheduled_jobs'
+    
+    name = db.Column(db.String(100), primary_key=True)
+    
+    # Trava: o worker em locked_by executa o job até locked_until
+    locked_by = db.Column(db.String(100))
+    locked_until = db.Column(db.DateTime)
+    
+    # Última execução
+    last_run_at = db.Column(db.DateTime)
+    last_status = db.Column(db.String(20))  # success, error
+    last_error = db.Column(db.Text)
+    last_seconds = db.Column(db.Float)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'locked_by': self.locked_by,
+            'locked_until': self.locked_until.isoformat() if self.locked_until else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_status': self.last_status,
+            'last_error': self.last_error,
+            'last_seconds': self.last_seconds
+        }
+    
+    def __repr__(self):
+        return f'<ScheduledJob {self.name}>'
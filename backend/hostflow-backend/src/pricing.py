@@ -0,0 +1,255 @@
+"""
+Recomendação de preços dinâmicos - HostFlow
+Compara o ritmo de reservas (pace) de cada noite futura com o ritmo histórico da pousada
+"""
+
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+HORIZON_DAYS = 180  # noites futuras com sugestão de preço
+LOOKBACK_DAYS = 365  # noites passadas usadas para a curva de pace histórica
+SENSITIVITY = 0.5  # +10 p.p. de ocupação projetada acima do histórico => +5% no preço
+MIN_MULTIPLIER = 0.8
+MAX_MULTIPLIER = 1.3
+INSERT_BATCH_SIZE = 5000
+
+
+def load_pricing_inputs(today: date, horizon: int = HORIZON_DAYS,
+                        lookback: int = LOOKBACK_DAYS) -> Dict[str, np.ndarray]:
+    """
+    Acomodações ativas e reservas convertidas que tocam a janela [today - lookback, today + horizon),
+    em duas consultas. Requer contexto de aplicação.
+    """
+    from src.models.user import db
+    from src.models.accommodation import Accommodation
+    from src.models.booking import Booking
+    from src.analytics import REVENUE_STATUSES
+
+    accommodations = db.session.execute(
+        db.select(
+            Accommodation.id, Accommodation.property_id, Accommodation.base_price, Accommodation.weekend_price
+        ).where(Accommodation.is_active == True).order_by(Accommodation.id)
+    ).all()
+
+    bookings = db.session.execute(
+        db.select(
+            Booking.accommodation_id, Booking.check_in_date, Booking.check_out_date, Booking.created_at
+        ).where(
+            Booking.status.in_(REVENUE_STATUSES),
+            Booking.check_out_date > today - timedelta(days=lookback),
+            Booking.check_in_date < today + timedelta(days=horizon)
+        )
+    ).all()
+
+    return {
+        'accommodation_ids': np.array([a[0] for a in accommodations], dtype=np.int64),
+        'property_ids': np.array([a[1] for a in accommodations], dtype=np.int64),
+        'base_price': np.array([float(a[2] or 0) for a in accommodations]),
+        'weekend_price': np.array([float(a[3]) if a[3] else np.nan for a in accommodations]),
+        'booking_accommodation': np.array([b[0] for b in bookings], dtype=np.int64),
+        'check_in': np.array([b[1] for b in bookings], dtype='datetime64[D]'),
+        'check_out': np.array([b[2] for b in bookings], dtype='datetime64[D]'),
+        'created': np.array([(b[3] or datetime.combine(b[1], datetime.min.time())).date() for b in bookings],
+                            dtype='datetime64[D]')
+    }
+
+
+def expand_nights(check_in: np.ndarray, check_out: np.ndarray):
+    """Uma linha por noite de cada reserva: (índice da reserva, noite)"""
+    lengths = np.maximum((check_out - check_in).astype(np.int64), 0)
+    booking_idx = np.repeat(np.arange(len(lengths)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return booking_idx, check_in[booking_idx] + offsets
+
+
+def compute_price_recommendations(inputs: Dict[str, np.ndarray], today: date,
+                                  horizon: int = HORIZON_DAYS, lookback: int = LOOKBACK_DAYS) -> Dict[str, np.ndarray]:
+    """
+    Sugestão de preço por (acomodação, noite futura), totalmente vetorizada.
+
+    Para cada pousada, dia da semana e antecedência L, a curva histórica é a ocupação que as
+    noites passadas já tinham L dias antes. A ocupação projetada de uma noite futura é a ocupação
+    já reservada (on the books) mais o pickup histórico restante a partir da mesma antecedência;
+    o multiplicador de preço cresce com a diferença entre a projeção e a ocupação final histórica.
+    """
+    today64 = np.datetime64(today, 'D')
+    property_ids, acc_property = np.unique(inputs['property_ids'], return_inverse=True)
+    n_props, n_accs = len(property_ids), len(inputs['accommodation_ids'])
+    units = np.bincount(acc_property, minlength=n_props).astype(float)
+
+    # Reserva -> índice da acomodação (reservas de acomodações inativas são descartadas)
+    booking_acc = np.full(len(inputs['booking_accommodation']), -1)
+    if n_accs:
+        order = np.argsort(inputs['accommodation_ids'])
+        pos = np.minimum(np.searchsorted(inputs['accommodation_ids'], inputs['booking_accommodation'], sorter=order),
+                         n_accs - 1)
+        known = inputs['accommodation_ids'][order[pos]] == inputs['booking_accommodation']
+        booking_acc[known] = order[pos[known]]
+
+    booking_idx, nights = expand_nights(inputs['check_in'], inputs['check_out'])
+    night_acc = booking_acc[booking_idx]
+    valid = night_acc >= 0
+    night_acc, nights, booking_idx = night_acc[valid], nights[valid], booking_idx[valid]
+    night_prop = acc_property[night_acc]
+    lead = np.clip((nights - inputs['created'][booking_idx]).astype(np.int64), 0, horizon)
+    offset = (nights - today64).astype(np.int64)
+    weekday = (nights.astype(np.int64) + 3) % 7  # 1970-01-01 foi quinta-feira; 0 = segunda
+
+    # Curva histórica: noites-quarto reservadas com antecedência >= L, por pousada e dia da semana
+    past = (offset < 0) & (offset >= -lookback)
+    counts = np.zeros((n_props, 7, horizon + 1))
+    np.add.at(counts, (night_prop[past], weekday[past], lead[past]), 1)
+    booked_by_lead = np.cumsum(counts[:, :, ::-1], axis=2)[:, :, ::-1]
+    past_days = np.arange(-lookback, 0) + today64
+    nights_per_weekday = np.bincount((past_days.astype(np.int64) + 3) % 7, minlength=7).astype(float)
+    capacity = units[:, None] * nights_per_weekday[None, :]
+    pace = np.divide(booked_by_lead, capacity[:, :, None], out=np.zeros_like(booked_by_lead),
+                     where=capacity[:, :, None] > 0)
+    final = pace[:, :, 0]
+
+    # On the books: ocupação já reservada de cada noite futura
+    future = (offset >= 0) & (offset < horizon)
+    otb_counts = np.zeros((n_props, horizon))
+    np.add.at(otb_counts, (night_prop[future], offset[future]), 1)
+    otb = np.divide(otb_counts, units[:, None], out=np.zeros_like(otb_counts), where=units[:, None] > 0)
+    booked = np.zeros((n_accs, horizon), dtype=bool)
+    booked[night_acc[future], offset[future]] = True
+
+    future_days = today64 + np.arange(horizon)
+    future_weekday = (future_days.astype(np.int64) + 3) % 7
+    leads = np.arange(horizon)
+    pace_now = pace[:, future_weekday, leads]
+    final_future = final[:, future_weekday]
+    projected = np.clip(otb + final_future - pace_now, 0, 1)
+    multiplier = np.clip(1 + SENSITIVITY * (projected - final_future), MIN_MULTIPLIER, MAX_MULTIPLIER)
+
+    # Preço atual: regra de nightly_price (src/models/accommodation.py) vetorizada, sem o preço aplicado
+    weekend = future_weekday >= 5
+    weekend_price = np.where(np.isnan(inputs['weekend_price']), inputs['base_price'], inputs['weekend_price'])
+    current = np.where(weekend[None, :], weekend_price[:, None], inputs['base_price'][:, None])
+    suggested = np.round(current * multiplier[acc_property])
+
+    return {
+        'accommodation_ids': inputs['accommodation_ids'],
+        'property_ids': inputs['property_ids'],
+        'dates': future_days,
+        'current_price': current,
+        'suggested_price': suggested,
+        'multiplier': multiplier[acc_property],
+        'otb_occupancy': otb[acc_property],
+        'pace_occupancy': pace_now[acc_property],
+        'projected_occupancy': projected[acc_property],
+        'booked': booked
+    }
+
+
+class PricingRecommender:
+    """
+    Job noturno que recalcula as sugestões de preço de todas as acomodações e as grava em
+    price_recommendations. Preços aplicados (applied_price) são preservados entre execuções e
+    usados por Accommodation.get_price_for_date.
+    """
+
+    def __init__(self, horizon: int = HORIZON_DAYS, lookback: int = LOOKBACK_DAYS):
+        self.horizon = horizon
+        self.lookback = lookback
+        self.last_result: Dict[str, Any] = {}
+
+    def run(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Recalcula e grava as sugestões (requer contexto de aplicação)"""
+        from src.models.user import db
+        from src.models.price_recommendation import PriceRecommendation
+
+        started = time.perf_counter()
+        today = today or date.today()
+        result = compute_price_recommendations(load_pricing_inputs(today, self.horizon, self.lookback),
+                                               today, self.horizon, self.lookback)
+
+        # Preços já aplicados continuam valendo após a nova sugestão
+        applied = dict(
+            ((accommodation_id, stay_date), (price, applied_at))
+            for accommodation_id, stay_date, price, applied_at in db.session.execute(
+                db.select(PriceRecommendation.accommodation_id, PriceRecommendation.stay_date,
+                          PriceRecommendation.applied_price, PriceRecommendation.applied_at)
+                .where(PriceRecommendation.applied_price != None, PriceRecommendation.stay_date >= today)
+            )
+        )
+
+        # Apenas noites ainda livres; colunas convertidas de uma vez com tolist()
+        open_nights = ~result['booked']
+        acc_idx, day_idx = np.nonzero(open_nights)
+        columns = {
+            'property_id': result['property_ids'][acc_idx].tolist(),
+            'accommodation_id': result['accommodation_ids'][acc_idx].tolist(),
+            'stay_date': result['dates'][day_idx].astype(object).tolist(),
+            'current_price': result['current_price'][open_nights].tolist(),
+            'suggested_price': result['suggested_price'][open_nights].tolist(),
+            'multiplier': np.round(result['multiplier'][open_nights], 4).tolist(),
+            'otb_occupancy': np.round(result['otb_occupancy'][open_nights], 4).tolist(),
+            'pace_occupancy': np.round(result['pace_occupancy'][open_nights], 4).tolist(),
+            'projected_occupancy': np.round(result['projected_occupancy'][open_nights], 4).tolist()
+        }
+        generated_at = datetime.utcnow()
+        rows = []
+        for values in zip(*columns.values()):
+            row = dict(zip(columns, values))
+            row['applied_price'], row['applied_at'] = applied.get((row['accommodation_id'], row['stay_date']),
+                                                                  (None, None))
+            row['generated_at'] = generated_at
+            rows.append(row)
+
+        db.session.execute(db.delete(PriceRecommendation))
+        for offset in range(0, len(rows), INSERT_BATCH_SIZE):
+            db.session.execute(db.insert(PriceRecommendation), rows[offset:offset + INSERT_BATCH_SIZE])
+        db.session.commit()
+
+        multipliers = result['multiplier'][open_nights]
+        self.last_result = {
+            'recommendations': len(rows),
+            'accommodations': int(len(result['accommodation_ids'])),
+            'increases': int((multipliers > 1.001).sum()),
+            'decreases': int((multipliers < 0.999).sum()),
+            'generated_at': generated_at.isoformat(),
+            'seconds': round(time.perf_counter() - started, 4)
+        }
+        return self.last_result
+
+
+def get_pricing_summary(property_id: Optional[int] = None, days: int = 30) -> Dict[str, Any]:
+    """Resumo das sugestões dos próximos `days` dias, em uma consulta agregada (usado pelo InsightAI)"""
+    from sqlalchemy import func, case
+    from src.models.user import db
+    from src.models.price_recommendation import PriceRecommendation
+
+    today = date.today()
+    query = db.select(
+        func.count(PriceRecommendation.id),
+        func.sum(case((PriceRecommendation.multiplier > 1.001, 1), else_=0)),
+        func.sum(case((PriceRecommendation.multiplier < 0.999, 1), else_=0)),
+        func.avg(PriceRecommendation.multiplier),
+        func.sum(PriceRecommendation.suggested_price - PriceRecommendation.current_price),
+        func.sum(case((PriceRecommendation.applied_price != None, 1), else_=0))
+    ).where(
+        PriceRecommendation.stay_date >= today,
+        PriceRecommendation.stay_date < today + timedelta(days=days)
+    )
+    if property_id:
+        query = query.where(PriceRecommendation.property_id == property_id)
+
+    nights, increases, decreases, avg_multiplier, delta, applied = db.session.execute(query).one()
+    return {
+        'days': days,
+        'open_nights': int(nights or 0),
+        'increases': int(increases or 0),
+        'decreases': int(decreases or 0),
+        'avg_change': round(float(avg_multiplier) - 1, 4) if avg_multiplier else 0.0,
+        'revenue_delta': round(float(delta or 0), 2),
+        'applied': int(applied or 0)
+    }
+
+
+# Instância global do recomendador
+pricing_recommender = PricingRecommender()
@@ -1,12 +1,23 @@
-from flask import Blueprint, jsonify, request
-from src.ai_agent import insight_ai
-from src.chatbot_trainer import chatbot_trainer
+import json
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
+from src.chatbot_availability import availability_lookup
+from src.chatbot_retrain import chatbot_retrainer
+from src.conversation_log import conversation_log
+from src.models.property import Property
+from src.scheduler import job_scheduler
+from src.anomaly_detection import get_recent_anomalies
+
+# Módulos de IA e análise (NumPy, modelos) são importados dentro das views: o boot do
+# worker e a CLI não os carregam, e o primeiro uso (ou o aquecimento) paga a importação
 
 ai_bp = Blueprint('ai', __name__)
 
 @ai_bp.route('/agent/info', methods=['GET'])
 def get_agent_info():
     """Retorna informações sobre o agente de IA"""
+    from src.ai_agent import get_insight_ai
+
+    insight_ai = get_insight_ai()
     return jsonify({
         'name': insight_ai.name,
         'personality': insight_ai.personality,
@@ -26,26 +37,86 @@ def get_agent_info():
 @ai_bp.route('/agent/analysis/complete', methods=['GET'])
 def get_complete_analysis():
     """Executa análise completa do agente de IA"""
+    from src.ai_agent import get_insight_ai
+
     try:
-        analysis = insight_ai.get_comprehensive_analysis()
+        analysis = get_insight_ai().get_comprehensive_analysis()
         return jsonify(analysis), 200
     except Exception as e:
         return jsonify({'error': f'Erro na análise: {str(e)}'}), 500
 
+# Resposta enquanto não há briefing gravado nem snapshot em memória
+WARMING_UP_ERROR = 'Dados do agente ainda em preparação. Tente novamente em instantes.'
+
+def _live_briefing_data(property_id):
+    """
+    Snapshot em memória para quando ainda não há briefing gravado (antes da primeira
+    execução do job). Nunca consulta o banco na requisição: sem snapshot pronto (ou
+    para uma pousada específica, cujo snapshot só o job calcula), retorna None.
+    """
+    from src.insight_data import insight_data_store
+
+    if property_id is not None:
+        return None
+    snapshot = insight_data_store.get_snapshot()
+    if not snapshot['data_version']:
+        insight_data_store.request_refresh()  # antecipa a primeira atualização em segundo plano
+        return None
+    return snapshot
+
 @ai_bp.route('/agent/briefing/daily', methods=['GET'])
 def get_daily_briefing():
-    """Retorna briefing diário do agente"""
+    """Retorna briefing diário do agente (pré-calculado pelo agendador)"""
+    from src.ai_agent import get_insight_ai
+    from src.daily_briefing import get_stored_briefing
+
     try:
-        briefing = insight_ai.get_daily_briefing()
+        property_id = request.args.get('property_id', type=int)
+        if property_id is not None and not Property.query.get(property_id):
+            return jsonify({'error': 'Pousada não encontrada'}), 404
+
+        stored = get_stored_briefing(property_id)
+        if stored is not None:
+            briefing = stored.to_dict()['briefing']
+            briefing['generated_at'] = stored.generated_at.isoformat()
+            briefing['source'] = 'scheduled'
+        else:
+            data = _live_briefing_data(property_id)
+            if data is None:
+                return jsonify({'error': WARMING_UP_ERROR}), 503
+            briefing = get_insight_ai().get_daily_briefing(data)
+            briefing['generated_at'] = None
+            briefing['source'] = 'live'
         return jsonify(briefing), 200
     except Exception as e:
         return jsonify({'error': f'Erro no briefing: {str(e)}'}), 500
 
+@ai_bp.route('/agent/briefing/generate', methods=['POST'])
+def generate_daily_briefing():
+    """Gera imediatamente os briefings do dia (mesma trava do job agendado)"""
+    try:
+        result = job_scheduler.run_now('daily_briefings')
+        return jsonify(result), 200 if result['status'] == 'success' else 500
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': f'Erro ao gerar briefings: {str(e)}'}), 500
+
+@ai_bp.route('/agent/scheduler/jobs', methods=['GET'])
+def get_scheduler_jobs():
+    """Retorna o estado dos jobs agendados"""
+    try:
+        return jsonify({'worker_id': job_scheduler.worker_id, 'jobs': job_scheduler.get_status()}), 200
+    except Exception as e:
+        return jsonify({'error': f'Erro ao consultar jobs: {str(e)}'}), 500
+
 @ai_bp.route('/agent/data/collection', methods=['GET'])
 def get_data_collection():
     """Executa coleta e processamento de dados"""
+    from src.ai_agent import get_insight_ai
+
     try:
-        result = insight_ai.collect_and_process_data()
+        result = get_insight_ai().collect_and_process_data()
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': f'Erro na coleta de dados: {str(e)}'}), 500
@@ -53,8 +124,10 @@ def get_data_collection():
 @ai_bp.route('/agent/analysis/commercial', methods=['GET'])
 def get_commercial_analysis():
     """Executa análise de desempenho comercial"""
+    from src.ai_agent import get_insight_ai
+
     try:
-        result = insight_ai.analyze_commercial_performance()
+        result = get_insight_ai().analyze_commercial_performance()
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': f'Erro na análise comercial: {str(e)}'}), 500
@@ -62,8 +135,10 @@ def get_commercial_analysis():
 @ai_bp.route('/agent/analysis/marketing', methods=['GET'])
 def get_marketing_analysis():
     """Executa análise de desempenho de marketing"""
+    from src.ai_agent import get_insight_ai
+
     try:
-        result = insight_ai.analyze_marketing_performance()
+        result = get_insight_ai().analyze_marketing_performance()
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': f'Erro na análise de marketing: {str(e)}'}), 500
@@ -71,26 +146,64 @@ def get_marketing_analysis():
 @ai_bp.route('/agent/predictions', methods=['GET'])
 def get_predictions():
     """Executa análises preditivas"""
+    from src.ai_agent import get_insight_ai
+
     try:
-        result = insight_ai.generate_predictive_analysis()
+        result = get_insight_ai().generate_predictive_analysis()
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': f'Erro nas previsões: {str(e)}'}), 500
 
 @ai_bp.route('/agent/insights', methods=['GET'])
 def get_insights():
-    """Retorna insights acionáveis"""
+    """Retorna insights acionáveis (pré-calculados pelo agendador)"""
+    from src.ai_agent import get_insight_ai
+    from src.daily_briefing import get_stored_briefing
+
     try:
-        insights = insight_ai.generate_actionable_insights()
+        property_id = request.args.get('property_id', type=int)
+        if property_id is not None and not Property.query.get(property_id):
+            return jsonify({'error': 'Pousada não encontrada'}), 404
+
+        stored = get_stored_briefing(property_id)
+        if stored is not None:
+            # Anomalias são detectadas em tempo real: substituem as gravadas no briefing
+            insights = [i for i in stored.to_dict()['insights'] if i['type'] != 'anomaly']
+            insights = get_insight_ai().build_anomaly_insights(get_recent_anomalies(property_id)) + insights
+            response = jsonify(insights)
+            response.headers['X-Generated-At'] = stored.generated_at.isoformat()
+            return response, 200
+
+        data = _live_briefing_data(property_id)
+        if data is None:
+            return jsonify({'error': WARMING_UP_ERROR}), 503
+        insights = get_insight_ai().generate_actionable_insights(data)
         return jsonify(insights), 200
     except Exception as e:
         return jsonify({'error': f'Erro nos insights: {str(e)}'}), 500
 
+@ai_bp.route('/agent/anomalies', methods=['GET'])
+def get_anomalies():
+    """Retorna as anomalias detectadas no fluxo de reservas"""
+    try:
+        property_id = request.args.get('property_id', type=int)
+        hours = request.args.get('hours', 24, type=int)
+        limit = request.args.get('limit', 50, type=int)
+        if hours < 1 or limit < 1:
+            return jsonify({'error': 'hours e limit devem ser positivos'}), 400
+
+        anomalies = get_recent_anomalies(property_id, hours, limit)
+        return jsonify({'hours': hours, 'total': len(anomalies), 'anomalies': anomalies}), 200
+    except Exception as e:
+        return jsonify({'error': f'Erro nas anomalias: {str(e)}'}), 500
+
 @ai_bp.route('/agent/reports', methods=['GET'])
 def get_reports():
     """Gera relatórios e visualizações"""
+    from src.ai_agent import get_insight_ai
+
     try:
-        result = insight_ai.generate_reports_and_visualization()
+        result = get_insight_ai().generate_reports_and_visualization()
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': f'Erro nos relatórios: {str(e)}'}), 500
@@ -98,29 +211,60 @@ def get_reports():
 @ai_bp.route('/agent/ltv-analysis', methods=['GET'])
 def get_ltv_analysis():
     """Executa análise de LTV e vendas proativas"""
+    from src.ai_agent import get_insight_ai
+
     try:
-        result = insight_ai.analyze_ltv_and_proactive_sales()
+        result = get_insight_ai().analyze_ltv_and_proactive_sales()
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': f'Erro na análise de LTV: {str(e)}'}), 500
 
+@ai_bp.route('/agent/ltv/cohorts', methods=['GET'])
+def get_ltv_cohorts():
+    """Retorna LTV, taxa de recompra e matrizes de coorte dos hóspedes"""
+    from src.guest_ltv import guest_ltv_engine
+
+    try:
+        return jsonify(guest_ltv_engine.get_snapshot()), 200
+    except Exception as e:
+        return jsonify({'error': f'Erro na análise de coortes: {str(e)}'}), 500
+
 @ai_bp.route("/chatbot", methods=["POST"])
 def chatbot_response():
     """Recebe uma mensagem do chatbot e retorna uma resposta usando o sistema de treinamento."""
+    from src.chatbot_trainer import get_chatbot_trainer
+
     data = request.get_json()
     user_message = data.get("message")
+    property_id = data.get("property_id")  # opcional: disponibilidade só desta pousada
 
     if not user_message:
         return jsonify({"error": "Mensagem não fornecida"}), 400
+    if property_id is not None and (not isinstance(property_id, int) or isinstance(property_id, bool)):
+        return jsonify({"error": "property_id deve ser um número inteiro"}), 400
 
     try:
         # Usar o sistema de treinamento para processar a mensagem
-        result = chatbot_trainer.process_message(user_message)
+        result = get_chatbot_trainer().process_message(user_message)
+        
+        # Pedidos com data (ex.: "tem disponibilidade para sábado?") são respondidos com os dados reais
+        availability = None
+        try:
+            data_answer = availability_lookup.answer(user_message, result["intent"], property_id=property_id)
+        except Exception as e:
+            data_answer = None
+            print(f"Erro ao consultar disponibilidade para o chatbot: {e}")
+        if data_answer:
+            result["response"] = data_answer["response"]
+            availability = data_answer["availability"]
+        conversation_log.record(user_message, result)
         
         return jsonify({
             "response": result["response"],
             "intent": result["intent"],
-            "confidence": result["confidence"]
+            "confidence": result["confidence"],
+            "model_version": result["model_version"],
+            "availability": availability
         }), 200
     except Exception as e:
         return jsonify({
@@ -128,9 +272,69 @@ def chatbot_response():
             "error": str(e)
         }), 500
 
+# Lotes até este tamanho voltam num único JSON; acima disso, em streaming (NDJSON, um resultado por linha)
+BATCH_STREAM_THRESHOLD = 1000
+MAX_BATCH_MESSAGES = 100000
+
+@ai_bp.route("/chatbot/batch", methods=["POST"])
+def chatbot_batch():
+    """
+    Classifica um lote de mensagens (ex.: histórico de WhatsApp e e-mail).
+    Aceita {"messages": ["...", ...]} ou {"messages": [{"id": ..., "message": "..."}, ...]}.
+    """
+    from src.chatbot_trainer import get_chatbot_trainer
+
+    data = request.get_json() or {}
+    items = data.get("messages")
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Lista de mensagens não fornecida"}), 400
+    if len(items) > MAX_BATCH_MESSAGES:
+        return jsonify({"error": f"Máximo de {MAX_BATCH_MESSAGES} mensagens por lote"}), 400
+
+    ids = [item.get("id") if isinstance(item, dict) else None for item in items]
+    messages = [item.get("message") if isinstance(item, dict) else item for item in items]
+    if not all(isinstance(message, str) for message in messages):
+        return jsonify({"error": "Cada mensagem deve ser um texto"}), 400
+
+    chatbot_trainer = get_chatbot_trainer()
+
+    def results():
+        for index, (message_id, result) in enumerate(zip(ids, chatbot_trainer.iter_batch(messages))):
+            row = {"index": index, **result}
+            if message_id is not None:
+                row["id"] = message_id
+            yield row
+
+    try:
+        if len(messages) <= BATCH_STREAM_THRESHOLD:
+            return jsonify({
+                "results": list(results()),
+                "count": len(messages),
+                "model_version": chatbot_trainer.model_version
+            }), 200
+
+        def stream():
+            # O status 200 já foi enviado: um erro no meio do lote vira a última linha do stream
+            try:
+                for row in results():
+                    yield json.dumps(row, ensure_ascii=False) + "\n"
+            except Exception as e:
+                yield json.dumps({"error": f"Erro ao classificar mensagens: {str(e)}"},
+                                 ensure_ascii=False) + "\n"
+
+        return Response(stream_with_context(stream()), mimetype="application/x-ndjson",
+                        headers={"X-Model-Version": str(chatbot_trainer.model_version)})
+    except Exception as e:
+        return jsonify({
+            "error": f"Erro ao classificar mensagens: {str(e)}"
+        }), 500
+
 @ai_bp.route("/chatbot/feedback", methods=["POST"])
 def chatbot_feedback():
     """Recebe feedback sobre uma resposta do chatbot para aprendizado por reforço."""
+    from src.chatbot_trainer import get_chatbot_trainer
+
     data = request.get_json()
     message = data.get("message")
     response = data.get("response")
@@ -141,7 +345,7 @@ def chatbot_feedback():
 
     try:
         # Adicionar feedback ao sistema de treinamento
-        chatbot_trainer.add_feedback(message, response, float(score))
+        get_chatbot_trainer().add_feedback(message, response, float(score))
         
         return jsonify({
             "message": "Feedback recebido com sucesso",
@@ -155,6 +359,8 @@ def chatbot_feedback():
 @ai_bp.route("/chatbot/train", methods=["POST"])
 def chatbot_train():
     """Adiciona um novo exemplo de treinamento ao chatbot."""
+    from src.chatbot_trainer import get_chatbot_trainer
+
     data = request.get_json()
     message = data.get("message")
     intent = data.get("intent")
@@ -165,7 +371,7 @@ def chatbot_train():
 
     try:
         # Adicionar exemplo de treinamento
-        chatbot_trainer.add_training_example(message, intent, response)
+        get_chatbot_trainer().add_training_example(message, intent, response)
         
         return jsonify({
             "message": "Exemplo de treinamento adicionado com sucesso",
@@ -179,8 +385,10 @@ def chatbot_train():
 @ai_bp.route("/chatbot/stats", methods=["GET"])
 def chatbot_stats():
     """Retorna estatísticas do treinamento do chatbot."""
+    from src.chatbot_trainer import get_chatbot_trainer
+
     try:
-        stats = chatbot_trainer.get_training_stats()
+        stats = get_chatbot_trainer().get_training_stats()
         return jsonify(stats), 200
     except Exception as e:
         return jsonify({
@@ -189,15 +397,30 @@ def chatbot_stats():
 
 @ai_bp.route("/chatbot/retrain", methods=["POST"])
 def chatbot_retrain():
-    """Força o retreinamento do chatbot com base no feedback."""
+    """Enfileira o retreinamento do chatbot (em outro processo) e retorna o job para acompanhamento."""
     try:
-        chatbot_trainer.retrain_from_feedback()
+        job_id = chatbot_retrainer.submit()
         return jsonify({
-            "message": "Retreinamento concluído com sucesso",
-            "status": "ok"
-        }), 200
+            "message": "Retreinamento iniciado",
+            "status": "queued",
+            "job_id": job_id,
+            "status_url": url_for("ai.chatbot_retrain_status", job_id=job_id)
+        }), 202
     except Exception as e:
         return jsonify({
             "error": f"Erro durante o retreinamento: {str(e)}"
         }), 500
 
+@ai_bp.route("/chatbot/retrain/<job_id>", methods=["GET"])
+def chatbot_retrain_status(job_id):
+    """Estado de um retreinamento: queued, running, success ou error."""
+    try:
+        job = chatbot_retrainer.get_status(job_id)
+        if job is None:
+            return jsonify({"error": "Job de retreinamento não encontrado"}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        return jsonify({
+            "error": f"Erro ao consultar retreinamento: {str(e)}"
+        }), 500
+
@@ -0,0 +1,110 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime, date, timedelta
+
+# src.analytics e src.forecasting (NumPy) são importados nas views: o boot do worker não os carrega
+
+analytics_bp = Blueprint('analytics', __name__)
+
+@analytics_bp.route('/analytics/timeseries', methods=['GET'])
+def get_timeseries():
+    """Série temporal de receita, ocupação, ADR ou RevPAR"""
+    from src.analytics import timeseries_analytics, METRICS, BUCKETS
+
+    try:
+        metric = request.args.get('metric', 'revenue')
+        bucket = request.args.get('bucket', 'month')
+        property_id = request.args.get('property_id', type=int)
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+
+        if metric not in METRICS:
+            return jsonify({'error': f'Métrica inválida. Use: {", ".join(METRICS)}'}), 400
+
+        if bucket not in BUCKETS:
+            return jsonify({'error': f'Período inválido. Use: {", ".join(BUCKETS)}'}), 400
+
+        # Período (padrão: últimos 12 meses)
+        try:
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else date.today()
+        except ValueError:
+            return jsonify({'error': 'Formato de end_date inválido. Use YYYY-MM-DD'}), 400
+
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else end_date_obj - timedelta(days=365)
+        except ValueError:
+            return jsonify({'error': 'Formato de start_date inválido. Use YYYY-MM-DD'}), 400
+
+        if start_date_obj > end_date_obj:
+            return jsonify({'error': 'start_date deve ser anterior a end_date'}), 400
+
+        series = timeseries_analytics.get_timeseries(
+            metric, bucket, start_date_obj, end_date_obj, property_id
+        )
+        return jsonify(series), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/portfolio/stats', methods=['GET'])
+def get_portfolio_stats():
+    """Estatísticas consolidadas de todas as pousadas"""
+    from src.analytics import portfolio_analytics, PORTFOLIO_SORT_FIELDS, PORTFOLIO_PERIODS
+
+    try:
+        period_days = request.args.get('period_days', 30, type=int)
+        sort = request.args.get('sort', 'monthly_revenue')
+        order = request.args.get('order', 'desc')
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+
+        if sort not in PORTFOLIO_SORT_FIELDS:
+            return jsonify({'error': f'Ordenação inválida. Use: {", ".join(PORTFOLIO_SORT_FIELDS)}'}), 400
+
+        if order not in ('asc', 'desc'):
+            return jsonify({'error': 'Ordem inválida. Use: asc, desc'}), 400
+
+        if period_days not in PORTFOLIO_PERIODS:
+            return jsonify({'error': f'period_days inválido. Use: {", ".join(map(str, PORTFOLIO_PERIODS))}'}), 400
+
+        if page < 1 or per_page < 1:
+            return jsonify({'error': 'page e per_page devem ser positivos'}), 400
+
+        stats = portfolio_analytics.get_page(period_days, sort, order, page, per_page)
+        return jsonify(stats), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/forecast', methods=['GET'])
+def get_forecast():
+    """Previsão diária de receita ou ocupação por pousada, com intervalo de previsão"""
+    from src.forecasting import seasonal_forecaster, FORECAST_METRICS, FORECAST_METHODS, Z_SCORES
+
+    try:
+        metric = request.args.get('metric', 'revenue')
+        method = request.args.get('method', 'holt_winters')
+        horizon = request.args.get('horizon', 30, type=int)
+        level = request.args.get('level', 80, type=int)
+        property_id = request.args.get('property_id', type=int)
+
+        if metric not in FORECAST_METRICS:
+            return jsonify({'error': f'Métrica inválida. Use: {", ".join(FORECAST_METRICS)}'}), 400
+
+        if method not in FORECAST_METHODS:
+            return jsonify({'error': f'Método inválido. Use: {", ".join(FORECAST_METHODS)}'}), 400
+
+        if level not in Z_SCORES:
+            return jsonify({'error': f'Nível de intervalo inválido. Use: {", ".join(map(str, Z_SCORES))}'}), 400
+
+        if not 1 <= horizon <= 180:
+            return jsonify({'error': 'horizon deve estar entre 1 e 180 dias'}), 400
+
+        if not seasonal_forecaster.is_fitted:
+            return jsonify({'error': 'Modelos de previsão ainda em treinamento. Tente novamente em instantes.'}), 503
+
+        try:
+            forecast = seasonal_forecaster.forecast(metric, horizon, property_id, method, level)
+        except KeyError:
+            return jsonify({'error': 'Pousada não encontrada'}), 404
+
+        return jsonify(forecast), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -3,6 +3,7 @@ from src.models.booking import Booking, db
 from src.models.accommodation import Accommodation
 from src.models.guest import Guest
 from src.models.property import Property
+from src.anomaly_detection import anomaly_detector
 from datetime import datetime, date
 import json
 
@@ -154,6 +155,7 @@ def create_booking():
         booking.calculate_total()
         
         db.session.add(booking)
+        anomaly_detector.record_booking(booking)
         db.session.commit()
         
         return jsonify(booking.to_dict()), 201
@@ -199,6 +201,7 @@ def cancel_booking(booking_id):
         reason = data.get('reason', 'Cancelamento solicitado')
         
         if booking.cancel(reason):
+            anomaly_detector.record_cancellation(booking)
             db.session.commit()
             return jsonify({
                 'message': 'Reserva cancelada com sucesso',
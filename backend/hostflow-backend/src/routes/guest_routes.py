@@ -12,6 +12,8 @@ def get_guests():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         search = request.args.get('search', '')
+        churn_risk = request.args.get('churn_risk')
+        sort = request.args.get('sort', 'updated_at')
         
         query = Guest.query.filter_by(is_active=True)
         
@@ -25,8 +27,15 @@ def get_guests():
                 )
             )
         
-        # Ordenar por último update
-        query = query.order_by(Guest.updated_at.desc())
+        # Filtrar por nível de risco de churn (low, medium, high)
+        if churn_risk:
+            query = query.filter_by(churn_risk=churn_risk)
+        
+        # Ordenar por risco de churn ou por último update
+        if sort == 'churn_score':
+            query = query.order_by(Guest.churn_score.desc().nullslast(), Guest.id)
+        else:
+            query = query.order_by(Guest.updated_at.desc())
         
         # Paginação
         guests = query.paginate(
@@ -284,3 +293,14 @@ def update_guest_stats(guest_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+
+@guest_bp.route('/guests/churn/score', methods=['POST'])
+def score_guests_churn():
+    """Recalcula o risco de churn de todos os hóspedes"""
+    try:
+        from src.churn_scoring import churn_scorer
+        result = churn_scorer.run()
+        return jsonify(result), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
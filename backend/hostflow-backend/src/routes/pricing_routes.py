@@ -0,0 +1,114 @@
+from flask import Blueprint, request, jsonify
+from src.models.user import db
+from src.models.price_recommendation import PriceRecommendation
+from src.scheduler import job_scheduler
+from datetime import datetime
+
+pricing_bp = Blueprint('pricing', __name__)
+
+def _filtered_recommendations(params):
+    """Aplica os filtros comuns (pousada, acomodação, período, variação mínima) à consulta"""
+    query = PriceRecommendation.query
+
+    if params.get('property_id'):
+        query = query.filter(PriceRecommendation.property_id == int(params['property_id']))
+
+    if params.get('accommodation_id'):
+        query = query.filter(PriceRecommendation.accommodation_id == int(params['accommodation_id']))
+
+    if params.get('start_date'):
+        query = query.filter(PriceRecommendation.stay_date >= datetime.strptime(params['start_date'], '%Y-%m-%d').date())
+
+    if params.get('end_date'):
+        query = query.filter(PriceRecommendation.stay_date <= datetime.strptime(params['end_date'], '%Y-%m-%d').date())
+
+    if params.get('min_change') is not None:
+        min_change = float(params['min_change'])
+        query = query.filter(db.or_(
+            PriceRecommendation.multiplier >= 1 + min_change,
+            PriceRecommendation.multiplier <= 1 - min_change
+        ))
+
+    return query
+
+@pricing_bp.route('/pricing/recommendations', methods=['GET'])
+def get_price_recommendations():
+    """Lista as sugestões de preço por acomodação e noite"""
+    from src.pricing import get_pricing_summary  # NumPy: importado só quando a rota é usada
+
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 200, type=int)
+
+        try:
+            query = _filtered_recommendations(request.args)
+        except ValueError:
+            return jsonify({'error': 'Filtros inválidos. Datas no formato YYYY-MM-DD'}), 400
+
+        recommendations = query.order_by(
+            PriceRecommendation.stay_date, PriceRecommendation.accommodation_id
+        ).paginate(page=page, per_page=per_page, error_out=False)
+
+        return jsonify({
+            'recommendations': [r.to_dict() for r in recommendations.items],
+            'summary': get_pricing_summary(request.args.get('property_id', type=int)),
+            'total': recommendations.total,
+            'pages': recommendations.pages,
+            'current_page': page,
+            'per_page': per_page
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@pricing_bp.route('/pricing/recommendations/apply', methods=['POST'])
+def apply_price_recommendations():
+    """Aplica as sugestões filtradas: passam a valer no cálculo de preço das reservas"""
+    try:
+        data = request.get_json() or {}
+        try:
+            query = _filtered_recommendations(data)
+        except ValueError:
+            return jsonify({'error': 'Filtros inválidos. Datas no formato YYYY-MM-DD'}), 400
+
+        applied = query.update({
+            PriceRecommendation.applied_price: PriceRecommendation.suggested_price,
+            PriceRecommendation.applied_at: datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+
+        return jsonify({'applied': applied}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@pricing_bp.route('/pricing/recommendations/revert', methods=['POST'])
+def revert_price_recommendations():
+    """Volta as noites filtradas ao preço base/fim de semana da acomodação"""
+    try:
+        data = request.get_json() or {}
+        try:
+            query = _filtered_recommendations(data)
+        except ValueError:
+            return jsonify({'error': 'Filtros inválidos. Datas no formato YYYY-MM-DD'}), 400
+
+        reverted = query.filter(PriceRecommendation.applied_price != None).update({
+            PriceRecommendation.applied_price: None,
+            PriceRecommendation.applied_at: None
+        }, synchronize_session=False)
+        db.session.commit()
+
+        return jsonify({'reverted': reverted}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@pricing_bp.route('/pricing/recommendations/generate', methods=['POST'])
+def generate_price_recommendations():
+    """Recalcula imediatamente as sugestões (mesma trava do job noturno)"""
+    try:
+        result = job_scheduler.run_now('pricing_recommendations')
+        return jsonify(result), 200 if result['status'] == 'success' else 500
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -201,35 +201,6 @@ def get_accommodations():
     
     return jsonify(accommodations), 200
 
-@user_bp.route('/guests', methods=['GET'])
-def get_guests():
-    # Simular dados de hóspedes
-    guests = [
-        {
-            'id': 1,
-            'name': 'Maria Silva',
-            'email': 'maria@email.com',
-            'phone': '(11) 99999-9999',
-            'document': '123.456.789-00'
-        },
-        {
-            'id': 2,
-            'name': 'João Santos',
-            'email': 'joao@email.com',
-            'phone': '(21) 88888-8888',
-            'document': '987.654.321-00'
-        },
-        {
-            'id': 3,
-            'name': 'Ana Costa',
-            'email': 'ana@email.com',
-            'phone': '(31) 77777-7777',
-            'document': '456.789.123-00'
-        }
-    ]
-    
-    return jsonify(guests), 200
-
 @user_bp.route('/bookings', methods=['GET'])
 def get_bookings():
     # Simular dados de reservas
@@ -0,0 +1,202 @@
+"""
+Agendador de jobs em processo - HostFlow
+Jobs diários (ou a cada N minutos) protegidos por uma trava no banco, para que apenas um worker os execute
+"""
+
+import os
+import socket
+import threading
+import time
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Any, Callable, Optional
+
+
+class JobScheduler:
+    """
+    Executa jobs diários em uma thread de segundo plano.
+
+    Cada worker do gunicorn tem sua própria instância, mas a execução é coordenada pela
+    tabela scheduled_jobs: um UPDATE condicional adquire a trava (lease) do job, e só o
+    worker que a obteve executa. O "já rodou hoje" também vem do banco (last_run_at),
+    então reinícios e novos workers não repetem o job no mesmo dia.
+    """
+
+    def __init__(self, tick_seconds: int = 60, lease_seconds: int = 1800, retry_seconds: int = 900):
+        self.tick_seconds = tick_seconds
+        self.lease_seconds = lease_seconds
+        self.retry_seconds = retry_seconds
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._app = None
+        self._thread = None
+        self._worker_id = None
+
+    @property
+    def worker_id(self) -> str:
+        # Calculado após o fork: cada worker tem o seu pid
+        if self._worker_id is None or not self._worker_id.endswith(f":{os.getpid()}"):
+            self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        return self._worker_id
+
+    def register(self, name: str, func: Callable[[date], Any], at_hour: int = 0,
+                 every_minutes: Optional[int] = None):
+        """
+        Registra um job diário; roda a partir de `at_hour` (hora local), na ordem de registro.
+        Com `every_minutes`, o job roda a cada N minutos em vez de uma vez por dia.
+        """
+        self._jobs[name] = {'func': func, 'at_hour': at_hour, 'every_minutes': every_minutes}
+
+    def init_app(self, app):
+        """Registra a aplicação e inicia a thread do agendador"""
+        self._app = app
+        self.start()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='job-scheduler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                with self._app.app_context():
+                    self.run_pending()
+            except Exception as e:
+                print(f"Erro no agendador de jobs: {e}")
+            time.sleep(self.tick_seconds)
+
+    def run_pending(self) -> List[str]:
+        """Executa os jobs vencidos cuja trava este worker conseguir (requer contexto de aplicação)"""
+        executed = []
+        for name in self._jobs:
+            if self.is_due(name) and self._acquire(name):
+                # Outro worker pode ter concluído o job entre a verificação e a trava
+                if self.is_due(name):
+                    self._execute(name)
+                    executed.append(name)
+                else:
+                    self._release(name)
+        return executed
+
+    def run_now(self, name: str) -> Dict[str, Any]:
+        """Executa um job imediatamente, respeitando a trava (requer contexto de aplicação)"""
+        if name not in self._jobs:
+            raise KeyError(f"Job desconhecido: {name}")
+        if not self._acquire(name):
+            raise RuntimeError(f"Job {name} em execução ou aguardando nova tentativa")
+        return self._execute(name)
+
+    def run_locked(self, name: str, func: Callable[[], Any], lease_seconds: Optional[int] = None) -> Optional[Any]:
+        """
+        Executa `func` fora da agenda diária, sob a trava de `name`: retorna o resultado, ou None
+        sem executar quando outro worker tem a trava (requer contexto de aplicação). Usado por
+        tarefas periódicas que um único worker deve fazer, como o snapshot do InsightAI.
+        """
+        self._get_job_row(name)
+        if not self._acquire(name, lease_seconds):
+            return None
+
+        from src.models.user import db
+
+        started = time.perf_counter()
+        now = datetime.now()
+        try:
+            result = func()
+        except Exception as e:
+            db.session.rollback()
+            self._release(name, last_status='error', last_error=str(e),
+                          last_seconds=round(time.perf_counter() - started, 4),
+                          locked_until=datetime.now() + timedelta(seconds=self.retry_seconds))
+            raise
+        self._release(name, last_run_at=now, last_status='success', last_error=None,
+                      last_seconds=round(time.perf_counter() - started, 4))
+        return result
+
+    def is_due(self, name: str, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.now()
+        job = self._get_job_row(name)
+        every_minutes = self._jobs[name]['every_minutes']
+        if every_minutes:
+            return job.last_run_at is None or now - job.last_run_at >= timedelta(minutes=every_minutes)
+        if now.hour < self._jobs[name]['at_hour']:
+            return False
+        return job.last_run_at is None or job.last_run_at.date() < now.date()
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        """Estado de todos os jobs registrados"""
+        return [dict(self._get_job_row(name).to_dict(), at_hour=job['at_hour'], every_minutes=job['every_minutes'])
+                for name, job in self._jobs.items()]
+
+    def _get_job_row(self, name: str):
+        from sqlalchemy.exc import IntegrityError
+        from src.models.user import db
+        from src.models.scheduled_job import ScheduledJob
+
+        job = db.session.get(ScheduledJob, name)
+        if job is None:
+            try:
+                job = ScheduledJob(name=name)
+                db.session.add(job)
+                db.session.commit()
+            except IntegrityError:
+                # Outro worker criou a linha ao mesmo tempo
+                db.session.rollback()
+                job = db.session.get(ScheduledJob, name)
+        return job
+
+    def _acquire(self, name: str, lease_seconds: Optional[int] = None) -> bool:
+        """UPDATE condicional: só um worker altera a linha enquanto a trava estiver livre ou vencida"""
+        from src.models.user import db
+        from src.models.scheduled_job import ScheduledJob
+
+        now = datetime.now()
+        lease_seconds = lease_seconds or self.lease_seconds
+        result = db.session.execute(
+            db.update(ScheduledJob).where(
+                ScheduledJob.name == name,
+                db.or_(ScheduledJob.locked_until == None, ScheduledJob.locked_until < now)
+            ).values(
+                locked_by=self.worker_id,
+                locked_until=now + timedelta(seconds=lease_seconds)
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        db.session.expire_all()
+        return result.rowcount == 1
+
+    def _release(self, name: str, **values):
+        from src.models.user import db
+        from src.models.scheduled_job import ScheduledJob
+
+        values.setdefault('locked_until', None)
+        db.session.execute(
+            db.update(ScheduledJob).where(
+                ScheduledJob.name == name,
+                ScheduledJob.locked_by == self.worker_id
+            ).values(locked_by=None, **values).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        db.session.expire_all()
+
+    def _execute(self, name: str) -> Dict[str, Any]:
+        from src.models.user import db
+
+        started = time.perf_counter()
+        now = datetime.now()
+        try:
+            result = self._jobs[name]['func'](now.date())
+        except Exception as e:
+            db.session.rollback()
+            # Mantém a trava até a próxima tentativa para não repetir a falha a cada ciclo
+            self._release(name, last_status='error', last_error=str(e),
+                          last_seconds=round(time.perf_counter() - started, 4),
+                          locked_until=datetime.now() + timedelta(seconds=self.retry_seconds))
+            print(f"Erro no job {name}: {e}")
+            return {'job': name, 'status': 'error', 'error': str(e)}
+
+        seconds = round(time.perf_counter() - started, 4)
+        self._release(name, last_run_at=now, last_status='success', last_error=None, last_seconds=seconds)
+        return {'job': name, 'status': 'success', 'seconds': seconds, 'result': result}
+
+
+# Instância global do agendador
+job_scheduler = JobScheduler()
@@ -432,6 +432,31 @@ def create_sample_data():
     print(f"   - {len(guests)} hóspedes")
     print(f"   - {len(bookings_data)} reservas")
 
+def seed_database():
+    """
+    Dados iniciais de um banco vazio: usuário demo e, se não houver pousadas, os dados de exemplo.
+    Executado pela CLI (flask --app src.main db seed), uma vez, e não a cada boot dos workers.
+    """
+    created = {'default_user': False, 'sample_data': False}
+    
+    # Create default user if not exists
+    if not User.query.first():
+        default_user = User(
+            name='Demo User',
+            email='demo@hostflow.com'
+        )
+        default_user.set_password('123456')
+        db.session.add(default_user)
+        db.session.commit()
+        created['default_user'] = True
+        print("✅ Default user created")
+    
+    # Create sample data if tables are empty
+    if not Property.query.first():
+        create_sample_data()
+        created['sample_data'] = True
+    
+    return created
+
 if __name__ == '__main__':
     create_sample_data()
-
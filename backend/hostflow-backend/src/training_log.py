@@ -0,0 +1,160 @@
+"""
+Log de treinamento do chatbot - HostFlow
+Eventos de treinamento e feedback gravados apenas por inserção (SQLite em modo WAL)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+class TrainingLog:
+    """
+    Log append-only compartilhado pelos workers do mesmo host.
+
+    Cada exemplo de treinamento ou feedback vira uma linha com número de sequência
+    crescente (seq). O snapshot do modelo registra o último seq incorporado; na
+    inicialização basta carregar o snapshot e reaplicar as linhas posteriores.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Uma conexão por thread (conexões SQLite não devem ser compartilhadas entre threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS training_events ('
+            ' seq INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' kind TEXT NOT NULL,'
+            ' payload TEXT NOT NULL,'
+            ' created_at TEXT NOT NULL)'
+        )
+        conn.execute('CREATE TABLE IF NOT EXISTS log_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS retrain_jobs ('
+            ' id TEXT PRIMARY KEY,'
+            ' status TEXT NOT NULL,'
+            ' submitted_at TEXT NOT NULL,'
+            ' started_at TEXT,'
+            ' finished_at TEXT,'
+            ' result TEXT,'
+            ' error TEXT)'
+        )
+
+    def append(self, kind: str, payload: Dict[str, Any]) -> int:
+        """Grava um evento e retorna seu número de sequência"""
+        cursor = self._connect().execute(
+            'INSERT INTO training_events (kind, payload, created_at) VALUES (?, ?, ?)',
+            (kind, json.dumps(payload, ensure_ascii=False), datetime.now().isoformat())
+        )
+        return cursor.lastrowid
+
+    def append_many(self, kind: str, payloads: List[Dict[str, Any]]) -> int:
+        """Grava vários eventos numa única transação; retorna o seq do último"""
+        conn = self._connect()
+        created_at = datetime.now().isoformat()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO training_events (kind, payload, created_at) VALUES (?, ?, ?)',
+                [(kind, json.dumps(payload, ensure_ascii=False), created_at) for payload in payloads]
+            )
+            seq = conn.execute('SELECT MAX(seq) FROM training_events').fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return seq or 0
+
+    def read_since(self, seq: int) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+        """Eventos com número de sequência maior que `seq`, em ordem"""
+        rows = self._connect().execute(
+            'SELECT seq, kind, payload FROM training_events WHERE seq > ? ORDER BY seq', (seq,)
+        )
+        for row_seq, kind, payload in rows:
+            yield row_seq, kind, json.loads(payload)
+
+    def last_seq(self) -> int:
+        row = self._connect().execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'training_events'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def count_since(self, seq: int) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM training_events WHERE seq > ?', (seq,)).fetchone()[0]
+
+    def exclusive(self):
+        """
+        Transação exclusiva de escrita: bloqueia novos eventos (de todos os workers)
+        enquanto o snapshot é gravado e o log é truncado.
+        """
+        return _ExclusiveTransaction(self._connect())
+
+    def snapshot_seq(self) -> int:
+        """Último seq incorporado ao snapshot gravado em disco"""
+        row = self._connect().execute("SELECT value FROM log_meta WHERE key = 'snapshot_seq'").fetchone()
+        return row[0] if row else 0
+
+    def truncate(self, seq: int):
+        """Registra que o snapshot incorporou até `seq` e remove esses eventos do log"""
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO log_meta (key, value) VALUES ('snapshot_seq', ?)", (seq,))
+        conn.execute('DELETE FROM training_events WHERE seq <= ?', (seq,))
+
+
+    # Jobs de re-treino: o estado fica no mesmo arquivo para qualquer worker poder consultá-lo
+
+    def create_job(self, job_id: str):
+        self._connect().execute(
+            "INSERT INTO retrain_jobs (id, status, submitted_at) VALUES (?, 'queued', ?)",
+            (job_id, datetime.now().isoformat())
+        )
+
+    def update_job(self, job_id: str, **fields):
+        if 'result' in fields:
+            fields['result'] = json.dumps(fields['result'], ensure_ascii=False)
+        columns = ', '.join(f'{name} = ?' for name in fields)
+        self._connect().execute(f'UPDATE retrain_jobs SET {columns} WHERE id = ?', (*fields.values(), job_id))
+
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT id, status, submitted_at, started_at, finished_at, result, error FROM retrain_jobs WHERE id = ?',
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(('id', 'status', 'submitted_at', 'started_at', 'finished_at', 'result', 'error'), row))
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+
+class _ExclusiveTransaction:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
@@ -0,0 +1,138 @@
+"""
+Buffer write-behind - HostFlow
+Itens aceitos em memória e gravados em lotes por uma thread de fundo (por tamanho ou tempo)
+"""
+
+import atexit
+import os
+import pickle
+import threading
+from collections import deque
+from typing import Any, Callable, List, Optional
+
+
+class WriteBehindBuffer:
+    """
+    Fila em memória com descarga em lote.
+
+    `put` apenas enfileira (O(1), sem I/O); a thread de fundo chama `flush_func(lote)`
+    quando a fila atinge `max_batch` itens ou a cada `interval` segundos. No
+    encerramento normal do processo (atexit) os itens pendentes são descarregados.
+
+    Um lote que falha volta para a frente da fila e é tentado de novo nas próximas
+    descargas; depois de `max_attempts` falhas (ou no encerramento) vai para o arquivo
+    `spill_path`, relido e reenfileirado quando um processo inicia a thread. Só conta como
+    perdido (`failed`) o lote que não pôde ser gravado nem no arquivo.
+    """
+
+    def __init__(self, flush_func: Callable[[List[Any]], None], name: str,
+                 max_batch: int = 200, interval: float = 2.0, max_attempts: int = 3,
+                 spill_path: Optional[str] = None):
+        self.flush_func = flush_func
+        self.name = name
+        self.max_batch = max_batch
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.spill_path = spill_path
+        self._items = deque()
+        self._retry = deque()  # (falhas, lote) a tentar antes dos itens novos
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.flushed = 0
+        self.retried = 0
+        self.spilled = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self._items) + sum(len(batch) for _, batch in self._retry)
+
+    def put(self, item: Any):
+        self._items.append(item)
+        self._ensure_started()
+        if len(self._items) >= self.max_batch:
+            self._wakeup.set()
+
+    def flush(self, final: bool = False) -> int:
+        """
+        Descarrega tudo o que está na fila, em lotes de até `max_batch` itens. Para na primeira
+        falha (o lote volta para a frente da fila); com final=True, o que não for gravado vai
+        direto para o arquivo de transbordo.
+        """
+        total = 0
+        with self._flush_lock:
+            while self._retry or self._items:
+                if self._retry:
+                    attempts, batch = self._retry.popleft()
+                else:
+                    attempts, batch = 0, []
+                    while self._items and len(batch) < self.max_batch:
+                        batch.append(self._items.popleft())
+                try:
+                    self.flush_func(batch)
+                    self.flushed += len(batch)
+                    total += len(batch)
+                except Exception as e:
+                    attempts += 1
+                    print(f"Erro ao gravar lote de {self.name} (tentativa {attempts}): {e}")
+                    if attempts < self.max_attempts and not final:
+                        self._retry.appendleft((attempts, batch))
+                        self.retried += len(batch)
+                        break
+                    self._spill(batch)
+        return total
+
+    def _spill(self, batch: List[Any]):
+        """Anexa o lote ao arquivo de transbordo; sem arquivo (ou se a escrita falhar), o lote é perdido"""
+        try:
+            if self.spill_path is None:
+                raise RuntimeError("sem arquivo de transbordo")
+            with open(self.spill_path, 'ab') as f:
+                pickle.dump(batch, f)
+            self.spilled += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Lote de {self.name} perdido ({len(batch)} itens): {e}")
+
+    def _load_spill(self):
+        """
+        Reenfileira os lotes transbordados por execuções anteriores. O arquivo é renomeado antes
+        da leitura (operação atômica): com vários workers, só um deles fica com cada lote.
+        """
+        if self.spill_path is None or not os.path.exists(self.spill_path):
+            return
+        claimed = f"{self.spill_path}.{os.getpid()}"
+        try:
+            os.replace(self.spill_path, claimed)
+        except OSError:
+            return  # outro processo pegou o arquivo
+        try:
+            with open(claimed, 'rb') as f:
+                while True:
+                    try:
+                        self._retry.append((0, pickle.load(f)))
+                    except EOFError:
+                        break
+            os.remove(claimed)
+        except Exception as e:
+            print(f"Erro ao reler transbordo de {self.name} ({claimed}): {e}")
+
+    def _ensure_started(self):
+        # Depois de um fork a thread do processo pai não existe no filho
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._flush_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._load_spill()
+            self._thread = threading.Thread(target=self._run, name=f'{self.name}-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush, final=True)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()